@@ -14,6 +14,7 @@
 import binascii
 import functools
 import glob
+import itertools
 import locale
 import logging
 import numbers
@@ -1051,6 +1052,37 @@ def utf8_encode_structure(data):
     return data
 
 
+def encode_pieces_rle(pieces):
+    """Run-length encode the piece states of a torrent.
+
+    Args:
+        pieces (iterable of int): The state of each piece.
+
+    Returns:
+        list of tuple: The (state, count) runs of consecutive pieces in the same state.
+
+    """
+    return [
+        (state, sum(1 for dummy in run)) for state, run in itertools.groupby(pieces)
+    ]
+
+
+def decode_pieces_rle(runs):
+    """Decode the run-length encoded piece states of a torrent.
+
+    Args:
+        runs (list of tuple): The (state, count) runs from encode_pieces_rle.
+
+    Returns:
+        list of int: The state of each piece.
+
+    """
+    pieces = []
+    for state, count in runs:
+        pieces.extend([state] * count)
+    return pieces
+
+
 @functools.total_ordering
 class VersionSplit(object):
     """
@@ -18,6 +18,9 @@
 from __future__ import unicode_literals
 
 import logging
+import threading
+import time
+from collections import deque
 
 from twisted.internet import reactor
 
@@ -31,10 +34,19 @@
 class AlertManager(component.Component):
     """AlertManager fetches and processes libtorrent alerts"""
 
-    def __init__(self):
+    def __init__(self, wait_for_alerts=True):
+        """
+        :param wait_for_alerts: bool, if True a thread waits for libtorrent
+            alerts and wakes the reactor to handle them, otherwise the alerts
+            are only polled every 0.3 seconds
+        """
         log.debug('AlertManager init...')
-        component.Component.__init__(self, 'AlertManager', interval=0.3)
-        self.session = component.get('Core').session
+        session = component.get('Core').session
+        self.wait_for_alerts = wait_for_alerts and hasattr(session, 'wait_for_alert')
+        # Waiting for alerts only needs an occasional poll as a fallback.
+        interval = 1 if self.wait_for_alerts else 0.3
+        component.Component.__init__(self, 'AlertManager', interval=interval)
+        self.session = session
 
         # Increase the alert queue size so that alerts don't get lost.
         self.alert_queue_size = 10000
@@ -54,26 +66,80 @@ def __init__(self):
 
         # handlers is a dictionary of lists {"alert_type": [handler1,h2,..]}
         self.handlers = {}
-        self.delayed_calls = []
+        # The (alert_type, handler) pairs where handler takes a list of alerts.
+        self.batch_handlers = set()
+
+        # Alerts waiting to be dispatched to the handlers, in the order popped.
+        self.alert_queue = deque()
+        self.dispatch_call = None
+        # The time in seconds spent dispatching before yielding to the reactor
+        # and the most alerts of a type passed to handlers at once.
+        self.dispatch_time_budget = 0.05
+        self.max_batch_size = 1000
+
+        # Counters of the alerts popped and handled.
+        self.alerts_popped = 0
+        self.alerts_handled = 0
+        self.dispatch_passes = 0
+        self.alerts_per_second = 0.0
+        self._rate_alerts = 0
+        self._rate_time = time.time()
+
+        # The thread waiting for alerts, it only waits again once the ready
+        # event is set after the popped alerts have been dispatched.
+        self.alert_wait_timeout = 500  # milliseconds
+        self.wakeups = 0
+        self._wait_thread = None
+        self._wait_session = None
+        self._wait_ready = None
+        self._wait_stop = None
+
+    def start(self):
+        if self.wait_for_alerts:
+            self._wait_session = self.session
+            self._wait_ready = threading.Event()
+            self._wait_ready.set()
+            self._wait_stop = threading.Event()
+            self._wait_thread = threading.Thread(
+                target=self._wait_for_alerts,
+                args=(self._wait_session, self._wait_ready, self._wait_stop),
+                name='AlertManagerWait',
+            )
+            self._wait_thread.daemon = True
+            self._wait_thread.start()
 
     def update(self):
-        self.delayed_calls = [dc for dc in self.delayed_calls if dc.active()]
         self.handle_alerts()
+        self._update_rate()
 
     def stop(self):
-        for delayed_call in self.delayed_calls:
-            if delayed_call.active():
-                delayed_call.cancel()
-        self.delayed_calls = []
+        if self._wait_thread:
+            self._wait_stop.set()
+            self._wait_ready.set()
+            # Post an alert to end the wait so the thread is finished before
+            # the session is destroyed.
+            self._wait_session.post_session_stats()
+            self._wait_thread.join(self.alert_wait_timeout / 1000)
+            self._wait_thread = None
+            self._wait_session = None
+        if self.dispatch_call and self.dispatch_call.active():
+            self.dispatch_call.cancel()
+        self.dispatch_call = None
+        self.alert_queue.clear()
 
-    def register_handler(self, alert_type, handler):
+    def register_handler(self, alert_type, handler, batch=False):
         """
         Registers a function that will be called when 'alert_type' is pop'd
         in handle_alerts.  The handler function should look like: handler(alert)
         Where 'alert' is the actual alert object from libtorrent.
 
+        Alerts of the same type that are popped together are dispatched as a
+        batch, set `batch` to have the handler called once with the list of
+        alerts instead of once per alert.
+
         :param alert_type: str, this is string representation of the alert name
         :param handler: func(alert), the function to be called when the alert is raised
+        :param batch: bool, if True the handler is called with a list of alerts
         """
         if alert_type not in self.handlers:
             # There is no entry for this alert type yet, so lets make it with an
@@ -82,6 +148,8 @@ def register_handler(self, alert_type, handler):
 
         # Append the handler to the list in the handlers dictionary
         self.handlers[alert_type].append(handler)
+        if batch:
+            self.batch_handlers.add((alert_type, handler))
         log.debug('Registered handler for alert %s', alert_type)
 
     def deregister_handler(self, handler):
@@ -95,13 +163,26 @@ def deregister_handler(self, handler):
             if handler in value:
                 # Handler is in this alert type list
                 value.remove(handler)
+        self.batch_handlers = {
+            (alert_type, batch_handler)
+            for alert_type, batch_handler in self.batch_handlers
+            if batch_handler != handler
+        }
 
     def handle_alerts(self):
         """
         Pops all libtorrent alerts in the session queue and handles them appropriately.
+
+        Nothing is popped until the previously popped alerts are dispatched, as
+        libtorrent frees them on the next pop.
         """
+        if self.alert_queue:
+            return
+
         alerts = self.session.pop_alerts()
         if not alerts:
+            if not self.dispatch_call:
+                self._alerts_dispatched()
             return
 
         num_alerts = len(alerts)
@@ -113,18 +194,130 @@ def handle_alerts(self):
                 num_alerts,
             )
 
-        # Loop through all alerts in the queue
+        self.alerts_popped += num_alerts
+        self._rate_alerts += num_alerts
+        debug = log.isEnabledFor(logging.DEBUG)
+        # Queue the alerts that have handlers, keeping their order.
         for alert in alerts:
             alert_type = type(alert).__name__
             # Display the alert message
-            if log.isEnabledFor(logging.DEBUG):
+            if debug:
                 log.debug('%s: %s', alert_type, decode_bytes(alert.message()))
-            # Call any handlers for this alert type
-            if alert_type in self.handlers:
-                for handler in self.handlers[alert_type]:
-                    if log.isEnabledFor(logging.DEBUG):
-                        log.debug('Handling alert: %s', alert_type)
-                    self.delayed_calls.append(reactor.callLater(0, handler, alert))
+            if self.handlers.get(alert_type):
+                self.alert_queue.append((alert_type, alert))
+
+        self.dispatch_alerts()
+
+    def dispatch_alerts(self):
+        """
+        Calls the handlers for the queued alerts until the queue is empty or
+        the dispatch time budget is used, then yields to the reactor and
+        continues in the next reactor iteration.
+
+        Consecutive alerts of the same type are dispatched together as a batch.
+        """
+        if self.dispatch_call and self.dispatch_call.active():
+            self.dispatch_call.cancel()
+        self.dispatch_call = None
+        self.dispatch_passes += 1
+        deadline = time.time() + self.dispatch_time_budget
+
+        while self.alert_queue and time.time() < deadline:
+            self._dispatch_batch(self._pop_batch(self.alert_queue))
+
+        if self.alert_queue:
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug('Alert dispatch backlog: %s', self.get_backlog())
+            self.dispatch_call = reactor.callLater(0, self.dispatch_alerts)
+        else:
+            self._alerts_dispatched()
+
+    def _alerts_dispatched(self):
+        """Let the thread waiting for alerts wait again."""
+        if self._wait_ready:
+            self._wait_ready.set()
+
+    def _wait_for_alerts(self, session, ready, stop):
+        """Wait in a thread for libtorrent alerts and wake the reactor.
+
+        :param session: lt.session, the session to wait on
+        :param ready: threading.Event, set when the alerts have been handled
+        :param stop: threading.Event, set to end the thread
+        """
+        while True:
+            ready.wait()
+            if stop.is_set():
+                return
+            if session.wait_for_alert(self.alert_wait_timeout) and not stop.is_set():
+                ready.clear()
+                reactor.callFromThread(self._on_alert_wakeup)
+
+    def _on_alert_wakeup(self):
+        self.wakeups += 1
+        # A paused AlertManager handles the alerts when the update resumes.
+        if self._component_state == 'Started':
+            self.handle_alerts()
+
+    def _pop_batch(self, queue):
+        """Pop the next alerts of the same type from the queue.
+
+        :param queue: deque, the queue of (alert_type, alert)
+        :returns: tuple, the alert_type and the list of alerts
+        """
+        alert_type = queue[0][0]
+        alerts = []
+        while queue and queue[0][0] == alert_type and len(alerts) < self.max_batch_size:
+            alerts.append(queue.popleft()[1])
+        return alert_type, alerts
+
+    def _dispatch_batch(self, batch):
+        """Call the handlers of the alert type with the alerts."""
+        alert_type, alerts = batch
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug('Handling %s alerts: %s', len(alerts), alert_type)
+        self.alerts_handled += len(alerts)
+        # Copy the handlers as a handler may deregister itself.
+        for handler in list(self.handlers.get(alert_type, [])):
+            if (alert_type, handler) in self.batch_handlers:
+                self._call_handler(handler, alerts)
+            else:
+                for alert in alerts:
+                    self._call_handler(handler, alert)
+
+    @staticmethod
+    def _call_handler(handler, arg):
+        try:
+            handler(arg)
+        except Exception as ex:
+            # Keep dispatching the other alerts.
+            log.exception('Error handling alert with %s: %s', handler, ex)
+
+    def _update_rate(self):
+        now = time.time()
+        elapsed = now - self._rate_time
+        if elapsed >= 1:
+            self.alerts_per_second = self._rate_alerts / elapsed
+            self._rate_alerts = 0
+            self._rate_time = now
+
+    def get_backlog(self):
+        """The number of alerts waiting to be dispatched"""
+        return len(self.alert_queue)
+
+    def get_stats(self):
+        """
+        Returns the alert dispatch counters.
+
+        :returns: dict, the counters
+        """
+        return {
+            'alerts_popped': self.alerts_popped,
+            'alerts_handled': self.alerts_handled,
+            'alerts_per_second': self.alerts_per_second,
+            'dispatch_passes': self.dispatch_passes,
+            'wakeups': self.wakeups,
+            'backlog': self.get_backlog(),
+        }
 
     def set_alert_queue_size(self, queue_size):
         """Sets the maximum size of the libtorrent alert queue"""
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+
+"""Tuning of the libtorrent session settings from its performance warnings."""
+from __future__ import division, unicode_literals
+
+import logging
+from collections import deque
+
+from twisted.internet import reactor
+
+import deluge.component as component
+from deluge._libtorrent import lt
+from deluge.common import decode_bytes
+
+log = logging.getLogger(__name__)
+
+# The session setting adjusted for a performance warning as
+# (setting, factor applied per adjustment, bound as a factor of the original value).
+TUNING_RULES = {
+    'send_buffer_watermark_too_low': ('send_buffer_watermark', 1.5, 6),
+    'outstanding_disk_buffer_limit_reached': ('max_queued_disk_bytes', 1.5, 4),
+    'outstanding_request_limit_reached': ('max_out_request_queue', 1.5, 4),
+    'too_high_disk_queue_limit': ('max_queued_disk_bytes', 0.75, 0.25),
+    'too_few_file_descriptors': ('file_pool_size', 0.75, 0.25),
+}
+
+# The performance warnings caused by user settings, which are not changed.
+TUNING_ADVICE = {
+    'upload_limit_too_low': 'Raise the upload speed limit or lower the connection '
+    'limits, the limit is too low for the number of connections',
+    'download_limit_too_low': 'Raise the download speed limit or lower the '
+    'connection limits, the limit is too low for the number of connections',
+    'too_few_outgoing_ports': 'Widen the outgoing ports range, there are not enough '
+    'ports for the number of connections',
+    'too_many_optimistic_unchoke_slots': 'Lower the optimistic unchoke slots, there '
+    'are more than upload slots',
+    'bittyrant_with_no_uplimit': 'Set an upload speed limit, the bittyrant choker '
+    'needs one',
+}
+
+
+def get_warning_name(warning_code):
+    """The name of a libtorrent performance warning code."""
+    for name, code in lt.performance_warning_t.names.items():
+        if code == warning_code:
+            return name
+    return str(warning_code)
+
+
+class AutoTuner(component.Component):
+    """Adjusts the session settings on libtorrent performance warnings.
+
+    Each adjustment multiplies the setting by a fixed factor and is bounded
+    relative to the value the setting had before it was first tuned, so it
+    can always be reset. A setting is adjusted at most once every
+    `min_interval` seconds as the warnings repeat until the change takes
+    effect. Every decision is recorded for the tuning report.
+
+    Args:
+        core (Core): The core the session settings are applied by.
+
+    """
+
+    def __init__(self, core):
+        component.Component.__init__(self, 'AutoTuner')
+        self.core = core
+        self.clock = reactor
+        self.min_interval = 60
+        # The value of the tuned settings before they were first changed.
+        self.original_values = {}
+        self.decisions = deque(maxlen=100)
+        self._last_change = {}
+
+        component.get('AlertManager').register_handler(
+            'performance_alert', self.on_alert_performance
+        )
+
+    def on_alert_performance(self, alert):
+        """Alert handler for libtorrent performance_alert"""
+        message = decode_bytes(alert.message())
+        log.warning('on_alert_performance: %s, %s', message, alert.warning_code)
+        self.tune(get_warning_name(alert.warning_code), message)
+
+    def tune(self, warning, message=''):
+        """Adjust the session setting for a performance warning.
+
+        Args:
+            warning (str): The performance warning name.
+            message (str, optional): The warning message, for the report.
+
+        """
+        if warning not in TUNING_RULES:
+            advice = TUNING_ADVICE.get(warning, 'No tuning rule for this warning')
+            if self._record_once(warning, None, None, None, advice):
+                log.info('Not tuning for %s: %s', warning, advice)
+            return
+
+        setting, factor, bound = TUNING_RULES[warning]
+        now = self.clock.seconds()
+        if now - self._last_change.get(setting, -self.min_interval) < self.min_interval:
+            return
+
+        value = self.core.session.get_settings()[setting]
+        original = self.original_values.get(setting, value)
+        limit = int(original * bound)
+        new_value = int(value * factor)
+        if new_value == value:
+            new_value += 1 if factor > 1 else -1
+        new_value = min(new_value, limit) if factor > 1 else max(new_value, limit)
+
+        if new_value == value:
+            reason = '%s reached its tuning limit of %s' % (setting, limit)
+            if self._record_once(warning, setting, value, value, reason):
+                log.warning(reason)
+            return
+
+        self.original_values.setdefault(setting, value)
+        self._last_change[setting] = now
+        log.info('Tuning %s from %s to %s for %s', setting, value, new_value, warning)
+        self.core.apply_session_setting(setting, new_value)
+        self._record(warning, setting, value, new_value, message)
+
+    def reset(self):
+        """Set the tuned settings back to their original values."""
+        settings = self.core.session.get_settings()
+        for setting, original in self.original_values.items():
+            log.info('Resetting tuned %s to %s', setting, original)
+            self.core.apply_session_setting(setting, original)
+            self._record('reset', setting, settings[setting], original, 'Reset')
+        self.original_values.clear()
+        self._last_change.clear()
+
+    def get_report(self):
+        """Get the tuned settings and the recorded decisions.
+
+        Returns:
+            dict: The `settings` as {setting: {original, current}} and the
+                `decisions` as a list of dicts, oldest first.
+
+        """
+        settings = self.core.session.get_settings()
+        return {
+            'settings': {
+                setting: {'original': original, 'current': settings[setting]}
+                for setting, original in self.original_values.items()
+            },
+            'decisions': list(self.decisions),
+        }
+
+    def _record(self, warning, setting, old_value, new_value, reason):
+        self.decisions.append(
+            {
+                'time': self.clock.seconds(),
+                'warning': warning,
+                'setting': setting,
+                'old_value': old_value,
+                'new_value': new_value,
+                'reason': reason,
+            }
+        )
+
+    def _record_once(self, warning, setting, old_value, new_value, reason):
+        """Record a decision unless it repeats the last one for the warning.
+
+        Returns:
+            bool: True if the decision was recorded.
+
+        """
+        for decision in reversed(self.decisions):
+            if decision['warning'] == warning:
+                if decision['reason'] == reason:
+                    return False
+                break
+        self._record(warning, setting, old_value, new_value, reason)
+        return True
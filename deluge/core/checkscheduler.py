@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+
+"""Scheduling of the forced rechecks of the torrents per device."""
+from __future__ import division, unicode_literals
+
+import logging
+
+from twisted.internet import reactor
+
+from deluge.core.devicequeue import DeviceJob, DeviceQueue
+
+log = logging.getLogger(__name__)
+
+# The key of the check throughput of all the devices together.
+ALL_DEVICES = 'all'
+
+
+class CheckJob(DeviceJob):
+    """A forced recheck of a torrent.
+
+    Args:
+        torrent_id (str): The torrent ID.
+        save_path (str): The download location of the torrent.
+        size (int): The bytes to check.
+
+    """
+
+    running_state = 'Checking'
+
+    def __init__(self, torrent_id, save_path, size):
+        super(CheckJob, self).__init__(torrent_id, [save_path], size)
+        self.save_path = save_path
+        self.started = None
+
+
+class CheckScheduler(DeviceQueue):
+    """Starts the forced rechecks of the torrents, a few at a time per device.
+
+    The check throughput of a device is the bytes checked over the time
+    checks were running on it, so it accounts for the checks sharing it.
+    The ETA of a check is estimated from the throughput of its device and
+    the bytes of the checks to run before it on that device.
+
+    Args:
+        start_check (func): Called with the torrent_id to start a recheck,
+            returns False if the recheck could not be started.
+        max_per_device (int): The number of checks run at once on a device,
+            -1 for no limit.
+
+    """
+
+    def __init__(self, start_check, max_per_device=1):
+        super(CheckScheduler, self).__init__(
+            lambda job: start_check(job.torrent_id), max_per_device
+        )
+        self.clock = reactor
+        # The bytes checked and the seconds checks ran, keyed by device.
+        self._checked = {}
+        self._busy_time = {}
+        # The start of the current run of checks on a device.
+        self._busy_since = {}
+        # The bytes of the queued checks on the device of a queued check up
+        # to and including it, cleared when the queue changes.
+        self._queued_bytes = None
+
+    def add_check(self, torrent_id, save_path, size):
+        """Queue a recheck, replacing a queued recheck of the torrent.
+
+        Args:
+            torrent_id (str): The torrent ID.
+            save_path (str): The download location of the torrent.
+            size (int): The bytes to check.
+
+        """
+        self.add(CheckJob(torrent_id, save_path, size))
+
+    def cancel(self, torrent_id):
+        if not super(CheckScheduler, self).cancel(torrent_id):
+            return False
+        log.info('Cancelled the recheck of %s', torrent_id)
+        return True
+
+    def get_throughput(self, device=ALL_DEVICES):
+        """The check throughput of a device, or of all the devices together.
+
+        Returns:
+            float: The bytes checked per second, 0 if nothing was checked yet.
+
+        """
+        busy_time = self._busy_time.get(device, 0)
+        if device in self._busy_since:
+            busy_time += self.clock.seconds() - self._busy_since[device]
+        if not busy_time:
+            return 0.0
+        return self._checked.get(device, 0) / busy_time
+
+    def get_eta(self, torrent_id):
+        """The estimated seconds until the check of a torrent is finished.
+
+        Returns:
+            int: The ETA, or -1 if the torrent has no check or the throughput
+                of its device is not known yet.
+
+        """
+        job = self.running.get(torrent_id) or self.jobs.get(torrent_id)
+        if not job:
+            return -1
+        now = self.clock.seconds()
+        rate = min(self.get_throughput(device) for device in job.devices)
+        if not rate:
+            return -1
+
+        remaining = 0
+        for running in self.running.values():
+            if running.devices & job.devices:
+                remaining += max(running.size - rate * (now - running.started), 0)
+        if job.state == 'Queued':
+            remaining += self.get_queued_bytes()[torrent_id]
+        return int(remaining / rate)
+
+    def get_queued_bytes(self):
+        """The bytes to check on its device before each queued check is done.
+
+        Returns:
+            dict: The bytes of the queued checks on the device of a check up
+                to and including it, keyed by torrent_id.
+
+        """
+        if self._queued_bytes is None:
+            totals = {}
+            self._queued_bytes = {}
+            for job in self.get_queued():
+                # A check only reads from the device of its save_path.
+                (device,) = job.devices
+                totals[device] = totals.get(device, 0) + job.size
+                self._queued_bytes[job.torrent_id] = totals[device]
+        return self._queued_bytes
+
+    def get_status(self):
+        """The status of the started then the queued checks, in start order.
+
+        Returns:
+            list of dict: The check status with its ETA.
+
+        """
+        statuses = super(CheckScheduler, self).get_status()
+        for status in statuses:
+            status['eta'] = self.get_eta(status['torrent_id'])
+        return statuses
+
+    def _queue_changed(self):
+        super(CheckScheduler, self)._queue_changed()
+        self._queued_bytes = None
+
+    def _on_job_started(self, job):
+        now = self.clock.seconds()
+        job.started = now
+        for device in list(job.devices) + [ALL_DEVICES]:
+            self._busy_since.setdefault(device, now)
+
+    def _on_job_done(self, job):
+        now = self.clock.seconds()
+        for device in list(job.devices) + [ALL_DEVICES]:
+            self._checked[device] = self._checked.get(device, 0) + job.size
+            if device == ALL_DEVICES:
+                busy = self.running
+            else:
+                busy = self._active[device]
+            if not busy:
+                self._busy_time[device] = (
+                    self._busy_time.get(device, 0) + now - self._busy_since.pop(device)
+                )
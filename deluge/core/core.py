@@ -35,11 +35,14 @@
     AUTH_LEVELS_MAPPING_REVERSE,
     AuthManager,
 )
+from deluge.core.autotuner import AutoTuner
 from deluge.core.eventmanager import EventManager
 from deluge.core.filtermanager import FilterManager
+from deluge.core.metrics import MetricsManager
 from deluge.core.pluginmanager import PluginManager
 from deluge.core.preferencesmanager import PreferencesManager
 from deluge.core.rpcserver import export
+from deluge.core.subscriptionmanager import SubscriptionManager
 from deluge.core.torrentmanager import TorrentManager
 from deluge.decorators import deprecated
 from deluge.error import (
@@ -146,7 +149,10 @@ def __init__(
         self.pluginmanager = PluginManager(self)
         self.torrentmanager = TorrentManager()
         self.filtermanager = FilterManager(self)
+        self.subscriptionmanager = SubscriptionManager(self)
         self.authmanager = AuthManager()
+        self.autotuner = AutoTuner(self)
+        self.metricsmanager = MetricsManager(self)
 
         # New release check information
         self.new_release = None
@@ -191,7 +197,11 @@ def __init__(
         self.__new_release = None
 
         # Session status timer
-        self.session_status = {k.name: 0 for k in lt.session_stats_metrics()}
+        # The type of each libtorrent session counter, counter or gauge.
+        self.session_metric_types = {
+            k.name: k.type.name for k in lt.session_stats_metrics()
+        }
+        self.session_status = dict.fromkeys(self.session_metric_types, 0)
         self._session_prev_bytes = {k: 0 for k in SESSION_RATES_MAPPING}
         # Initiate other session status keys.
         self.session_status.update(self._session_prev_bytes)
@@ -499,21 +509,59 @@ def add_torrent_files(self, torrent_files):
 
         """
 
-        @defer.inlineCallbacks
-        def add_torrents():
-            errors = []
-            last_index = len(torrent_files) - 1
-            for idx, torrent in enumerate(torrent_files):
-                try:
-                    yield self.add_torrent_file_async(
-                        torrent[0], torrent[1], torrent[2], save_state=idx == last_index
-                    )
-                except AddTorrentError as ex:
-                    log.warning('Error when adding torrent: %s', ex)
-                    errors.append(ex)
-            defer.returnValue(errors)
+        def on_torrents_added(results):
+            return [
+                AddTorrentError(result) for success, result in results if not success
+            ]
+
+        d = self.add_torrents_bulk(torrent_files)
+        d.addCallback(on_torrents_added)
+        return d
+
+    @export
+    def add_torrents_bulk(self, torrents):
+        """Adds many torrent files and magnet uris to the session.
+
+        The torrents are validated in worker threads and added in pipelined
+        batches, with the session state saved once at the end.
+
+        Args:
+            torrents (list of tuples): Torrents as tuple of (filename, filedump, options),
+                where filedump is a base64 encoded string of the torrent file contents,
+                or (magnet, None, options) for a magnet uri.
+
+        Returns:
+            Deferred: A list with (True, torrent_id) or (False, error message) for
+                each torrent, in the order given.
+
+        """
+        bulk = []
+        # The results of the torrents that failed to decode, keyed by index.
+        failed = {}
+        for index, (filename, filedump, options) in enumerate(torrents):
+            if not filedump and deluge.common.is_magnet(filename):
+                bulk.append({'magnet': filename, 'options': options})
+                continue
+            try:
+                filedump = b64decode(filedump)
+            except (TypeError, ValueError) as ex:
+                log.error('There was an error decoding the filedump string: %s', ex)
+                failed[index] = (False, 'Unable to decode filedump: %s' % ex)
+                continue
+            bulk.append(
+                {'filename': filename, 'filedump': filedump, 'options': options}
+            )
 
-        return task.deferLater(reactor, 0, add_torrents)
+        def on_added(results):
+            results = iter(results)
+            return [
+                failed[index] if index in failed else next(results)
+                for index in range(len(torrents))
+            ]
+
+        d = self.torrentmanager.add_bulk(bulk)
+        d.addCallback(on_added)
+        return d
 
     @export
     def add_torrent_url(self, url, options, headers=None):
@@ -607,16 +655,7 @@ def remove_torrents(self, torrent_ids, remove_data):
         log.info('Removing %d torrents from core.', len(torrent_ids))
 
         def do_remove_torrents():
-            errors = []
-            for torrent_id in torrent_ids:
-                try:
-                    self.torrentmanager.remove(
-                        torrent_id, remove_data=remove_data, save_state=False
-                    )
-                except InvalidTorrentError as ex:
-                    errors.append((torrent_id, str(ex)))
-            # Save the session state
-            self.torrentmanager.save_state()
+            errors = self.torrentmanager.remove_bulk(torrent_ids, remove_data)
             if errors:
                 log.warning(
                     'Failed to remove %d of %d torrents.', len(errors), len(torrent_ids)
@@ -625,6 +664,23 @@ def do_remove_torrents():
 
         return task.deferLater(reactor, 0, do_remove_torrents)
 
+    @export
+    def get_data_deletion_status(self):
+        """Get the status of the data deletion of removed torrents.
+
+        Returns:
+            list of dict: The queued, deleting and failed deletions, in queue order,
+                with the keys torrent_id, name, save_path, state, total_files,
+                deleted_files and error.
+
+        """
+        return self.torrentmanager.data_deletion.get_status()
+
+    @export
+    def clear_data_deletion_errors(self):
+        """Forget the failed data deletions of removed torrents."""
+        self.torrentmanager.data_deletion.clear_failed()
+
     @export
     def get_session_status(self, keys):
         """Gets the session status values for 'keys', these keys are taking
@@ -692,6 +748,42 @@ def move_storage(self, torrent_ids, dest):
             if not self.torrentmanager[torrent_id].move_storage(dest):
                 log.warning('Error moving torrent %s to %s', torrent_id, dest)
 
+    @export
+    def cancel_move_storage(self, torrent_ids):
+        """Cancel the queued storage moves of the torrents, started moves carry on.
+
+        Returns:
+            list: The torrent_ids whose queued move was cancelled.
+
+        """
+        return [
+            torrent_id
+            for torrent_id in torrent_ids
+            if self.torrentmanager.cancel_move_storage(torrent_id)
+        ]
+
+    @export
+    def set_move_storage_priority(self, torrent_ids, priority):
+        """Set the priority of the queued storage moves of the torrents.
+
+        Args:
+            torrent_ids (list): The torrent_ids.
+            priority (int): The moves with a higher priority are started first.
+
+        """
+        for torrent_id in torrent_ids:
+            self.torrentmanager.move_scheduler.set_priority(torrent_id, priority)
+
+    @export
+    def get_move_storage_status(self):
+        """Get the status of the started and queued storage moves.
+
+        Returns:
+            list of dict: The move status, in the order they are started.
+
+        """
+        return self.torrentmanager.move_scheduler.get_status()
+
     @export
     def pause_session(self):
         """Pause the entire session"""
@@ -770,12 +862,32 @@ def get_torrent_status(self, torrent_id, keys, diff=False):
         )
 
     @export
-    def get_torrents_status(self, filter_dict, keys, diff=False):
+    def search_torrents(self, query, limit=None):
+        """Search the torrent names, files, trackers and plugin fields e.g. label.
+
+        Args:
+            query (str): The search terms, all of them have to match.
+            limit (int, optional): The most results to return.
+
+        Returns:
+            list: The (torrent_id, score) tuples of the matching torrents,
+                best match first.
+
+        """
+        return self.filtermanager.search_torrents(query, limit)
+
+    @export
+    def get_torrents_status(self, filter_dict, keys, diff=False, max_age=None):
         """
         returns all torrents , optionally filtered by filter_dict.
+
+        The status is refreshed from libtorrent unless it is more recent than
+        max_age seconds, defaults to the status_refresher max_age.
         """
         torrent_ids = self.filtermanager.filter_torrent_ids(filter_dict)
-        d = self.torrentmanager.torrents_status_update(torrent_ids, keys, diff=diff)
+        d = self.torrentmanager.torrents_status_update(
+            torrent_ids, keys, diff=diff, max_age=max_age
+        )
 
         def add_plugin_fields(args):
             status_dict, plugin_keys = args
@@ -790,6 +902,50 @@ def add_plugin_fields(args):
         d.addCallback(add_plugin_fields)
         return d
 
+    @export
+    def get_status_refresh_stats(self):
+        """Get the counters of the torrent status refreshes from libtorrent.
+
+        Returns:
+            dict: The refreshes, requests, requests_cached, refreshes_per_second
+                and requests_per_refresh counters.
+
+        """
+        return self.torrentmanager.status_refresher.get_stats()
+
+    @export
+    def subscribe_torrents_status(self, filter_dict, keys, interval=1):
+        """Subscribe to pushed torrent status changes instead of polling.
+
+        After each torrent status update, at most once per interval, the changed
+        values are sent to this session as a TorrentsStatusDeltaEvent with the
+        args (subscription_id, changes, removed). The first delta has the full
+        status of each torrent. The client must register interest in the event.
+
+        Args:
+            filter_dict (dict): The filter for the torrents to include.
+            keys (list): The status keys to send, all keys if empty.
+            interval (float, optional): The minimum time in seconds between deltas.
+
+        Returns:
+            int: The subscription id.
+
+        """
+        return self.subscriptionmanager.subscribe(filter_dict, keys, interval)
+
+    @export
+    def unsubscribe_torrents_status(self, subscription_id):
+        """Remove a torrent status subscription.
+
+        Args:
+            subscription_id (int): The id from subscribe_torrents_status.
+
+        Returns:
+            bool: True if the subscription was removed.
+
+        """
+        return self.subscriptionmanager.unsubscribe(subscription_id)
+
     @export
     def get_filter_tree(self, show_zero_hits=True, hide_cat=None):
         """
@@ -798,6 +954,52 @@ def get_filter_tree(self, show_zero_hits=True, hide_cat=None):
         """
         return self.filtermanager.get_filter_tree(show_zero_hits, hide_cat)
 
+    @export
+    def get_filter_tree_versioned(
+        self, version=None, show_zero_hits=True, hide_cat=None
+    ):
+        """Returns the filter tree only if it changed since version.
+
+        Args:
+            version (str, optional): The version tag from a previous call.
+            show_zero_hits (bool, optional): Include values with no torrents.
+            hide_cat (list, optional): The tree fields to leave out.
+
+        Returns:
+            tuple: The (version, tree) where tree is None if unchanged.
+
+        """
+        return self.filtermanager.get_filter_tree_versioned(
+            version, show_zero_hits, hide_cat
+        )
+
+    @export
+    def get_tracker_stats(self):
+        """Get the announce metrics of each tracker host.
+
+        Returns:
+            dict: The {host: stats} with the torrents and errors counts, the
+                last announce latency and the seconds to the next announce.
+
+        """
+        return self.torrentmanager.tracker_registry.get_stats()
+
+    @export
+    def get_tuning_report(self):
+        """Get the session settings changed by the auto-tuner and why.
+
+        Returns:
+            dict: The tuned `settings` with their original and current values,
+                and the `decisions` made on the libtorrent performance warnings.
+
+        """
+        return self.autotuner.get_report()
+
+    @export
+    def reset_tuning(self):
+        """Set the session settings changed by the auto-tuner back."""
+        self.autotuner.reset()
+
     @export
     def get_session_state(self):
         """Returns a list of torrent_ids in the session."""
@@ -889,6 +1091,47 @@ def force_recheck(self, torrent_ids):
         for torrent_id in torrent_ids:
             self.torrentmanager[torrent_id].force_recheck()
 
+    @export
+    def cancel_recheck(self, torrent_ids):
+        """Cancel the queued rechecks of the torrents, started rechecks carry on.
+
+        Returns:
+            list: The torrent_ids whose queued recheck was cancelled.
+
+        """
+        return [
+            torrent_id
+            for torrent_id in torrent_ids
+            if self.torrentmanager.check_scheduler.cancel(torrent_id)
+        ]
+
+    @export
+    def set_recheck_priority(self, torrent_ids, priority):
+        """Set the priority of the queued rechecks of the torrents.
+
+        Args:
+            torrent_ids (list): The torrent_ids.
+            priority (int): The rechecks with a higher priority are started first.
+
+        """
+        for torrent_id in torrent_ids:
+            self.torrentmanager.check_scheduler.set_priority(torrent_id, priority)
+
+    @export
+    def get_recheck_status(self):
+        """Get the status of the started and queued rechecks.
+
+        Returns:
+            dict: The check throughput of all devices in bytes per second, and
+                the list of check status with their ETA, in start order.
+
+        """
+        check_scheduler = self.torrentmanager.check_scheduler
+        return {
+            'throughput': check_scheduler.get_throughput(),
+            'checks': check_scheduler.get_status(),
+        }
+
     @export
     def set_torrent_options(self, torrent_ids, options):
         """Sets the torrent options for torrent_ids
@@ -909,7 +1152,8 @@ def set_torrent_options(self, torrent_ids, options):
     @export
     def set_torrent_trackers(self, torrent_id, trackers):
         """Sets a torrents tracker list.  trackers will be [{"url", "tier"}]"""
-        return self.torrentmanager[torrent_id].set_trackers(trackers)
+        self.torrentmanager[torrent_id].set_trackers(trackers)
+        self.filtermanager.update_index(torrent_id, ['tracker_host', 'trackers'])
 
     @deprecated
     @export
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+
+"""Background deletion of the downloaded data of removed torrents."""
+from __future__ import unicode_literals
+
+import errno
+import logging
+import os
+from collections import OrderedDict
+
+from twisted.internet import defer, threads
+from twisted.python.failure import Failure
+
+log = logging.getLogger(__name__)
+
+
+class DeletionJob(object):
+    """The data files of a removed torrent waiting to be deleted.
+
+    Args:
+        torrent_id (str): The torrent ID.
+        name (str): The torrent name.
+        save_path (str): The directory the files are relative to.
+        paths (list of str): The file paths, relative to `save_path`.
+
+    """
+
+    def __init__(self, torrent_id, name, save_path, paths):
+        self.torrent_id = torrent_id
+        self.name = name
+        self.save_path = save_path
+        self.paths = paths
+        self.device = get_device(save_path)
+        self.state = 'Queued'
+        self.deleted = 0
+        self.error = None
+        self.cancelled = False
+        self.deferred = defer.Deferred()
+
+    def get_filepaths(self):
+        """The absolute paths of the files."""
+        return {
+            os.path.abspath(os.path.join(self.save_path, path)) for path in self.paths
+        }
+
+    def get_status(self):
+        return {
+            'torrent_id': self.torrent_id,
+            'name': self.name,
+            'save_path': self.save_path,
+            'state': self.state,
+            'total_files': len(self.paths),
+            'deleted_files': self.deleted,
+            'error': self.error,
+        }
+
+
+def get_device(path):
+    """The device ID of the filesystem of path, or of its nearest existing parent.
+
+    Returns:
+        int: The device ID, or None if it cannot be found.
+
+    """
+    path = os.path.abspath(path)
+    while True:
+        try:
+            return os.stat(path).st_dev
+        except OSError:
+            parent = os.path.dirname(path)
+            if parent == path:
+                return None
+            path = parent
+
+
+class DeletionQueue(object):
+    """Deletes the data of removed torrents in worker threads.
+
+    The jobs are run in the order they are added, with at most
+    `max_per_device` jobs deleting files on the same device at once so a
+    large removal does not saturate a disk other torrents are using.
+    Failed jobs are kept for the status until `clear_failed` is called.
+
+    Args:
+        max_per_device (int): The number of jobs run at once on a device.
+
+    """
+
+    def __init__(self, max_per_device=1):
+        self.max_per_device = max_per_device
+        self.jobs = OrderedDict()
+        self._active = {}
+
+    def add(self, torrent_id, name, save_path, paths):
+        """Queue the deletion of the data files of a torrent.
+
+        Returns:
+            Deferred: Fires with True when the files are deleted, or False if
+                a file could not be deleted or the job was cancelled.
+
+        """
+        job = DeletionJob(torrent_id, name, save_path, paths)
+        self.jobs[torrent_id] = job
+        self._start_jobs()
+        return job.deferred
+
+    def cancel(self, torrent_id, filepaths=()):
+        """Cancel the jobs deleting files of a torrent added again to the session.
+
+        A running job stops before deleting its next file.
+
+        Args:
+            torrent_id (str): The torrent ID.
+            filepaths (set of str): The absolute paths of the torrent files, the jobs
+                deleting any of these files are also cancelled.
+
+        """
+        for job_id, job in list(self.jobs.items()):
+            if job.state not in ('Queued', 'Deleting'):
+                continue
+            if job_id != torrent_id and not (
+                filepaths and job.get_filepaths() & filepaths
+            ):
+                continue
+            log.info('Cancelled deleting the data of %s', job.name)
+            job.cancelled = True
+            if job.state == 'Queued':
+                del self.jobs[job_id]
+                job.deferred.callback(False)
+
+    def wait(self):
+        """Wait for all the queued and running jobs to finish.
+
+        Returns:
+            Deferred: Fires when the jobs are finished.
+
+        """
+        return defer.DeferredList(
+            [
+                job.deferred
+                for job in self.jobs.values()
+                if job.state in ('Queued', 'Deleting')
+            ]
+        )
+
+    def get_status(self):
+        """The status of the queued, running and failed jobs.
+
+        Returns:
+            list of dict: The job status, in queue order.
+
+        """
+        return [job.get_status() for job in self.jobs.values()]
+
+    def clear_failed(self):
+        """Forget the failed jobs."""
+        for torrent_id, job in list(self.jobs.items()):
+            if job.state == 'Error':
+                del self.jobs[torrent_id]
+
+    def _start_jobs(self):
+        for job in self.jobs.values():
+            if job.state != 'Queued':
+                continue
+            if self._active.get(job.device, 0) >= self.max_per_device:
+                continue
+            job.state = 'Deleting'
+            self._active[job.device] = self._active.get(job.device, 0) + 1
+            d = threads.deferToThread(self._delete, job)
+            d.addBoth(self._on_job_done, job)
+
+    def _on_job_done(self, result, job):
+        self._active[job.device] -= 1
+        if job.cancelled and not isinstance(result, Failure):
+            if self.jobs.get(job.torrent_id) is job:
+                del self.jobs[job.torrent_id]
+            job.deferred.callback(False)
+        elif isinstance(result, Failure):
+            job.state = 'Error'
+            job.error = str(result.value)
+            log.error('Unable to delete the data of %s: %s', job.name, job.error)
+            job.deferred.callback(False)
+        else:
+            if self.jobs.get(job.torrent_id) is job:
+                del self.jobs[job.torrent_id]
+            log.debug('Deleted the data of %s', job.name)
+            job.deferred.callback(True)
+        self._start_jobs()
+
+    @staticmethod
+    def _delete(job):
+        """Delete the files then the directories they leave empty."""
+        error = None
+        dirs = set()
+        for path in job.paths:
+            if job.cancelled:
+                return False
+            filepath = os.path.join(job.save_path, path)
+            try:
+                os.remove(filepath)
+            except OSError as ex:
+                if ex.errno != errno.ENOENT and error is None:
+                    error = ex
+            job.deleted += 1
+
+            path = os.path.dirname(path)
+            while path:
+                dirs.add(path)
+                path = os.path.dirname(path)
+
+        # Remove the deepest directories first.
+        for path in sorted(dirs, key=len, reverse=True):
+            try:
+                os.rmdir(os.path.join(job.save_path, path))
+            except OSError:
+                pass
+
+        if error:
+            raise error
+        return True
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+
+"""A queue of disk heavy torrent jobs limited per device."""
+from __future__ import unicode_literals
+
+import itertools
+import logging
+from collections import OrderedDict
+
+from deluge.core.deletionqueue import get_device
+
+log = logging.getLogger(__name__)
+
+
+class DeviceJob(object):
+    """A disk heavy job of a torrent.
+
+    Attributes:
+        running_state (str): The state of the job once it is started.
+
+    Args:
+        torrent_id (str): The torrent ID.
+        paths (list of str): The paths the job reads from or writes to.
+        size (int): The bytes the job reads or writes.
+
+    """
+
+    running_state = 'Running'
+
+    def __init__(self, torrent_id, paths, size):
+        self.torrent_id = torrent_id
+        self.size = size
+        self.devices = {get_device(path) for path in paths}
+        self.priority = 0
+        self.order = 0
+        self.state = 'Queued'
+
+    def get_status(self):
+        return {
+            'torrent_id': self.torrent_id,
+            'size': self.size,
+            'priority': self.priority,
+            'state': self.state,
+        }
+
+
+class DeviceQueue(object):
+    """Starts the jobs of the torrents, a few at a time per device.
+
+    At most `max_per_device` jobs use the same device at once, so many
+    jobs do not make the disks seek between them. The queued jobs are
+    started highest priority first, then smallest first so small torrents
+    are not held up behind a large one. A torrent has at most one queued
+    job, a new one replaces it.
+
+    Args:
+        start_job (func): Called with a job to start it, returns False if the
+            job could not be started.
+        max_per_device (int): The number of jobs run at once on a device,
+            -1 for no limit.
+
+    """
+
+    def __init__(self, start_job, max_per_device=1):
+        self.start_job = start_job
+        self.max_per_device = max_per_device
+        self.jobs = OrderedDict()
+        self.running = {}
+        self._active = {}
+        self._order = itertools.count()
+        # The queued jobs in start order and their positions, cleared when
+        # the queue changes.
+        self._queued = None
+        self._positions = None
+
+    def add(self, job):
+        """Queue a job, replacing the queued job of the torrent."""
+        job.order = next(self._order)
+        old_job = self.jobs.pop(job.torrent_id, None)
+        if old_job:
+            job.priority = old_job.priority
+        self.jobs[job.torrent_id] = job
+        self._queue_changed()
+        self.start_jobs()
+
+    def cancel(self, torrent_id):
+        """Cancel the queued job of a torrent, a started job cannot be cancelled.
+
+        Returns:
+            bool: True if a queued job was cancelled.
+
+        """
+        if self.jobs.pop(torrent_id, None) is None:
+            return False
+        self._queue_changed()
+        return True
+
+    def set_priority(self, torrent_id, priority):
+        """Change the priority of the queued job of a torrent.
+
+        Returns:
+            bool: True if the torrent has a queued job.
+
+        """
+        try:
+            self.jobs[torrent_id].priority = priority
+        except KeyError:
+            return False
+        self._queue_changed()
+        self.start_jobs()
+        return True
+
+    def on_done(self, torrent_id):
+        """The started job of a torrent has finished or failed.
+
+        Returns:
+            DeviceJob: The finished job, or None if the torrent had no started job.
+
+        """
+        job = self.running.pop(torrent_id, None)
+        if job:
+            for device in job.devices:
+                self._active[device] -= 1
+            self._on_job_done(job)
+            self.start_jobs()
+        return job
+
+    def get_position(self, torrent_id):
+        """The position of the torrent in the queue, or -1 if not queued."""
+        if torrent_id not in self.jobs:
+            return -1
+        if self._positions is None:
+            self._positions = {
+                job.torrent_id: position
+                for position, job in enumerate(self.get_queued())
+            }
+        return self._positions[torrent_id]
+
+    def get_status(self):
+        """The status of the started then the queued jobs, in start order.
+
+        Returns:
+            list of dict: The job status.
+
+        """
+        jobs = list(self.running.values()) + self.get_queued()
+        return [job.get_status() for job in jobs]
+
+    def get_queued(self):
+        """The queued jobs, in the order they will be started."""
+        if self._queued is None:
+            self._queued = sorted(
+                self.jobs.values(), key=lambda job: (-job.priority, job.size, job.order)
+            )
+        return self._queued
+
+    def start_jobs(self):
+        """Start the queued jobs of the devices with free job slots."""
+        for job in self.get_queued():
+            if job.torrent_id in self.running:
+                # The torrent has to finish its started job first.
+                continue
+            if self.max_per_device >= 0 and any(
+                self._active.get(device, 0) >= self.max_per_device
+                for device in job.devices
+            ):
+                continue
+
+            del self.jobs[job.torrent_id]
+            self._queue_changed()
+            job.state = job.running_state
+            log.debug('Starting the %s of %s', type(job).__name__, job.torrent_id)
+            if not self.start_job(job):
+                continue
+            self.running[job.torrent_id] = job
+            for device in job.devices:
+                self._active[device] = self._active.get(device, 0) + 1
+            self._on_job_started(job)
+
+    def _queue_changed(self):
+        """Clear the cached order of the queued jobs."""
+        self._queued = None
+        self._positions = None
+
+    def _on_job_started(self, job):
+        """Called after a job is started."""
+
+    def _on_job_done(self, job):
+        """Called after a started job is done."""
@@ -20,15 +20,20 @@ class EventManager(component.Component):
     def __init__(self):
         component.Component.__init__(self, 'EventManager')
         self.handlers = {}
+        # The number of each event emitted
+        self.emitted = {}
 
-    def emit(self, event):
+    def emit(self, event, superseded_by=None):
         """
         Emits the event to interested clients.
 
         :param event: DelugeEvent
+        :param superseded_by: str, the name of an event that will be emitted
+            instead, the clients interested in it are not sent this event
         """
+        self.emitted[event.name] = self.emitted.get(event.name, 0) + 1
         # Emit the event to the interested clients
-        component.get('RPCServer').emit_event(event)
+        component.get('RPCServer').emit_event(event, superseded_by)
         # Call any handlers for the event
         if event.name in self.handlers:
             for handler in self.handlers[event.name]:
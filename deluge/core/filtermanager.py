@@ -9,12 +9,15 @@
 
 from __future__ import unicode_literals
 
+import hashlib
 import logging
+import time
 
 from six import string_types
 
 import deluge.component as component
 from deluge.common import TORRENT_STATE
+from deluge.core.searchindex import SearchIndex
 
 log = logging.getLogger(__name__)
 
@@ -35,28 +38,22 @@ def filter_keywords(torrent_ids, values):
 def filter_one_keyword(torrent_ids, keyword):
     """
     search torrent on keyword.
-    searches title,state,tracker-status,tracker,files
+    searches the indexed texts (name,filename,files,trackers,...),
+    state,tracker-status and torrent_id
     """
     all_torrents = component.get('TorrentManager').torrents
+    matches = component.get('FilterManager').search_index.search(keyword)
 
     for torrent_id in torrent_ids:
-        torrent = all_torrents[torrent_id]
-        if keyword in torrent.filename.lower():
-            yield torrent_id
-        elif keyword in torrent.state.lower():
+        if torrent_id in matches or keyword in torrent_id:
             yield torrent_id
-        elif torrent.trackers and keyword in torrent.trackers[0]['url']:
-            yield torrent_id
-        elif keyword in torrent_id:
+            continue
+        torrent = all_torrents[torrent_id]
+        if keyword in torrent.state.lower():
             yield torrent_id
         # Want to find broken torrents (search on "error", or "unregistered")
         elif keyword in torrent.tracker_status.lower():
             yield torrent_id
-        else:
-            for t_file in torrent.get_files():
-                if keyword in t_file['path'].lower():
-                    yield torrent_id
-                    break
 
 
 def filter_by_name(torrent_ids, search_string):
@@ -67,36 +64,198 @@ def filter_by_name(torrent_ids, search_string):
         search_string = search_string[0]
         match_case = False
 
-    if match_case is False:
-        search_string = search_string.lower()
+    # The index ignores the case so the names still need checking to match it.
+    matches = component.get('FilterManager').search_index.search(
+        search_string, ['name']
+    )
 
     for torrent_id in torrent_ids:
-        torrent_name = all_torrents[torrent_id].get_name()
-        if match_case is False:
-            torrent_name = all_torrents[torrent_id].get_name().lower()
-        else:
-            torrent_name = all_torrents[torrent_id].get_name()
-
-        if search_string in torrent_name:
+        if torrent_id not in matches:
+            continue
+        if match_case is False or search_string in all_torrents[torrent_id].get_name():
             yield torrent_id
 
 
 def tracker_error_filter(torrent_ids, values):
-    filtered_torrent_ids = []
-    tm = component.get('TorrentManager')
+    index = component.get('FilterManager').index
 
     # If this is a tracker_host, then we need to filter on it
     if values[0] != 'Error':
-        for torrent_id in torrent_ids:
-            if values[0] == tm[torrent_id].get_status(['tracker_host'])['tracker_host']:
-                filtered_torrent_ids.append(torrent_id)
-        return filtered_torrent_ids
+        matches = index.get_torrent_ids('tracker_host', [values[0]])
+    else:
+        # The torrents with 'Error:' in their tracker_status
+        matches = index.get_torrent_ids('tracker_error', [True])
+    return [torrent_id for torrent_id in torrent_ids if torrent_id in matches]
 
-    # Check torrent's tracker_status for 'Error:' and return those torrent_ids
-    for torrent_id in torrent_ids:
-        if 'Error:' in tm[torrent_id].get_status(['tracker_status'])['tracker_status']:
-            filtered_torrent_ids.append(torrent_id)
-    return filtered_torrent_ids
+
+class FilterIndex(object):
+    """Inverted indexes of torrent field values for fast filtering.
+
+    Each indexed field maps a value to the set of torrent_ids having that
+    value. Entries are not recomputed when the index is queried, instead
+    torrents are marked as dirty (e.g. on an event or alert) and only those
+    are re-evaluated on the next lookup of that field.
+
+    Args:
+        fields (dict, optional): A dict of {field: value_func} where
+            value_func(torrent_id) returns the current value for field.
+
+    """
+
+    def __init__(self, fields=None):
+        self.value_funcs = {}
+        self._index = {}
+        self._values = {}
+        self._dirty = {}
+        self._torrent_ids = set()
+        # Incremented on every change to the indexed values.
+        self.changes = 0
+        if fields:
+            for field, value_func in fields.items():
+                self.register_field(field, value_func)
+
+    def __contains__(self, field):
+        return field in self.value_funcs
+
+    def register_field(self, field, value_func):
+        """Register a field to be indexed.
+
+        Args:
+            field (str): The status field name.
+            value_func (func): Called with a torrent_id to get the field value.
+
+        """
+        self.value_funcs[field] = value_func
+        self._index[field] = {}
+        self._values[field] = {}
+        self._dirty[field] = set(self._torrent_ids)
+        self.changes += 1
+
+    def deregister_field(self, field):
+        """Stop indexing a field."""
+        for attr in (self.value_funcs, self._index, self._values, self._dirty):
+            attr.pop(field, None)
+        self.changes += 1
+
+    def add(self, torrent_id):
+        """Add a torrent to the index, values are evaluated on next lookup."""
+        self._torrent_ids.add(torrent_id)
+        self.changes += 1
+        for dirty in self._dirty.values():
+            dirty.add(torrent_id)
+
+    def remove(self, torrent_id):
+        """Remove a torrent from all indexed fields."""
+        self._torrent_ids.discard(torrent_id)
+        self.changes += 1
+        for field in self.value_funcs:
+            self._dirty[field].discard(torrent_id)
+            self._discard(field, torrent_id)
+
+    def mark_dirty(self, torrent_id, fields=None):
+        """Flag torrent field values as changed.
+
+        Args:
+            torrent_id (str): The torrent_id, if None all torrents are flagged.
+            fields (list, optional): The fields to flag, defaults to all fields.
+
+        """
+        if torrent_id is not None and torrent_id not in self._torrent_ids:
+            return
+        for field in fields if fields is not None else list(self.value_funcs):
+            if field not in self._dirty:
+                continue
+            if torrent_id is None:
+                self._dirty[field].update(self._torrent_ids)
+            else:
+                self._dirty[field].add(torrent_id)
+
+    def get_torrent_ids(self, field, values):
+        """Get the torrent_ids that match any of the values for field.
+
+        Args:
+            field (str): An indexed field.
+            values (list): The values to match.
+
+        Returns:
+            set: The matching torrent_ids.
+
+        """
+        self._refresh(field)
+        index = self._index[field]
+        torrent_ids = set()
+        for value in values:
+            if value in index:
+                torrent_ids.update(index[value])
+        return torrent_ids
+
+    def get_counts(self, field, torrent_ids=None):
+        """Get the number of torrents for each value of field.
+
+        Args:
+            field (str): An indexed field.
+            torrent_ids (set, optional): Only count these torrent_ids.
+
+        Returns:
+            dict: A dict of {value: count}.
+
+        """
+        self._refresh(field)
+        if torrent_ids is None:
+            return {value: len(ids) for value, ids in self._index[field].items()}
+        return {
+            value: len(ids & torrent_ids) for value, ids in self._index[field].items()
+        }
+
+    def get_changes(self):
+        """Get the change counter with the dirty values of all fields applied.
+
+        Returns:
+            int: The number of changes to the indexed values.
+
+        """
+        for field in self.value_funcs:
+            self._refresh(field)
+        return self.changes
+
+    def get_value(self, field, torrent_id):
+        """Get the indexed value of field for a torrent."""
+        self._refresh(field)
+        return self._values[field].get(torrent_id)
+
+    def _discard(self, field, torrent_id):
+        try:
+            value = self._values[field].pop(torrent_id)
+        except KeyError:
+            return
+        torrent_ids = self._index[field][value]
+        torrent_ids.discard(torrent_id)
+        if not torrent_ids:
+            del self._index[field][value]
+
+    def _refresh(self, field):
+        """Re-evaluate the dirty torrent values for field."""
+        dirty = self._dirty[field]
+        if not dirty:
+            return
+        value_func = self.value_funcs[field]
+        index = self._index[field]
+        values = self._values[field]
+        for torrent_id in dirty:
+            try:
+                value = value_func(torrent_id)
+            except KeyError:
+                # Torrent was removed before the index was notified.
+                self._discard(field, torrent_id)
+                continue
+            if torrent_id in values:
+                if values[torrent_id] == value:
+                    continue
+                self._discard(field, torrent_id)
+            values[torrent_id] = value
+            index.setdefault(value, set()).add(torrent_id)
+            self.changes += 1
+        dirty.clear()
 
 
 class FilterManager(component.Component):
@@ -109,6 +268,8 @@ def __init__(self, core):
         log.debug('FilterManager init..')
         self.core = core
         self.torrents = core.torrentmanager
+        # Keeps version tags from an earlier daemon run from matching.
+        self._created = time.time()
         self.registered_filters = {}
         self.register_filter('keyword', filter_keywords)
         self.register_filter('name', filter_by_name)
@@ -128,6 +289,74 @@ def _init_users_tree():
 
         self.register_tree_field('owner', _init_users_tree)
 
+        # Indexed torrent fields, kept up to date by events and alerts.
+        self.index = FilterIndex(
+            {
+                'state': lambda torrent_id: self.torrents[torrent_id].state,
+                'owner': lambda torrent_id: self.torrents[torrent_id].options['owner'],
+                'tracker_host': lambda torrent_id: self.torrents[
+                    torrent_id
+                ].get_tracker_host(),
+                'tracker_error': lambda torrent_id: 'Error:'
+                in self.torrents[torrent_id].tracker_status,
+            }
+        )
+
+        # Indexed torrent texts for keyword searches, with their search_torrents
+        # ranking weights.
+        self.search_index = SearchIndex()
+        self.search_weights = {}
+        self.register_search_field(
+            'name', lambda torrent_id: self.torrents[torrent_id].get_name(), 4
+        )
+        self.register_search_field(
+            'filename', lambda torrent_id: self.torrents[torrent_id].filename, 1
+        )
+        self.register_search_field(
+            'files',
+            lambda torrent_id: [
+                t_file['path'] for t_file in self.torrents[torrent_id].get_files()
+            ],
+            1,
+        )
+        self.register_search_field(
+            'trackers',
+            lambda torrent_id: [
+                tracker['url'] for tracker in self.torrents[torrent_id].trackers
+            ],
+            2,
+        )
+
+        event_handlers = {
+            'TorrentAddedEvent': self._on_torrent_added,
+            'TorrentRemovedEvent': self._on_torrent_removed,
+            'TorrentStateChangedEvent': self._on_torrent_state_changed,
+            'TorrentFolderRenamedEvent': self._on_torrent_folder_renamed,
+        }
+        for event, handler in event_handlers.items():
+            component.get('EventManager').register_event_handler(event, handler)
+
+        for alert_type in (
+            'tracker_reply_alert',
+            'tracker_announce_alert',
+            'tracker_warning_alert',
+            'tracker_error_alert',
+        ):
+            component.get('AlertManager').register_handler(
+                alert_type, self._on_alert_tracker, batch=True
+            )
+
+        for alert_type in ('metadata_received_alert', 'file_renamed_alert'):
+            component.get('AlertManager').register_handler(
+                alert_type, self._on_alert_metadata, batch=True
+            )
+
+    def start(self):
+        # Index any torrents already in the session.
+        for torrent_id in self.torrents.torrents:
+            self.index.add(torrent_id)
+            self.search_index.add(torrent_id)
+
     def filter_torrent_ids(self, filter_dict):
         """
         returns a list of torrent_id's matching filter_dict.
@@ -166,6 +395,24 @@ def filter_torrent_ids(self, filter_dict):
         if not filter_dict:
             return torrent_ids
 
+        # Indexed fields, intersect with the sets of matching torrent_ids.
+        for field, values in list(filter_dict.items()):
+            if field == 'tracker_host':
+                matches = self.index.get_torrent_ids(
+                    'tracker_host', [v for v in values if v != 'Error']
+                )
+                if 'Error' in values:
+                    matches |= self.index.get_torrent_ids('tracker_error', [True])
+            elif field in self.index:
+                matches = self.index.get_torrent_ids(field, values)
+            else:
+                continue
+            torrent_ids = [t_id for t_id in torrent_ids if t_id in matches]
+            del filter_dict[field]
+
+        if not filter_dict:
+            return torrent_ids
+
         # Registered filters
         for field, values in list(filter_dict.items()):
             if field in self.registered_filters:
@@ -182,16 +429,17 @@ def filter_torrent_ids(self, filter_dict):
             list(filter_dict), torrent_ids
         )
         # Leftover filter arguments, default filter on status fields.
-        for torrent_id in list(torrent_ids):
+        filtered_torrent_ids = []
+        for torrent_id in torrent_ids:
             status = self.core.create_torrent_status(
                 torrent_id, torrent_keys, plugin_keys
             )
             for field, values in filter_dict.items():
-                if field in status and status[field] in values:
-                    continue
-                elif torrent_id in torrent_ids:
-                    torrent_ids.remove(torrent_id)
-        return torrent_ids
+                if field not in status or status[field] not in values:
+                    break
+            else:
+                filtered_torrent_ids.append(torrent_id)
+        return filtered_torrent_ids
 
     def get_filter_tree(self, show_zero_hits=True, hide_cat=None):
         """
@@ -204,22 +452,38 @@ def get_filter_tree(self, show_zero_hits=True, hide_cat=None):
             for cat in hide_cat:
                 tree_keys.remove(cat)
 
-        torrent_keys, plugin_keys = self.torrents.separate_keys(tree_keys, torrent_ids)
         items = {field: self.tree_fields[field]() for field in tree_keys}
 
-        for torrent_id in list(torrent_ids):
-            status = self.core.create_torrent_status(
-                torrent_id, torrent_keys, plugin_keys
-            )  # status={key:value}
-            for field in tree_keys:
-                value = status[field]
-                items[field][value] = items[field].get(value, 0) + 1
+        # Restrict the indexed counts if the user can only see some torrents.
+        visible_ids = None
+        if len(torrent_ids) != len(self.torrents.torrents):
+            visible_ids = set(torrent_ids)
+
+        scan_keys = []
+        for field in tree_keys:
+            if field not in self.index:
+                scan_keys.append(field)
+                continue
+            for value, count in self.index.get_counts(field, visible_ids).items():
+                items[field][value] = items[field].get(value, 0) + count
+
+        if scan_keys:
+            torrent_keys, plugin_keys = self.torrents.separate_keys(
+                scan_keys, torrent_ids
+            )
+            for torrent_id in torrent_ids:
+                status = self.core.create_torrent_status(
+                    torrent_id, torrent_keys, plugin_keys
+                )  # status={key:value}
+                for field in scan_keys:
+                    value = status[field]
+                    items[field][value] = items[field].get(value, 0) + 1
 
         if 'tracker_host' in items:
             items['tracker_host']['All'] = len(torrent_ids)
-            items['tracker_host']['Error'] = len(
-                tracker_error_filter(torrent_ids, ('Error',))
-            )
+            items['tracker_host']['Error'] = self.index.get_counts(
+                'tracker_error', visible_ids
+            ).get(True, 0)
 
         if not show_zero_hits:
             for cat in ['state', 'owner', 'tracker_host']:
@@ -234,6 +498,63 @@ def get_filter_tree(self, show_zero_hits=True, hide_cat=None):
 
         return sorted_items
 
+    def get_filter_tree_versioned(
+        self, version=None, show_zero_hits=True, hide_cat=None
+    ):
+        """Get the filter tree along with a version tag.
+
+        Args:
+            version (str, optional): The version tag of the tree the caller
+                already holds for the same arguments.
+            show_zero_hits (bool, optional): Include values with no torrents.
+            hide_cat (list, optional): The tree fields to leave out.
+
+        Returns:
+            tuple: The current version tag and the filter tree, or None in
+                place of the tree if version is still current.
+
+        """
+        current = self._tree_version(show_zero_hits, hide_cat)
+        if current is not None and version == current:
+            return current, None
+
+        tree = self.get_filter_tree(show_zero_hits, hide_cat)
+        if current is None:
+            # A tree field is not indexed so the version is taken from the tree.
+            current = self._hash_version(sorted(tree.items()))
+            if version == current:
+                return current, None
+        return current, tree
+
+    def _tree_version(self, show_zero_hits, hide_cat):
+        """Derive a version tag from the index changes without building the tree.
+
+        Returns:
+            str: The version tag, or None if a tree field is not indexed.
+
+        """
+        tree_keys = sorted(set(self.tree_fields) - set(hide_cat or []))
+        if any(field not in self.index for field in tree_keys):
+            return None
+        torrent_ids = self.torrents.get_torrent_list()
+        if len(torrent_ids) == len(self.torrents.torrents):
+            visible = None
+        else:
+            visible = sorted(torrent_ids)
+        return self._hash_version(
+            (
+                self._created,
+                self.index.get_changes(),
+                len(self.filter_state_active(torrent_ids)),
+                visible,
+                tree_keys,
+                show_zero_hits,
+            )
+        )
+
+    def _hash_version(self, value):
+        return hashlib.sha1(repr(value).encode('utf8')).hexdigest()[:16]
+
     def _init_state_tree(self):
         init_state = {}
         init_state['All'] = len(self.torrents.get_torrent_list())
@@ -244,6 +565,123 @@ def _init_state_tree(self):
         )
         return init_state
 
+    def register_index_field(self, field, value_func):
+        """Index a plugin status field for fast filtering.
+
+        The plugin is responsible for calling `update_index` when the field
+        value of a torrent changes.
+
+        Args:
+            field (str): The status field name.
+            value_func (func): Called with a torrent_id to get the field value.
+
+        """
+        self.index.register_field(field, value_func)
+
+    def deregister_index_field(self, field):
+        self.index.deregister_field(field)
+
+    def register_search_field(self, field, text_func, weight=2):
+        """Index a plugin text field for keyword searches.
+
+        The plugin is responsible for calling `update_index` when the field
+        text of a torrent changes.
+
+        Args:
+            field (str): The field name.
+            text_func (func): Called with a torrent_id to get the field text,
+                or a list of texts.
+            weight (int, optional): How much a match in this field counts
+                towards the search_torrents ranking.
+
+        """
+        self.search_index.register_field(field, text_func)
+        self.search_weights[field] = weight
+
+    def deregister_search_field(self, field):
+        self.search_index.deregister_field(field)
+        self.search_weights.pop(field, None)
+
+    def update_index(self, torrent_id=None, fields=None):
+        """Notify the indexes that field values have changed.
+
+        Args:
+            torrent_id (str, optional): The torrent_id, defaults to all torrents.
+            fields (list, optional): The changed fields, defaults to all fields.
+
+        """
+        self.index.mark_dirty(torrent_id, fields)
+        self.search_index.mark_dirty(torrent_id, fields)
+
+    def search_torrents(self, query, limit=None):
+        """Search the indexed torrent texts, best matches first.
+
+        Every whitespace separated term of the query has to be found in a
+        text of the torrent. A torrent ranks higher for a term found in a
+        field with a higher weight, and for a whole text or word match.
+
+        Args:
+            query (str): The search terms.
+            limit (int, optional): The most results to return.
+
+        Returns:
+            list: The (torrent_id, score) tuples of the matching torrents.
+
+        """
+        terms = query.lower().split()
+        if not terms:
+            return []
+
+        matches = set(self.torrents.get_torrent_list())
+        for term in terms:
+            matches &= self.search_index.search(term)
+
+        results = []
+        for torrent_id in matches:
+            score = 0
+            for term in terms:
+                score += max(
+                    weight * self.search_index.get_score(term, field, torrent_id)
+                    for field, weight in self.search_weights.items()
+                )
+            results.append((torrent_id, score))
+
+        def rank(result):
+            return -result[1], self.search_index.get_texts('name', result[0])
+
+        results.sort(key=rank)
+        return results[:limit] if limit else results
+
+    def _on_torrent_added(self, torrent_id, from_state):
+        self.index.add(torrent_id)
+        self.search_index.add(torrent_id)
+
+    def _on_torrent_removed(self, torrent_id):
+        self.index.remove(torrent_id)
+        self.search_index.remove(torrent_id)
+
+    def _on_torrent_state_changed(self, torrent_id, state):
+        self.index.mark_dirty(torrent_id, ['state'])
+
+    def _on_torrent_folder_renamed(self, torrent_id, old, new):
+        self.search_index.mark_dirty(torrent_id, ['name', 'files'])
+
+    def _on_alert_metadata(self, alerts):
+        for alert in alerts:
+            try:
+                torrent_id = str(alert.handle.info_hash())
+            except RuntimeError:
+                continue
+            self.search_index.mark_dirty(torrent_id)
+
+    def _on_alert_tracker(self, alerts):
+        for alert in alerts:
+            try:
+                torrent_id = str(alert.handle.info_hash())
+            except RuntimeError:
+                continue
+            self.index.mark_dirty(torrent_id, ['tracker_host', 'tracker_error'])
+
     def register_filter(self, filter_id, filter_func, filter_value=None):
         self.registered_filters[filter_id] = filter_func
 
@@ -258,15 +696,12 @@ def deregister_tree_field(self, field):
             del self.tree_fields[field]
 
     def filter_state_active(self, torrent_ids):
-        for torrent_id in list(torrent_ids):
-            status = self.torrents[torrent_id].get_status(
-                ['download_payload_rate', 'upload_payload_rate']
-            )
-            if status['download_payload_rate'] or status['upload_payload_rate']:
-                pass
-            else:
-                torrent_ids.remove(torrent_id)
-        return torrent_ids
+        active_torrent_ids = []
+        for torrent_id in torrent_ids:
+            status = self.torrents[torrent_id].status
+            if status.download_payload_rate or status.upload_payload_rate:
+                active_torrent_ids.append(torrent_id)
+        return active_torrent_ids
 
     def _hide_state_items(self, state_items):
         """For hide(show)-zero hits"""
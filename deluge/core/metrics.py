@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+
+"""The daemon metrics served over HTTP in the Prometheus text format."""
+from __future__ import unicode_literals
+
+import logging
+
+from twisted.internet import reactor
+from twisted.internet.error import CannotListenError
+from twisted.web.resource import Resource
+from twisted.web.server import Site
+
+import deluge.component as component
+from deluge.configmanager import ConfigManager
+
+log = logging.getLogger(__name__)
+
+CONTENT_TYPE = b'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Summary(object):
+    """The count, total and maximum of the observed durations."""
+
+    __slots__ = ('count', 'total', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+
+def format_value(value):
+    if isinstance(value, float):
+        return 'NaN' if value != value else repr(value)
+    return str(int(value))
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{%s}' % ','.join(
+        '%s="%s"'
+        % (
+            name,
+            str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"'),
+        )
+        for name, value in sorted(labels.items())
+    )
+
+
+def format_metrics(families):
+    """Format metric families in the Prometheus text format.
+
+    Args:
+        families (iterable): The (name, type, help, samples) of each metric
+            family, where samples is a list of (suffix, labels, value).
+
+    Returns:
+        str: The metrics text.
+
+    """
+    lines = []
+    for name, metric_type, help_text, samples in families:
+        lines.append('# HELP %s %s' % (name, help_text))
+        lines.append('# TYPE %s %s' % (name, metric_type))
+        for suffix, labels, value in samples:
+            lines.append(
+                '%s%s%s %s' % (name, suffix, format_labels(labels), format_value(value))
+            )
+    return '\n'.join(lines) + '\n'
+
+
+def summary_samples(summaries, label):
+    """The samples of a summary metric family from {label_value: Summary}."""
+    samples = []
+    for value, summary in sorted(summaries.items()):
+        labels = {label: value}
+        samples.append(('_count', labels, summary.count))
+        samples.append(('_sum', labels, summary.total))
+    return samples
+
+
+class MetricsResource(Resource):
+    isLeaf = True
+
+    def __init__(self, metrics_manager):
+        Resource.__init__(self)
+        self.metrics_manager = metrics_manager
+
+    def render_GET(self, request):  # NOQA: N802
+        request.setHeader(b'Content-Type', CONTENT_TYPE)
+        return self.metrics_manager.render().encode('utf8')
+
+
+class MetricsManager(component.Component):
+    """Serves the daemon metrics to monitoring systems.
+
+    The metrics are collected when requested from the counters kept by the
+    components, so nothing is done between the requests. The endpoint is
+    only listening when `metrics_enabled` is set. Plugins add metrics with
+    `register_collector`.
+
+    Args:
+        core (Core): The core the metrics are collected from.
+
+    """
+
+    def __init__(self, core):
+        component.Component.__init__(self, 'MetricsManager')
+        self.core = core
+        self.config = ConfigManager('core.conf')
+        self.port = None
+        self.collectors = [
+            self.collect_session,
+            self.collect_torrents,
+            self.collect_alerts,
+            self.collect_rpc,
+            self.collect_events,
+            self.collect_saves,
+        ]
+
+        for key in ('metrics_enabled', 'metrics_interface', 'metrics_port'):
+            self.config.register_set_function(key, self._on_set_metrics, False)
+
+    def start(self):
+        self.listen()
+
+    def stop(self):
+        return self.stop_listening()
+
+    def _on_set_metrics(self, key, value):
+        if self.get_state() == 'Started':
+            self.listen()
+
+    def listen(self):
+        """Start, restart or stop listening for the metrics requests."""
+        self.stop_listening()
+        if not self.config['metrics_enabled']:
+            return
+        interface = self.config['metrics_interface']
+        port = self.config['metrics_port']
+        try:
+            self.port = reactor.listenTCP(
+                port, Site(MetricsResource(self)), interface=interface
+            )
+        except CannotListenError as ex:
+            log.error('Unable to serve metrics on %s:%s: %s', interface, port, ex)
+        else:
+            log.info('Serving metrics on %s:%s', interface, port)
+
+    def stop_listening(self):
+        if not self.port:
+            return None
+        port, self.port = self.port, None
+        return port.stopListening()
+
+    def register_collector(self, collector):
+        """Register a function returning metric families to serve.
+
+        Args:
+            collector (func): Returns a list of (name, type, help, samples),
+                where samples is a list of (suffix, labels, value).
+
+        """
+        if collector not in self.collectors:
+            self.collectors.append(collector)
+
+    def deregister_collector(self, collector):
+        if collector in self.collectors:
+            self.collectors.remove(collector)
+
+    def render(self):
+        """Collect the metrics in the Prometheus text format."""
+        families = []
+        for collector in self.collectors:
+            try:
+                families.extend(collector())
+            except Exception as ex:
+                log.error('Metrics collector %s failed: %s', collector, ex)
+        return format_metrics(families)
+
+    def collect_session(self):
+        status = self.core.session_status
+        metric_types = self.core.session_metric_types
+        return [
+            (
+                'libtorrent_' + name.replace('.', '_'),
+                metric_type,
+                'libtorrent session counter %s' % name,
+                [('', None, status.get(name, 0))],
+            )
+            for name, metric_type in sorted(metric_types.items())
+        ]
+
+    def collect_torrents(self):
+        counts = component.get('FilterManager').index.get_counts('state')
+        return [
+            (
+                'deluge_torrents',
+                'gauge',
+                'Torrents in each state',
+                [
+                    ('', {'state': state}, count)
+                    for state, count in sorted(counts.items())
+                ],
+            )
+        ]
+
+    def collect_alerts(self):
+        stats = component.get('AlertManager').get_stats()
+        return [
+            (
+                'deluge_alert_queue_depth',
+                'gauge',
+                'Alerts waiting to be dispatched',
+                [('', None, stats['backlog'])],
+            ),
+            (
+                'deluge_alerts_popped_total',
+                'counter',
+                'Alerts popped from the session',
+                [('', None, stats['alerts_popped'])],
+            ),
+            (
+                'deluge_alerts_handled_total',
+                'counter',
+                'Alerts dispatched to their handlers',
+                [('', None, stats['alerts_handled'])],
+            ),
+        ]
+
+    def collect_rpc(self):
+        try:
+            factory = component.get('RPCServer').factory
+        except KeyError:
+            return []
+        return [
+            (
+                'deluge_rpc_sessions',
+                'gauge',
+                'Authorized client sessions',
+                [('', None, len(factory.authorized_sessions))],
+            ),
+            (
+                'deluge_rpc_request_seconds',
+                'summary',
+                'RPC requests and their duration',
+                summary_samples(factory.rpc_stats, 'method'),
+            ),
+            (
+                'deluge_rpc_request_seconds_max',
+                'gauge',
+                'The longest RPC request',
+                [
+                    ('', {'method': method}, summary.max)
+                    for method, summary in sorted(factory.rpc_stats.items())
+                ],
+            ),
+            (
+                'deluge_rpc_errors_total',
+                'counter',
+                'RPC requests that failed',
+                [
+                    ('', {'method': method}, errors)
+                    for method, errors in sorted(factory.rpc_errors.items())
+                ],
+            ),
+        ]
+
+    def collect_events(self):
+        emitted = component.get('EventManager').emitted
+        try:
+            sent = component.get('RPCServer').events_sent
+        except KeyError:
+            sent = {}
+        return [
+            (
+                'deluge_events_emitted_total',
+                'counter',
+                'Events emitted',
+                [
+                    ('', {'event': name}, count)
+                    for name, count in sorted(emitted.items())
+                ],
+            ),
+            (
+                'deluge_events_sent_total',
+                'counter',
+                'Events sent to the clients',
+                [('', {'event': name}, count) for name, count in sorted(sent.items())],
+            ),
+        ]
+
+    def collect_saves(self):
+        durations = component.get('TorrentManager').save_durations
+        return [
+            (
+                'deluge_save_seconds',
+                'summary',
+                'State and resume data saves and their duration',
+                summary_samples(durations, 'data'),
+            ),
+            (
+                'deluge_save_seconds_max',
+                'gauge',
+                'The longest state or resume data save',
+                [
+                    ('', {'data': data}, summary.max)
+                    for data, summary in sorted(durations.items())
+                ],
+            ),
+        ]
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+
+"""Scheduling of the torrent storage moves per device."""
+from __future__ import unicode_literals
+
+import logging
+
+from deluge.core.devicequeue import DeviceJob, DeviceQueue
+
+log = logging.getLogger(__name__)
+
+
+class MoveJob(DeviceJob):
+    """A storage move of a torrent.
+
+    Args:
+        torrent_id (str): The torrent ID.
+        source (str): The current download location.
+        dest (str): The destination of the move.
+        size (int): The bytes to move.
+
+    """
+
+    running_state = 'Moving'
+
+    def __init__(self, torrent_id, source, dest, size):
+        # The move reads from one device and writes to the other.
+        super(MoveJob, self).__init__(torrent_id, [source, dest], size)
+        self.source = source
+        self.dest = dest
+
+    def get_status(self):
+        status = super(MoveJob, self).get_status()
+        status.update(source=self.source, dest=self.dest)
+        return status
+
+
+class MoveScheduler(DeviceQueue):
+    """Starts the storage moves of the torrents, a few at a time per device.
+
+    A move counts against the limit of both the source and the destination
+    device.
+
+    Args:
+        start_move (func): Called with the torrent_id and destination to start
+            a move, returns False if the move could not be started.
+        max_per_device (int): The number of moves run at once on a device,
+            -1 for no limit.
+
+    """
+
+    def __init__(self, start_move, max_per_device=1):
+        super(MoveScheduler, self).__init__(
+            lambda job: start_move(job.torrent_id, job.dest), max_per_device
+        )
+
+    def add_move(self, torrent_id, source, dest, size):
+        """Queue a storage move, replacing a queued move of the torrent.
+
+        Args:
+            torrent_id (str): The torrent ID.
+            source (str): The current download location.
+            dest (str): The destination of the move.
+            size (int): The bytes to move.
+
+        """
+        self.add(MoveJob(torrent_id, source, dest, size))
+
+    def cancel(self, torrent_id):
+        if not super(MoveScheduler, self).cancel(torrent_id):
+            return False
+        log.info('Cancelled the storage move of %s', torrent_id)
+        return True
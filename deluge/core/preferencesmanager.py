@@ -43,6 +43,9 @@
     'info_sent': 0.0,
     'daemon_port': 58846,
     'allow_remote': False,
+    'metrics_enabled': False,
+    'metrics_interface': '127.0.0.1',
+    'metrics_port': 58847,
     'pre_allocate_storage': False,
     'download_location': deluge.common.get_default_download_dir(),
     'listen_ports': [6881, 6891],
@@ -93,6 +96,10 @@
     'stop_seed_at_ratio': False,
     'remove_seed_at_ratio': False,
     'stop_seed_ratio': 2.00,
+    'stop_seed_at_seed_time': False,
+    'stop_seed_time': 1440.0,
+    'stop_seed_at_idle_time': False,
+    'stop_seed_idle_time': 120.0,
     'share_ratio_limit': 2.00,
     'seed_time_ratio_limit': 7.00,
     'seed_time_limit': 180,
@@ -100,6 +107,8 @@
     'move_completed': False,
     'move_completed_path': deluge.common.get_default_download_dir(),
     'move_completed_paths_list': [],
+    'max_moves_per_device': 1,
+    'max_checks_per_device': 1,
     'download_location_paths_list': [],
     'path_chooser_show_chooser_button_on_localhost': True,
     'path_chooser_auto_complete_enabled': True,
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+
+"""Per-torrent storage of the bencoded libtorrent resume data."""
+from __future__ import unicode_literals
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+log = logging.getLogger(__name__)
+
+# The file created once the torrents.fastresume file has been migrated.
+MIGRATED_MARKER = '.migrated'
+
+
+class ResumeDataStore(object):
+    """Stores the resume data of each torrent in its own file.
+
+    The resume data set since the last flush is kept in memory until it is
+    written, after that only the most recently used entries are cached.
+    A torrent_id set to None is a removal that deletes the file on flush.
+
+    Args:
+        path (str): The directory of the resume data files.
+        cache_size (int): The number of written entries to keep in memory.
+
+    """
+
+    def __init__(self, path, cache_size=100):
+        self.path = path
+        self.cache_size = cache_size
+        self._dirty = {}
+        self._flushing = {}
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _filepath(self, torrent_id):
+        return os.path.join(self.path, torrent_id + '.fastresume')
+
+    def exists(self):
+        """True if the store directory has been created."""
+        return os.path.isdir(self.path)
+
+    def is_migrated(self):
+        """True if the migration of the torrents.fastresume file has completed."""
+        return os.path.isfile(os.path.join(self.path, MIGRATED_MARKER))
+
+    def mark_migrated(self):
+        """Record that the migration of the torrents.fastresume file has completed."""
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+        with open(os.path.join(self.path, MIGRATED_MARKER), 'wb', 0) as _file:
+            _file.flush()
+            os.fsync(_file.fileno())
+
+    def __setitem__(self, torrent_id, resume_data):
+        with self._lock:
+            self._cache.pop(torrent_id, None)
+            self._dirty[torrent_id] = resume_data
+
+    def __contains__(self, torrent_id):
+        with self._lock:
+            for entries in (self._dirty, self._flushing):
+                if torrent_id in entries:
+                    return entries[torrent_id] is not None
+            if torrent_id in self._cache:
+                return True
+        return os.path.isfile(self._filepath(torrent_id))
+
+    def __getitem__(self, torrent_id):
+        resume_data = self.get(torrent_id)
+        if resume_data is None:
+            raise KeyError(torrent_id)
+        return resume_data
+
+    def get(self, torrent_id, default=None):
+        """Get the resume data, reading it from file if not in memory.
+
+        Args:
+            torrent_id (str): The torrent ID.
+            default: The value returned if there is no resume data.
+
+        Returns:
+            bytes: The bencoded resume data.
+
+        """
+        with self._lock:
+            for entries in (self._dirty, self._flushing):
+                if torrent_id in entries:
+                    resume_data = entries[torrent_id]
+                    return default if resume_data is None else resume_data
+            if torrent_id in self._cache:
+                self._cache_entry(torrent_id, self._cache.pop(torrent_id))
+                return self._cache[torrent_id]
+
+        try:
+            with open(self._filepath(torrent_id), 'rb') as _file:
+                resume_data = _file.read()
+        except IOError:
+            return default
+
+        with self._lock:
+            if torrent_id not in self._dirty and torrent_id not in self._flushing:
+                self._cache_entry(torrent_id, resume_data)
+        return resume_data
+
+    def pop(self, torrent_id, default=None):
+        """Remove the resume data of a torrent.
+
+        Returns:
+            bytes: The resume data if it was in memory, otherwise the default.
+
+        """
+        with self._lock:
+            resume_data = self._dirty.get(torrent_id) or self._cache.pop(
+                torrent_id, None
+            )
+            self._dirty[torrent_id] = None
+        return default if resume_data is None else resume_data
+
+    def is_dirty(self):
+        """True if there is resume data waiting to be written."""
+        return bool(self._dirty)
+
+    def _cache_entry(self, torrent_id, resume_data):
+        self._cache[torrent_id] = resume_data
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def flush(self):
+        """Write the changed resume data to file and delete removed files.
+
+        Returns:
+            bool: True if all the changes were written.
+
+        """
+        with self._lock:
+            self._flushing, self._dirty = self._dirty, {}
+        if not self._flushing:
+            return True
+
+        try:
+            if not os.path.isdir(self.path):
+                os.makedirs(self.path)
+        except OSError as ex:
+            log.error('Unable to create resume data directory: %s', ex)
+            self._restore_flushing(self._flushing)
+            return False
+
+        failed = {}
+        for torrent_id, resume_data in self._flushing.items():
+            filepath = self._filepath(torrent_id)
+            try:
+                if resume_data is None:
+                    if os.path.isfile(filepath):
+                        os.remove(filepath)
+                    continue
+                filepath_tmp = filepath + '.tmp'
+                with open(filepath_tmp, 'wb', 0) as _file:
+                    _file.write(resume_data)
+                    _file.flush()
+                    os.fsync(_file.fileno())
+                os.rename(filepath_tmp, filepath)
+            except (IOError, OSError) as ex:
+                log.error('Unable to save resume data for %s: %s', torrent_id, ex)
+                failed[torrent_id] = resume_data
+
+        # Sync the rename operations for the directory
+        if hasattr(os, 'O_DIRECTORY'):
+            try:
+                dirfd = os.open(self.path, os.O_DIRECTORY)
+                try:
+                    os.fsync(dirfd)
+                finally:
+                    os.close(dirfd)
+            except OSError as ex:
+                log.error('Unable to sync resume data directory: %s', ex)
+                self._restore_flushing(self._flushing)
+                return False
+
+        self._restore_flushing(failed)
+        return not failed
+
+    def _restore_flushing(self, failed):
+        """Finish a flush, keeping the failed entries to retry on the next flush.
+
+        Args:
+            failed (dict): The entries of the flush that were not written.
+
+        """
+        with self._lock:
+            for torrent_id, resume_data in self._flushing.items():
+                if torrent_id in self._dirty:
+                    continue
+                if torrent_id in failed:
+                    self._dirty[torrent_id] = resume_data
+                elif resume_data is not None:
+                    self._cache_entry(torrent_id, resume_data)
+            self._flushing = {}
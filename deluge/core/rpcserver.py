@@ -14,6 +14,7 @@
 import os
 import stat
 import sys
+import time
 import traceback
 from collections import namedtuple
 from types import FunctionType
@@ -21,6 +22,7 @@
 from OpenSSL import crypto
 from twisted.internet import defer, reactor
 from twisted.internet.protocol import Factory, connectionDone
+from twisted.python.failure import Failure
 
 import deluge.component as component
 import deluge.configmanager
@@ -29,6 +31,7 @@
     AUTH_LEVEL_DEFAULT,
     AUTH_LEVEL_NONE,
 )
+from deluge.core.metrics import Summary
 from deluge.crypto_utils import get_context_factory
 from deluge.error import (
     DelugeError,
@@ -38,7 +41,7 @@
     _ClientSideRecreateError,
 )
 from deluge.event import ClientDisconnectedEvent
-from deluge.transfer import DelugeTransferProtocol
+from deluge.transfer import DelugeTransferProtocol, select_compression
 
 RPC_RESPONSE = 1
 RPC_ERROR = 2
@@ -187,6 +190,141 @@ def connectionLost(self, reason=connectionDone):  # NOQA: N802
             )
         log.info('Deluge client disconnected: %s', reason.value)
 
+    def format_error(self):
+        """
+        Formats the exception being handled for sending to the client.
+
+        :returns: the exception name, args, kwargs and formatted traceback
+        :rtype: tuple
+
+        """
+        exc_type, exc_value, dummy_exc_trace = sys.exc_info()
+        formated_tb = traceback.format_exc()
+        try:
+            return (exc_type.__name__, exc_value._args, exc_value._kwargs, formated_tb)
+        except AttributeError:
+            # This is not a deluge exception (object has no attribute '_args), let's wrap it
+            log.warning(
+                'An exception occurred while sending RPC_ERROR to '
+                'client. Wrapping it and resending. Error to '
+                'send(causing exception goes next):\n%s',
+                formated_tb,
+            )
+            wrapped = WrappedException(str(exc_value), exc_type.__name__, formated_tb)
+            return ('WrappedException', wrapped._args, wrapped._kwargs, formated_tb)
+
+    def call_method(self, method, args, kwargs):
+        """
+        Calls an exported method after checking the session is authorized to.
+
+        :param method: the exported method name
+        :type method: str
+        :param args: the arguments to pass to `method`
+        :type args: list
+        :param kwargs: the keyword-arguments to pass to `method`
+        :type kwargs: dict
+
+        :returns: the return value of the method, which may be a Deferred
+
+        """
+        if method not in self.factory.methods:
+            # Raise exception to be sent back to client
+            raise AttributeError('RPC call on invalid function: %s' % method)
+
+        log.debug('RPC dispatch %s', method)
+        method_auth_requirement = self.factory.methods[method]._rpcserver_auth_level
+        auth_level = self.factory.authorized_sessions[
+            self.transport.sessionno
+        ].auth_level
+        if auth_level < method_auth_requirement:
+            # This session is not allowed to call this method
+            log.debug(
+                'Session %s is attempting an unauthorized method call!',
+                self.transport.sessionno,
+            )
+            raise NotAuthorizedError(auth_level, method_auth_requirement)
+        # Set the session_id in the factory so that methods can know
+        # which session is calling it.
+        self.factory.session_id = self.transport.sessionno
+        start = time.time()
+        try:
+            ret = self.factory.methods[method](*args, **kwargs)
+        except Exception:
+            self.record_call(method, start, failed=True)
+            raise
+
+        if isinstance(ret, defer.Deferred):
+
+            def on_result(result):
+                self.record_call(method, start, isinstance(result, Failure))
+                return result
+
+            ret.addBoth(on_result)
+        else:
+            self.record_call(method, start)
+        return ret
+
+    def record_call(self, method, start, failed=False):
+        """Record the duration of an exported method call for the metrics."""
+        if method not in self.factory.rpc_stats:
+            self.factory.rpc_stats[method] = Summary()
+        self.factory.rpc_stats[method].observe(time.time() - start)
+        if failed:
+            self.factory.rpc_errors[method] = self.factory.rpc_errors.get(method, 0) + 1
+
+    def dispatch_batch(self, calls):
+        """
+        Calls many exported methods for a single RPC Response.
+
+        Each call is authorized separately and an error in one call does not
+        affect the others.
+
+        :param calls: the (method, args, kwargs) of each call
+        :type calls: list
+
+        :returns: a Deferred fired with a list of (True, result) or
+            (False, error) for each call, in order, where error is the
+            exception name, args, kwargs and traceback
+        :rtype: twisted.internet.defer.Deferred
+
+        """
+
+        def on_fail(failure):
+            try:
+                failure.raiseException()
+            except Exception:
+                return False, self.format_error()
+
+        results = []
+        for method, args, kwargs in calls:
+            try:
+                ret = self.call_method(method, args, kwargs)
+            except Exception as ex:
+                results.append(defer.succeed((False, self.format_error())))
+                if not isinstance(ex, DelugeError):
+                    log.exception('Exception calling RPC request: %s', ex)
+            else:
+                if isinstance(ret, defer.Deferred):
+                    ret.addCallbacks(lambda result: (True, result), on_fail)
+                    results.append(ret)
+                else:
+                    results.append(defer.succeed((True, ret)))
+        return defer.gatherResults(results)
+
+    def negotiate_compression(self, offer):
+        """
+        Select the codec to send messages with from those offered by the client.
+
+        :param offer: the codecs supported by the client, most preferred first.
+        :type offer: list
+
+        """
+        try:
+            local = self.transport.getPeer().host in ('127.0.0.1', '::1')
+        except AttributeError:
+            local = False
+        self.set_compression(*select_compression(offer, local))
+
     def valid_session(self):
         return self.transport.sessionno in self.factory.authorized_sessions
 
@@ -211,33 +349,8 @@ def send_error():
             """
             Sends an error response with the contents of the exception that was raised.
             """
-            exc_type, exc_value, dummy_exc_trace = sys.exc_info()
-            formated_tb = traceback.format_exc()
             try:
-                self.sendData(
-                    (
-                        RPC_ERROR,
-                        request_id,
-                        exc_type.__name__,
-                        exc_value._args,
-                        exc_value._kwargs,
-                        formated_tb,
-                    )
-                )
-            except AttributeError:
-                # This is not a deluge exception (object has no attribute '_args), let's wrap it
-                log.warning(
-                    'An exception occurred while sending RPC_ERROR to '
-                    'client. Wrapping it and resending. Error to '
-                    'send(causing exception goes next):\n%s',
-                    formated_tb,
-                )
-                try:
-                    raise WrappedException(
-                        str(exc_value), exc_type.__name__, formated_tb
-                    )
-                except WrappedException:
-                    send_error()
+                self.sendData((RPC_ERROR, request_id) + self.format_error())
             except Exception as ex:
                 log.error(
                     'An exception occurred while sending RPC_ERROR to client: %s', ex
@@ -255,6 +368,7 @@ def send_error():
                 client_version = kwargs.pop('client_version', None)
                 if client_version is None:
                     raise IncompatibleClient(deluge.common.get_version())
+                compression = kwargs.pop('compression', None)
                 ret = component.get('AuthManager').authorize(*args, **kwargs)
                 if ret:
                     self.factory.authorized_sessions[
@@ -269,6 +383,9 @@ def send_error():
                 self.sendData((RPC_RESPONSE, request_id, (ret)))
                 if not ret:
                     self.transport.loseConnection()
+                elif compression:
+                    # Only clients offering codecs support other than zlib.
+                    self.negotiate_compression(compression)
             return
 
         # Anything below requires a valid session
@@ -290,31 +407,23 @@ def send_error():
                 self.sendData((RPC_RESPONSE, request_id, (True)))
             return
 
-        if method not in self.factory.methods:
+        if method == 'daemon.batch':
+            log.debug('RPC dispatch daemon.batch')
+
+            def on_batch_results(results):
+                try:
+                    self.sendData((RPC_RESPONSE, request_id, results))
+                except Exception:
+                    send_error()
+
             try:
-                # Raise exception to be sent back to client
-                raise AttributeError('RPC call on invalid function: %s' % method)
-            except AttributeError:
+                self.dispatch_batch(args[0]).addCallback(on_batch_results)
+            except Exception:
                 send_error()
-                return
+            return
 
-        log.debug('RPC dispatch %s', method)
         try:
-            method_auth_requirement = self.factory.methods[method]._rpcserver_auth_level
-            auth_level = self.factory.authorized_sessions[
-                self.transport.sessionno
-            ].auth_level
-            if auth_level < method_auth_requirement:
-                # This session is not allowed to call this method
-                log.debug(
-                    'Session %s is attempting an unauthorized method call!',
-                    self.transport.sessionno,
-                )
-                raise NotAuthorizedError(auth_level, method_auth_requirement)
-            # Set the session_id in the factory so that methods can know
-            # which session is calling it.
-            self.factory.session_id = self.transport.sessionno
-            ret = self.factory.methods[method](*args, **kwargs)
+            ret = self.call_method(method, args, kwargs)
         except Exception as ex:
             send_error()
             # Don't bother printing out DelugeErrors, because they are just
@@ -377,6 +486,11 @@ def __init__(self, port=58846, interface='', allow_remote=False, listen=True):
         self.factory.session_protocols = {}
         # Holds the interested event list for the sessions
         self.factory.interested_events = {}
+        # Holds the call durations and failures of the methods for the metrics
+        self.factory.rpc_stats = {}
+        self.factory.rpc_errors = {}
+        # The number of each event sent to the clients
+        self.events_sent = {}
 
         self.listen = listen
         if not listen:
@@ -520,22 +634,40 @@ def is_session_valid(self, session_id):
         """
         return session_id in self.factory.authorized_sessions
 
-    def emit_event(self, event):
+    def is_session_interested(self, session_id, event_name):
+        """
+        Checks if the session has registered interest in the event.
+
+        :param session_id: the session id
+        :type session_id: int
+        :param event_name: the event name
+        :type event_name: str
+        :returns: True if the session is interested in the event
+        :rtype: bool
+
+        """
+        return event_name in self.factory.interested_events.get(session_id, ())
+
+    def emit_event(self, event, superseded_by=None):
         """
         Emits the event to interested clients.
 
         :param event: the event to emit
         :type event: :class:`deluge.event.DelugeEvent`
+        :param superseded_by: the name of an event that will be emitted instead,
+            sessions interested in it are not sent this event
+        :type superseded_by: string
         """
         log.debug('intevents: %s', self.factory.interested_events)
         # Find sessions interested in this event
         for session_id, interest in self.factory.interested_events.items():
-            if event.name in interest:
+            if event.name in interest and superseded_by not in interest:
                 log.debug('Emit Event: %s %s', event.name, event.args)
                 # This session is interested so send a RPC_EVENT
                 self.factory.session_protocols[session_id].sendData(
                     (RPC_EVENT, event.name, event.args)
                 )
+                self.events_sent[event.name] = self.events_sent.get(event.name, 0) + 1
 
     def emit_event_for_session_id(self, session_id, event):
         """
@@ -576,6 +708,7 @@ def emit_event_for_session_id(self, session_id, event):
         self.factory.session_protocols[session_id].sendData(
             (RPC_EVENT, event.name, event.args)
         )
+        self.events_sent[event.name] = self.events_sent.get(event.name, 0) + 1
 
     def stop(self):
         self.factory.state = 'stopping'
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+
+"""A trigram index for substring searches of the torrent text fields."""
+from __future__ import unicode_literals
+
+import logging
+import re
+
+log = logging.getLogger(__name__)
+
+# Characters that start a new word, for ranking word matches higher.
+WORD_SEPARATORS = re.compile(r'[\W_]', re.UNICODE)
+
+
+def get_trigrams(text):
+    """Get the set of three character substrings of text."""
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class SearchIndex(object):
+    """Trigram indexes of torrent text fields for substring searches.
+
+    Each indexed field maps a trigram to the set of torrent_ids with a text
+    containing it. A search intersects the sets of the trigrams of the search
+    term and only checks the texts of the remaining torrents. The texts are
+    stored lowercased so a search is case-insensitive.
+
+    As with the FilterIndex, torrents are marked as dirty when a text changes
+    and are only re-indexed on the next search.
+
+    Args:
+        fields (dict, optional): A dict of {field: text_func} where
+            text_func(torrent_id) returns the text, or a list of texts, for field.
+
+    """
+
+    def __init__(self, fields=None):
+        self.text_funcs = {}
+        self._trigrams = {}
+        self._texts = {}
+        self._dirty = {}
+        self._torrent_ids = set()
+        if fields:
+            for field, text_func in fields.items():
+                self.register_field(field, text_func)
+
+    def __contains__(self, field):
+        return field in self.text_funcs
+
+    def register_field(self, field, text_func):
+        """Register a text field to be indexed.
+
+        Args:
+            field (str): The field name.
+            text_func (func): Called with a torrent_id to get the field text,
+                or a list of texts.
+
+        """
+        self.text_funcs[field] = text_func
+        self._trigrams[field] = {}
+        self._texts[field] = {}
+        self._dirty[field] = set(self._torrent_ids)
+
+    def deregister_field(self, field):
+        """Stop indexing a field."""
+        for attr in (self.text_funcs, self._trigrams, self._texts, self._dirty):
+            attr.pop(field, None)
+
+    def add(self, torrent_id):
+        """Add a torrent to the index, texts are indexed on next search."""
+        self._torrent_ids.add(torrent_id)
+        for dirty in self._dirty.values():
+            dirty.add(torrent_id)
+
+    def remove(self, torrent_id):
+        """Remove a torrent from all indexed fields."""
+        self._torrent_ids.discard(torrent_id)
+        for field in self.text_funcs:
+            self._dirty[field].discard(torrent_id)
+            self._discard(field, torrent_id)
+
+    def mark_dirty(self, torrent_id, fields=None):
+        """Flag torrent texts as changed.
+
+        Args:
+            torrent_id (str): The torrent_id, if None all torrents are flagged.
+            fields (list, optional): The fields to flag, defaults to all fields.
+
+        """
+        if torrent_id is not None and torrent_id not in self._torrent_ids:
+            return
+        for field in fields if fields is not None else list(self.text_funcs):
+            if field not in self._dirty:
+                continue
+            if torrent_id is None:
+                self._dirty[field].update(self._torrent_ids)
+            else:
+                self._dirty[field].add(torrent_id)
+
+    def search(self, term, fields=None):
+        """Get the torrent_ids with a text containing term.
+
+        Args:
+            term (str): The text to search for, the case is ignored.
+            fields (list, optional): The fields to search, defaults to all fields.
+
+        Returns:
+            set: The matching torrent_ids.
+
+        """
+        term = term.lower()
+        torrent_ids = set()
+        for field in fields if fields is not None else list(self.text_funcs):
+            if field not in self.text_funcs:
+                continue
+            self._refresh(field)
+            texts = self._texts[field]
+            for torrent_id in self._get_candidates(field, term):
+                if torrent_id in torrent_ids:
+                    continue
+                if any(term in text for text in texts[torrent_id]):
+                    torrent_ids.add(torrent_id)
+        return torrent_ids
+
+    def get_texts(self, field, torrent_id):
+        """Get the indexed lowercase texts of field for a torrent.
+
+        Returns:
+            tuple: The texts, empty if the torrent is not indexed.
+
+        """
+        self._refresh(field)
+        return self._texts[field].get(torrent_id, ())
+
+    def get_score(self, term, field, torrent_id):
+        """Rank how well a text of field for a torrent matches term.
+
+        Returns:
+            int: 3 for a whole text match, 2 for a match at the start of a word,
+                1 for any other match, 0 if no text contains term.
+
+        """
+        term = term.lower()
+        score = 0
+        for text in self.get_texts(field, torrent_id):
+            if text == term:
+                return 3
+            index = text.find(term)
+            while index != -1 and score < 2:
+                if index == 0 or WORD_SEPARATORS.match(text[index - 1]):
+                    score = 2
+                else:
+                    score = max(score, 1)
+                index = text.find(term, index + 1)
+        return score
+
+    def _get_candidates(self, field, term):
+        """Get the torrent_ids with all the trigrams of term in field."""
+        trigrams = get_trigrams(term)
+        if not trigrams:
+            # Too short to use the index, every text has to be checked.
+            return list(self._texts[field])
+
+        index = self._trigrams[field]
+        try:
+            postings = sorted((index[trigram] for trigram in trigrams), key=len)
+        except KeyError:
+            return ()
+        return postings[0].intersection(*postings[1:])
+
+    def _discard(self, field, torrent_id):
+        try:
+            texts = self._texts[field].pop(torrent_id)
+        except KeyError:
+            return
+        index = self._trigrams[field]
+        for trigram in set().union(*[get_trigrams(text) for text in texts]):
+            torrent_ids = index[trigram]
+            torrent_ids.discard(torrent_id)
+            if not torrent_ids:
+                del index[trigram]
+
+    def _refresh(self, field):
+        """Re-index the dirty torrent texts for field."""
+        dirty = self._dirty[field]
+        if not dirty:
+            return
+        text_func = self.text_funcs[field]
+        index = self._trigrams[field]
+        all_texts = self._texts[field]
+        for torrent_id in dirty:
+            try:
+                texts = text_func(torrent_id)
+            except KeyError:
+                # Torrent was removed before the index was notified.
+                self._discard(field, torrent_id)
+                continue
+            if not isinstance(texts, (list, tuple)):
+                texts = [texts]
+            texts = tuple(text.lower() for text in texts if text)
+            if all_texts.get(torrent_id) == texts:
+                continue
+            self._discard(field, torrent_id)
+            all_texts[torrent_id] = texts
+            for trigram in set().union(*[get_trigrams(text) for text in texts]):
+                index.setdefault(trigram, set()).add(torrent_id)
+        dirty.clear()
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+
+"""Scheduling of the seeding goal checks of the torrents."""
+from __future__ import division, unicode_literals
+
+import heapq
+import logging
+
+from twisted.internet import reactor
+
+log = logging.getLogger(__name__)
+
+# The torrent options that change when a seeding goal is reached.
+GOAL_OPTIONS = (
+    'stop_at_ratio',
+    'stop_ratio',
+    'stop_at_seed_time',
+    'stop_seed_time',
+    'stop_at_idle_time',
+    'stop_idle_time',
+)
+
+GOAL_STATUS_KEYS = [
+    'total_done',
+    'total_uploaded',
+    'upload_payload_rate',
+    'seeding_time',
+    'time_since_upload',
+]
+
+
+def time_to_goal(options, status, max_projection):
+    """The projected time until the first enabled seeding goal is reached.
+
+    The ratio goal is projected from the current upload rate, so it is never
+    projected further than `max_projection` as the rate can change.
+
+    Args:
+        options (dict): The torrent options.
+        status (dict): The torrent status with the GOAL_STATUS_KEYS.
+        max_projection (float): The longest ratio goal projection, in seconds.
+
+    Returns:
+        float: The seconds until a goal is reached, 0 if one is reached,
+            or None if the torrent has no seeding goals.
+
+    """
+    times = []
+    if options['stop_at_ratio'] and status['total_done'] > 0:
+        needed = options['stop_ratio'] * status['total_done'] - status['total_uploaded']
+        if needed <= 0:
+            return 0
+        rate = status['upload_payload_rate']
+        times.append(min(needed / rate, max_projection) if rate else max_projection)
+
+    if options['stop_at_seed_time']:
+        times.append(options['stop_seed_time'] * 60 - status['seeding_time'])
+
+    if options['stop_at_idle_time']:
+        idle_time = status['time_since_upload']
+        if idle_time < 0:
+            # Nothing was uploaded so it has been idle since it started seeding.
+            idle_time = status['seeding_time']
+        times.append(options['stop_idle_time'] * 60 - idle_time)
+
+    if not times:
+        return None
+    return max(min(times), 0)
+
+
+class SeedGoals(object):
+    """Checks the seeding goals of the torrents when they are due.
+
+    The torrents are kept in a heap ordered by the time their next goal is
+    projected to be reached, and a single timer wakes up for the earliest.
+    The torrents reaching their goals in a pass are handed to `on_reached`
+    together.
+
+    Args:
+        torrents (dict): The torrents in the session keyed by torrent_id.
+        on_reached (func): Called with the list of torrents that reached a goal.
+        max_projection (float): The longest time before a ratio goal is
+            checked again, in seconds.
+
+    """
+
+    # The torrent states in which the seeding goals are not checked.
+    INACTIVE_STATES = ('Checking', 'Allocating', 'Paused', 'Queued')
+
+    def __init__(self, torrents, on_reached, max_projection=60):
+        self.torrents = torrents
+        self.on_reached = on_reached
+        self.max_projection = max_projection
+        self.clock = reactor
+        self._heap = []
+        self._due = {}
+        self._timer = None
+
+    def schedule(self, torrent_id, delay=0):
+        """Check the seeding goals of the torrent after delay seconds."""
+        due = self.clock.seconds() + delay
+        self._due[torrent_id] = due
+        heapq.heappush(self._heap, (due, torrent_id))
+        self._start_timer()
+
+    def unschedule(self, torrent_id):
+        """Stop checking the seeding goals of the torrent."""
+        self._due.pop(torrent_id, None)
+
+    def stop(self):
+        if self._timer and self._timer.active():
+            self._timer.cancel()
+        self._timer = None
+
+    def _start_timer(self):
+        # Drop the entries superseded by a later schedule of the torrent.
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return
+
+        due = self._heap[0][0]
+        if self._timer and self._timer.active():
+            if self._timer.getTime() <= due:
+                return
+            self._timer.cancel()
+        self._timer = self.clock.callLater(
+            max(due - self.clock.seconds(), 0), self._check_due
+        )
+
+    def _check_due(self):
+        self._timer = None
+        now = self.clock.seconds()
+        reached = []
+        while self._heap and self._heap[0][0] <= now:
+            due, torrent_id = heapq.heappop(self._heap)
+            if self._due.get(torrent_id) != due:
+                continue
+            del self._due[torrent_id]
+
+            torrent = self.torrents.get(torrent_id)
+            delay = self.check(torrent) if torrent else None
+            if delay == 0:
+                reached.append(torrent)
+            elif delay is not None:
+                self._due[torrent_id] = now + delay
+                heapq.heappush(self._heap, (now + delay, torrent_id))
+
+        if reached:
+            log.debug('%d torrents reached their seeding goals', len(reached))
+            self.on_reached(reached)
+        self._start_timer()
+
+    def check(self, torrent):
+        """The time until the torrent reaches a seeding goal.
+
+        Returns:
+            float: The seconds until a goal is reached, 0 if one is reached,
+                or None if the torrent is not seeding towards a goal.
+
+        """
+        if not torrent.is_finished or torrent.state in self.INACTIVE_STATES:
+            return None
+        options = torrent.options
+        if not (
+            options['stop_at_ratio']
+            or options['stop_at_seed_time']
+            or options['stop_at_idle_time']
+        ):
+            return None
+        status = torrent.get_status(GOAL_STATUS_KEYS, update=True)
+        return time_to_goal(options, status, self.max_projection)
@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+
+"""Sharded, append-only journal of the torrent states."""
+from __future__ import unicode_literals
+
+import logging
+import os
+import struct
+import zlib
+
+import six.moves.cPickle as pickle
+
+log = logging.getLogger(__name__)
+
+# Each journal record is the length of the pickled (torrent_id, state) tuple
+# followed by the pickle. A state of None records the torrent removal.
+RECORD_HEADER = struct.Struct('!I')
+
+# The errors raised when unpickling corrupt or incompatible data.
+UNPICKLING_ERRORS = (
+    AttributeError,
+    EOFError,
+    ImportError,
+    IndexError,
+    KeyError,
+    TypeError,
+    ValueError,
+    pickle.UnpicklingError,
+)
+
+
+class _Shard(object):
+    """The states of the torrents stored in one snapshot and journal file pair."""
+
+    def __init__(self, snapshot_path, journal_path):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.states = {}
+        self.records = 0
+
+    def filepaths(self):
+        """The paths of the existing shard files."""
+        return [
+            filepath
+            for filepath in (self.snapshot_path, self.journal_path)
+            if os.path.isfile(filepath)
+        ]
+
+    def load(self):
+        self.states = {}
+        self.records = 0
+        if os.path.isfile(self.snapshot_path):
+            with open(self.snapshot_path, 'rb') as _file:
+                states = pickle.load(_file)
+            if not isinstance(states, dict):
+                raise pickle.UnpicklingError(
+                    'Bad snapshot in %s: %s' % (self.snapshot_path, type(states))
+                )
+            self.states = states
+
+        if not os.path.isfile(self.journal_path):
+            return
+
+        with open(self.journal_path, 'rb') as _file:
+            data = _file.read()
+
+        offset = 0
+        while len(data) - offset >= RECORD_HEADER.size:
+            start = offset + RECORD_HEADER.size
+            end = start + RECORD_HEADER.unpack_from(data, offset)[0]
+            if end > len(data):
+                break
+            try:
+                torrent_id, state = pickle.loads(data[start:end])
+            except UNPICKLING_ERRORS as ex:
+                log.warning('Bad record in %s: %s', self.journal_path, ex)
+                break
+            self._apply(torrent_id, state)
+            self.records += 1
+            offset = end
+
+        if offset < len(data):
+            # Drop the partially written record so appends follow a good record.
+            log.warning(
+                'Truncating %s at %s of %s bytes', self.journal_path, offset, len(data)
+            )
+            with open(self.journal_path, 'r+b') as _file:
+                _file.truncate(offset)
+
+    def _apply(self, torrent_id, state):
+        if state is None:
+            self.states.pop(torrent_id, None)
+        else:
+            self.states[torrent_id] = state
+
+    def append(self, records):
+        """Append the (torrent_id, state) records to the journal file."""
+        chunks = []
+        for torrent_id, state in records:
+            data = pickle.dumps((torrent_id, state), protocol=2)
+            chunks.append(RECORD_HEADER.pack(len(data)))
+            chunks.append(data)
+            self._apply(torrent_id, state)
+        with open(self.journal_path, 'ab', 0) as _file:
+            _file.write(b''.join(chunks))
+            _file.flush()
+            os.fsync(_file.fileno())
+        self.records += len(records)
+
+    def compact(self):
+        """Write the states to the snapshot file and empty the journal file."""
+        snapshot_tmp = self.snapshot_path + '.tmp'
+        with open(snapshot_tmp, 'wb', 0) as _file:
+            pickle.dump(self.states, _file, protocol=2)
+            _file.flush()
+            os.fsync(_file.fileno())
+        os.rename(snapshot_tmp, self.snapshot_path)
+        # The journal records are already in the snapshot, so replaying them
+        # after an interrupted compaction leaves the states unchanged.
+        with open(self.journal_path, 'wb') as _file:
+            _file.flush()
+            os.fsync(_file.fileno())
+        self.records = 0
+
+
+class StateJournal(object):
+    """Stores the torrent states in shards of a snapshot and an append-only journal.
+
+    Saving a changed torrent state appends a record to the journal of its
+    shard. A shard is compacted into its snapshot when the journal has more
+    records than `compact_ratio` times the number of torrents in the shard.
+    The queue order of the torrents is stored in a separate file, so moving
+    a torrent in the queue does not rewrite the states of the others.
+
+    Args:
+        path (str): The directory of the shard files.
+        shards (int): The number of shards.
+
+    """
+
+    def __init__(self, path, shards=16):
+        self.path = path
+        self.compact_ratio = 2
+        self.min_compact_records = 100
+        self.shards = [
+            _Shard(
+                os.path.join(path, '%02x.snapshot' % index),
+                os.path.join(path, '%02x.journal' % index),
+            )
+            for index in range(shards)
+        ]
+        self.queue_path = os.path.join(path, 'queue')
+        # The errors of the shards that could not be loaded {index: error}
+        self.load_errors = {}
+
+    def _shard(self, torrent_id):
+        index = zlib.crc32(torrent_id.encode('utf8')) & 0xFFFFFFFF
+        return self.shards[index % len(self.shards)]
+
+    def filepaths(self):
+        """The paths of the existing journal files."""
+        filepaths = [
+            filepath for shard in self.shards for filepath in shard.filepaths()
+        ]
+        if os.path.isfile(self.queue_path):
+            filepaths.append(self.queue_path)
+        return filepaths
+
+    def shard_filepaths(self, index):
+        """The paths of the existing files of a shard."""
+        return self.shards[index].filepaths()
+
+    def exists(self):
+        """True if the journal has been written."""
+        return bool(self.filepaths())
+
+    def load(self):
+        """Replay the snapshots and journals of all shards.
+
+        A shard that cannot be read, or has a corrupt snapshot, is left empty
+        and its error is kept in `load_errors`, the other shards are loaded.
+
+        Returns:
+            dict: The states keyed by torrent_id.
+
+        """
+        self.load_errors = {}
+        states = {}
+        for index, shard in enumerate(self.shards):
+            try:
+                shard.load()
+            except (IOError, OSError) + UNPICKLING_ERRORS as ex:
+                log.error('Unable to load %s: %s', shard.snapshot_path, ex)
+                shard.states = {}
+                self.load_errors[index] = ex
+            else:
+                states.update(shard.states)
+        return states
+
+    def reset_shard(self, index):
+        """Replace the files of a shard that could not be loaded by empty ones."""
+        shard = self.shards[index]
+        shard.states = {}
+        self._makedirs()
+        shard.compact()
+        self.load_errors.pop(index, None)
+
+    def load_queue(self):
+        """Load the queue order of the torrents.
+
+        Returns:
+            list: The queued torrent_ids in queue order, or None if the queue
+                order was not saved or cannot be loaded.
+
+        """
+        if not os.path.isfile(self.queue_path):
+            return None
+        try:
+            with open(self.queue_path, 'rb') as _file:
+                queue = pickle.load(_file)
+        except (IOError, OSError) + UNPICKLING_ERRORS as ex:
+            log.warning('Unable to load %s: %s', self.queue_path, ex)
+            return None
+        if not isinstance(queue, list):
+            log.warning('Bad queue order in %s: %s', self.queue_path, type(queue))
+            return None
+        return queue
+
+    def write_queue(self, torrent_ids):
+        """Replace the stored queue order of the torrents.
+
+        Args:
+            torrent_ids (list): The queued torrent_ids in queue order.
+
+        """
+        self._makedirs()
+        queue_tmp = self.queue_path + '.tmp'
+        with open(queue_tmp, 'wb', 0) as _file:
+            pickle.dump(list(torrent_ids), _file, protocol=2)
+            _file.flush()
+            os.fsync(_file.fileno())
+        os.rename(queue_tmp, self.queue_path)
+
+    def write(self, changed, removed=()):
+        """Append the changed and removed torrent states.
+
+        Args:
+            changed (dict): The changed states keyed by torrent_id.
+            removed (list): The torrent_ids of removed torrents.
+
+        """
+        records = {}
+        for torrent_id, state in changed.items():
+            records.setdefault(self._shard(torrent_id), []).append((torrent_id, state))
+        for torrent_id in removed:
+            records.setdefault(self._shard(torrent_id), []).append((torrent_id, None))
+
+        self._makedirs()
+        for shard, shard_records in records.items():
+            shard.append(shard_records)
+            if shard.records > max(
+                self.min_compact_records, self.compact_ratio * len(shard.states)
+            ):
+                log.debug('Compacting torrent state shard %s', shard.snapshot_path)
+                shard.compact()
+
+    def replace(self, states):
+        """Replace all the stored states, compacting every shard.
+
+        Args:
+            states (dict): The states keyed by torrent_id.
+
+        """
+        for shard in self.shards:
+            shard.states = {}
+        for torrent_id, state in states.items():
+            self._shard(torrent_id).states[torrent_id] = state
+
+        self._makedirs()
+        for shard in self.shards:
+            shard.compact()
+
+    def _makedirs(self):
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
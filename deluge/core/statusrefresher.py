@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+
+"""Coalescing of the libtorrent torrent status refreshes."""
+from __future__ import division, unicode_literals
+
+import logging
+import time
+from collections import deque
+
+from twisted.internet import defer, reactor
+
+log = logging.getLogger(__name__)
+
+
+class StatusRefresher(object):
+    """Shares the libtorrent status refreshes between concurrent requests.
+
+    A refresh is a session.post_torrent_updates() call answered by a
+    state_update_alert. Only one refresh is in flight at a time and it serves
+    every request made before it was posted, the requests made while it is in
+    flight wait for the next refresh which is posted once it is answered.
+
+    Args:
+        session: The libtorrent session.
+        max_age (float): The default age in seconds of the last refresh that
+            a request accepts instead of waiting for a new refresh.
+        timeout (float): The time in seconds after which an unanswered
+            refresh is considered lost, its requests are then answered with
+            the current status.
+        stats_window (float): The time in seconds the refresh rate is
+            averaged over.
+
+    """
+
+    def __init__(self, session, max_age=1.5, timeout=10, stats_window=60):
+        self.session = session
+        self.max_age = max_age
+        self.timeout = timeout
+        self.stats_window = stats_window
+        self.clock = reactor
+        self.last_refresh = 0
+        self._posted = None
+        self._timer = None
+        self._waiting = []
+        self._next = []
+        self._refresh_times = deque()
+        self.refreshes = 0
+        self.requests = 0
+        self.requests_cached = 0
+
+    def refresh(self, max_age=None):
+        """Request torrent status no older than max_age.
+
+        Args:
+            max_age (float, optional): The accepted age in seconds of the last
+                refresh, defaults to `max_age` of the refresher.
+
+        Returns:
+            Deferred: Fires when the status of the torrents is fresh enough.
+
+        """
+        self.requests += 1
+        if max_age is None:
+            max_age = self.max_age
+        now = time.time()
+        if now - self.last_refresh < max_age:
+            self.requests_cached += 1
+            return defer.succeed(None)
+
+        d = defer.Deferred()
+        if self._posted is None:
+            self._waiting.append(d)
+            self._post(now)
+        else:
+            self._next.append(d)
+        return d
+
+    def stop(self):
+        if self._timer and self._timer.active():
+            self._timer.cancel()
+        self._timer = None
+
+    def _post(self, now):
+        self._posted = now
+        self.session.post_torrent_updates()
+        self.stop()
+        self._timer = self.clock.callLater(self.timeout, self._on_timeout)
+
+    def _on_timeout(self):
+        self._timer = None
+        log.warning(
+            'No torrent status update received in %ss, using the current status.',
+            self.timeout,
+        )
+        self._answer(time.time())
+
+    def on_refreshed(self):
+        """Answer the waiting requests when a state_update_alert is received."""
+        self.stop()
+        now = time.time()
+        self.last_refresh = now
+        self.refreshes += 1
+        self._refresh_times.append(now)
+        while self._refresh_times[0] < now - self.stats_window:
+            self._refresh_times.popleft()
+        self._answer(now)
+
+    def _answer(self, now):
+        """Answer the requests of the posted refresh and post the next one."""
+        self._posted = None
+        waiting, self._waiting = self._waiting, []
+        if self._next:
+            self._waiting, self._next = self._next, []
+            self._post(now)
+        for d in waiting:
+            d.callback(None)
+
+    def get_stats(self):
+        """Get the refresh counters.
+
+        Returns:
+            dict: The total `refreshes` and `requests`, the `requests_cached`
+                answered without a refresh, the `refreshes_per_second` over the
+                stats window and the `requests_per_refresh`.
+
+        """
+        return {
+            'refreshes': self.refreshes,
+            'requests': self.requests,
+            'requests_cached': self.requests_cached,
+            'refreshes_per_second': len(self._refresh_times) / self.stats_window,
+            'requests_per_refresh': (self.requests - self.requests_cached)
+            / max(self.refreshes, 1),
+        }
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+
+"""Columnar storage of the numeric torrent status fields."""
+from __future__ import division, unicode_literals
+
+import logging
+from array import array
+from operator import itemgetter
+
+log = logging.getLogger(__name__)
+
+try:
+    array('q')
+except ValueError:
+    # Python 2 has no 'long long' typecode.
+    INT_TYPECODE = 'l'
+else:
+    INT_TYPECODE = 'q'
+
+# The status keys stored in the table: (key, typecode, value_func)
+# where value_func is called with a libtorrent torrent_status.
+COLUMNS = (
+    ('active_time', INT_TYPECODE, lambda s: s.active_time),
+    ('seeding_time', INT_TYPECODE, lambda s: s.seeding_time),
+    ('finished_time', INT_TYPECODE, lambda s: s.finished_time),
+    ('all_time_download', INT_TYPECODE, lambda s: s.all_time_download),
+    ('distributed_copies', 'd', lambda s: max(0.0, s.distributed_copies)),
+    ('download_payload_rate', INT_TYPECODE, lambda s: s.download_payload_rate),
+    ('upload_payload_rate', INT_TYPECODE, lambda s: s.upload_payload_rate),
+    ('num_peers', INT_TYPECODE, lambda s: s.num_peers - s.num_seeds),
+    ('num_seeds', INT_TYPECODE, lambda s: s.num_seeds),
+    (
+        'seeds_peers_ratio',
+        'd',
+        lambda s: -1.0 if s.num_incomplete == 0 else s.num_complete / s.num_incomplete,
+    ),
+    ('seed_rank', INT_TYPECODE, lambda s: s.seed_rank),
+    ('time_added', INT_TYPECODE, lambda s: s.added_time),
+    ('total_done', INT_TYPECODE, lambda s: s.total_done),
+    ('total_payload_download', INT_TYPECODE, lambda s: s.total_payload_download),
+    ('total_payload_upload', INT_TYPECODE, lambda s: s.total_payload_upload),
+    ('total_peers', INT_TYPECODE, lambda s: s.num_incomplete),
+    ('total_seeds', INT_TYPECODE, lambda s: s.num_complete),
+    ('total_uploaded', INT_TYPECODE, lambda s: s.all_time_upload),
+    ('total_wanted', INT_TYPECODE, lambda s: s.total_wanted),
+    ('total_remaining', INT_TYPECODE, lambda s: s.total_wanted - s.total_wanted_done),
+    ('queue', INT_TYPECODE, lambda s: s.queue_position),
+    ('completed_time', INT_TYPECODE, lambda s: s.completed_time),
+    ('last_seen_complete', INT_TYPECODE, lambda s: s.last_seen_complete),
+    ('time_since_download', INT_TYPECODE, lambda s: s.time_since_download),
+    ('time_since_upload', INT_TYPECODE, lambda s: s.time_since_upload),
+)
+
+
+class StatusTable(object):
+    """A table of numeric torrent status values stored in typed arrays.
+
+    Each status key is a column and each torrent a row, so a key can be read
+    for many torrents without calling a status function per torrent. Rows
+    are kept dense, removing a torrent moves the last row into its place.
+
+    The available columns are determined from the first status added as
+    older or newer libtorrent versions may lack some status attributes.
+
+    """
+
+    def __init__(self):
+        self.columns = None
+        self.value_funcs = None
+        # The torrent_id of each row and the reverse lookup.
+        self.torrent_ids = []
+        self.rows = {}
+
+    def __contains__(self, key):
+        return self.columns is not None and key in self.columns
+
+    def __len__(self):
+        return len(self.torrent_ids)
+
+    def _create_columns(self, status):
+        """Create the columns supported by this libtorrent status."""
+        self.columns = {}
+        self.value_funcs = []
+        for key, typecode, value_func in COLUMNS:
+            column = array(typecode)
+            try:
+                column.append(value_func(status))
+            except (AttributeError, TypeError, OverflowError) as ex:
+                log.debug('Status key %s not stored in status table: %s', key, ex)
+                continue
+            column.pop()
+            self.columns[key] = column
+            self.value_funcs.append((column, value_func))
+
+    def add(self, torrent_id, status):
+        """Add a torrent row.
+
+        Args:
+            torrent_id (str): The torrent_id.
+            status (libtorrent.torrent_status): The torrent status.
+
+        """
+        if torrent_id in self.rows:
+            self.update(torrent_id, status)
+            return
+        if self.columns is None:
+            self._create_columns(status)
+        for column, value_func in self.value_funcs:
+            column.append(value_func(status))
+        self.rows[torrent_id] = len(self.torrent_ids)
+        self.torrent_ids.append(torrent_id)
+
+    def remove(self, torrent_id):
+        """Remove a torrent row."""
+        row = self.rows.pop(torrent_id, None)
+        if row is None:
+            return
+        last_torrent_id = self.torrent_ids.pop()
+        if last_torrent_id != torrent_id:
+            self.torrent_ids[row] = last_torrent_id
+            self.rows[last_torrent_id] = row
+            for column in self.columns.values():
+                column[row] = column.pop()
+        else:
+            for column in self.columns.values():
+                column.pop()
+
+    def update(self, torrent_id, status):
+        """Refresh a torrent row from a libtorrent status.
+
+        Args:
+            torrent_id (str): The torrent_id.
+            status (libtorrent.torrent_status): The torrent status.
+
+        """
+        try:
+            row = self.rows[torrent_id]
+        except KeyError:
+            return
+        for column, value_func in self.value_funcs:
+            column[row] = value_func(status)
+
+    def get_value(self, torrent_id, key):
+        """Get a single status value."""
+        return self.columns[key][self.rows[torrent_id]]
+
+    def get_status(self, torrent_ids, keys):
+        """Get the status values of keys for torrents.
+
+        Args:
+            torrent_ids (list): The torrent_ids, all must be in the table.
+            keys (list): The status keys, all must be table columns.
+
+        Returns:
+            list: A status dict for each torrent_id, in the same order.
+
+        """
+        if not keys or not torrent_ids:
+            return [{} for dummy in torrent_ids]
+        rows = [self.rows[torrent_id] for torrent_id in torrent_ids]
+        if len(rows) == 1:
+            row = rows[0]
+            return [{key: self.columns[key][row] for key in keys}]
+        # Gather each column in a single call rather than per torrent.
+        get_rows = itemgetter(*rows)
+        values = [get_rows(self.columns[key]) for key in keys]
+        return [dict(zip(keys, row_values)) for row_values in zip(*values)]
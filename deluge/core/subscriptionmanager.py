@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+
+"""Pushes torrent status changes to subscribed clients."""
+from __future__ import unicode_literals
+
+import logging
+import time
+from itertools import count
+
+import deluge.component as component
+from deluge.core.authmanager import AUTH_LEVEL_ADMIN
+from deluge.event import TorrentsStatusDeltaEvent
+
+log = logging.getLogger(__name__)
+
+
+class StatusSubscription(object):
+    """A client's subscription to the status of a filtered set of torrents.
+
+    Only the values last sent to the client are kept, as a tuple per torrent
+    in the order of keys, to work out the changed values for the next delta.
+
+    Args:
+        subscription_id (int): The subscription id.
+        session_id (int): The RPC session to send deltas to.
+        filter_dict (dict): The filter for the torrents to include.
+        keys (list): The status keys to send.
+        interval (float): The minimum time in seconds between deltas.
+        username (str): The subscribing user.
+        auth_level (int): The auth level of the subscribing user.
+
+    """
+
+    def __init__(
+        self,
+        subscription_id,
+        session_id,
+        filter_dict,
+        keys,
+        interval,
+        username,
+        auth_level,
+    ):
+        self.subscription_id = subscription_id
+        self.session_id = session_id
+        self.filter_dict = filter_dict
+        self.keys = keys
+        self.interval = interval
+        self.username = username
+        self.auth_level = auth_level
+        self.last_sent = 0
+        self.sent = {}
+
+    def is_due(self, now):
+        return now - self.last_sent >= self.interval
+
+    def get_delta(self, status_dict):
+        """Get the changes from the last sent values and store the new values.
+
+        Args:
+            status_dict (dict): The current {torrent_id: {key: value}}.
+
+        Returns:
+            tuple: The changes as {torrent_id: {key: value}} and the list of
+                torrent_ids that are no longer included.
+
+        """
+        changes = {}
+        sent = {}
+        for torrent_id, status in status_dict.items():
+            keys = self.keys or sorted(status)
+            values = tuple(status.get(key) for key in keys)
+            sent[torrent_id] = values
+            prev_values = self.sent.get(torrent_id)
+            if prev_values is None or len(prev_values) != len(values):
+                changes[torrent_id] = status
+            elif prev_values != values:
+                changes[torrent_id] = {
+                    key: value
+                    for key, value, prev_value in zip(keys, values, prev_values)
+                    if value != prev_value
+                }
+        removed = [torrent_id for torrent_id in self.sent if torrent_id not in sent]
+        self.sent = sent
+        return changes, removed
+
+
+class SubscriptionManager(component.Component):
+    """Sends torrent status deltas to subscribed clients.
+
+    Deltas are built after each libtorrent state_update_alert and sent to the
+    client as a TorrentsStatusDeltaEvent, so the client does not need to poll
+    get_torrents_status.
+
+    """
+
+    def __init__(self, core):
+        component.Component.__init__(
+            self, 'SubscriptionManager', interval=1, depend=['TorrentManager']
+        )
+        self.core = core
+        self.subscriptions = {}
+        self._ids = count(1)
+        self.min_interval = 0.5
+
+        component.get('AlertManager').register_handler(
+            'state_update_alert', self.on_alert_state_update
+        )
+        component.get('EventManager').register_event_handler(
+            'ClientDisconnectedEvent', self._on_client_disconnected
+        )
+
+    def update(self):
+        """Request status updates from libtorrent while there are subscribers."""
+        if not self.subscriptions:
+            return
+        self.core.torrentmanager.status_refresher.refresh(self.min_interval)
+
+    def subscribe(self, filter_dict, keys, interval=1):
+        """Subscribe the current RPC session to torrent status deltas.
+
+        Args:
+            filter_dict (dict): The filter for the torrents to include.
+            keys (list): The status keys to send, all keys if empty.
+            interval (float, optional): The minimum time in seconds between deltas.
+
+        Returns:
+            int: The subscription id.
+
+        """
+        rpcserver = component.get('RPCServer')
+        subscription = StatusSubscription(
+            next(self._ids),
+            rpcserver.get_session_id(),
+            dict(filter_dict or {}),
+            list(keys),
+            max(self.min_interval, interval),
+            rpcserver.get_session_user(),
+            rpcserver.get_session_auth_level(),
+        )
+        self.subscriptions[subscription.subscription_id] = subscription
+        log.debug(
+            'Session %s subscribed to torrents status: %s',
+            subscription.session_id,
+            subscription.subscription_id,
+        )
+        # Send the full status with the next update.
+        self.core.torrentmanager.status_refresher.refresh(0)
+        return subscription.subscription_id
+
+    def unsubscribe(self, subscription_id):
+        """Remove a subscription of the current RPC session.
+
+        Args:
+            subscription_id (int): The subscription id.
+
+        Returns:
+            bool: True if the subscription was removed.
+
+        """
+        subscription = self.subscriptions.get(subscription_id)
+        session_id = component.get('RPCServer').get_session_id()
+        if subscription is None or subscription.session_id != session_id:
+            return False
+        del self.subscriptions[subscription_id]
+        return True
+
+    def get_torrent_ids(self, subscription):
+        """Get the torrent_ids the subscription includes."""
+        torrents = self.core.torrentmanager.torrents
+        filter_dict = dict(subscription.filter_dict)
+        if 'id' not in filter_dict:
+            # Avoid get_torrent_list as that is for the current RPC session.
+            filter_dict['id'] = list(torrents)
+        torrent_ids = self.core.filtermanager.filter_torrent_ids(filter_dict)
+        if subscription.auth_level == AUTH_LEVEL_ADMIN:
+            return torrent_ids
+        return [
+            torrent_id
+            for torrent_id in torrent_ids
+            if torrent_id in torrents
+            and (
+                torrents[torrent_id].options['owner'] == subscription.username
+                or torrents[torrent_id].options['shared']
+            )
+        ]
+
+    def send_delta(self, subscription):
+        """Build and send the status delta for a subscription.
+
+        Nothing is built until the session is interested in the deltas, so
+        the first delta sent is the full status.
+        """
+        rpcserver = component.get('RPCServer')
+        if not rpcserver.is_session_interested(
+            subscription.session_id, TorrentsStatusDeltaEvent.__name__
+        ):
+            return
+
+        torrent_ids = self.get_torrent_ids(subscription)
+        status_dict, plugin_keys = self.core.torrentmanager.build_torrents_status(
+            torrent_ids, subscription.keys
+        )
+        if plugin_keys:
+            pluginmanager = self.core.pluginmanager
+            for torrent_id, status in status_dict.items():
+                status.update(pluginmanager.get_status(torrent_id, plugin_keys))
+
+        first = not subscription.last_sent
+        changes, removed = subscription.get_delta(status_dict)
+        subscription.last_sent = time.time()
+        if changes or removed or first:
+            rpcserver.emit_event_for_session_id(
+                subscription.session_id,
+                TorrentsStatusDeltaEvent(
+                    subscription.subscription_id, changes, removed
+                ),
+            )
+
+    def on_alert_state_update(self, alert):
+        now = time.time()
+        rpcserver = component.get('RPCServer')
+        for subscription in list(self.subscriptions.values()):
+            if rpcserver.listen and not rpcserver.is_session_valid(
+                subscription.session_id
+            ):
+                del self.subscriptions[subscription.subscription_id]
+            elif subscription.is_due(now):
+                self.send_delta(subscription)
+
+    def _on_client_disconnected(self, session_id):
+        for subscription in list(self.subscriptions.values()):
+            if subscription.session_id == session_id:
+                del self.subscriptions[subscription.subscription_id]
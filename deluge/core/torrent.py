@@ -18,15 +18,15 @@
 
 import logging
 import os
-import socket
 
 from twisted.internet.defer import Deferred, DeferredList
 
 import deluge.component as component
 from deluge._libtorrent import lt
-from deluge.common import decode_bytes
+from deluge.common import decode_bytes, encode_pieces_rle
 from deluge.configmanager import ConfigManager, get_config_dir
 from deluge.core.authmanager import AUTH_LEVEL_ADMIN
+from deluge.core.seedgoals import GOAL_OPTIONS
 from deluge.decorators import deprecated
 from deluge.event import (
     TorrentFolderRenamedEvent,
@@ -34,12 +34,6 @@
     TorrentTrackerStatusEvent,
 )
 
-try:
-    from urllib.parse import urlparse
-except ImportError:
-    # PY2 fallback
-    from urlparse import urlparse  # pylint: disable=ungrouped-imports
-
 try:
     from future_builtins import zip
 except ImportError:
@@ -151,12 +145,16 @@ class TorrentOptions(dict):
         owner (str): The user this torrent belongs to.
         pre_allocate_storage (bool): When adding the torrent should all files be pre-allocated.
         prioritize_first_last_pieces (bool): Prioritize the first and last pieces in the torrent.
-        remove_at_ratio (bool): Remove the torrent when it has reached the stop_ratio.
+        remove_at_ratio (bool): Remove the torrent when it has reached a seeding goal.
         seed_mode (bool): Assume that all files are present for this torrent (Only used when adding a torent).
         sequential_download (bool): Download the pieces of the torrent in order.
         shared (bool): Enable the torrent to be seen by other Deluge users.
+        stop_at_idle_time (bool): Stop the torrent when nothing has been uploaded for stop_idle_time.
         stop_at_ratio (bool): Stop the torrent when it has reached stop_ratio.
+        stop_at_seed_time (bool): Stop the torrent when it has seeded for stop_seed_time.
+        stop_idle_time (float): The minutes without uploads to stop (or remove) the torrent after.
         stop_ratio (float): The seeding ratio to stop (or remove) the torrent at.
+        stop_seed_time (float): The minutes of seeding to stop (or remove) the torrent after.
         super_seeding (bool): Enable super seeding/initial seeding.
     """
 
@@ -178,8 +176,12 @@ def __init__(self):
             'remove_at_ratio': 'remove_seed_at_ratio',
             'sequential_download': 'sequential_download',
             'shared': 'shared',
+            'stop_at_idle_time': 'stop_seed_at_idle_time',
             'stop_at_ratio': 'stop_seed_at_ratio',
+            'stop_at_seed_time': 'stop_seed_at_seed_time',
+            'stop_idle_time': 'stop_seed_idle_time',
             'stop_ratio': 'stop_seed_ratio',
+            'stop_seed_time': 'stop_seed_time',
             'super_seeding': 'super_seeding',
         }
         for opt_k, conf_k in options_conf_map.items():
@@ -252,6 +254,8 @@ def __init__(self, handle, options, state=None, filename=None, magnet=None):
 
         self.torrent_info = self.handle.get_torrent_info()
         self.has_metadata = self.status.has_metadata
+        # The values decoded from the metadata, cleared when the files change.
+        self._metadata_cache = {}
 
         self.options = TorrentOptions()
         self.options.update(options)
@@ -279,6 +283,8 @@ def __init__(self, handle, options, state=None, filename=None, magnet=None):
         self.waiting_on_folder_rename = []
 
         self.update_status(self.handle.status())
+        # Start from the file priorities applied by libtorrent.
+        self.options['file_priorities'] = self.handle.file_priorities()
         self._create_status_funcs()
         self.set_options(self.options)
         self.update_state()
@@ -290,6 +296,7 @@ def on_metadata_received(self):
         """Process the metadata received alert for this torrent"""
         self.has_metadata = True
         self.torrent_info = self.handle.get_torrent_info()
+        self._metadata_cache.clear()
         if self.options['prioritize_first_last_pieces']:
             self.set_prioritize_first_last_pieces(True)
         self.write_torrentfile()
@@ -316,6 +323,23 @@ def set_options(self, options):
                 else:
                     # Update config options that do not have funcs
                     self.options[key] = value
+                    self.mark_state_changed()
+                    if key in GOAL_OPTIONS:
+                        self.schedule_seed_goals()
+                    elif key == 'name':
+                        component.get('FilterManager').update_index(
+                            self.torrent_id, ['name']
+                        )
+
+    def mark_state_changed(self):
+        """Flag the torrent state to be written by the next state save."""
+        component.get('TorrentManager').mark_state_changed(self.torrent_id)
+
+    def schedule_seed_goals(self):
+        """Check the seeding goals again after a goal option has changed."""
+        torrentmanager = component.get('TorrentManager')
+        if self.torrent_id in torrentmanager.torrents:
+            torrentmanager.seed_goals.schedule(self.torrent_id)
 
     def get_options(self):
         """Get the torrent options.
@@ -342,6 +366,7 @@ def set_max_connections(self, max_connections):
             max_connections = 2
 
         self.options['max_connections'] = max_connections
+        self.mark_state_changed()
         self.handle.set_max_connections(max_connections)
 
     def set_max_upload_slots(self, max_slots):
@@ -351,6 +376,7 @@ def set_max_upload_slots(self, max_slots):
             max_slots (int): Maximum upload slots
         """
         self.options['max_upload_slots'] = max_slots
+        self.mark_state_changed()
         self.handle.set_max_uploads(max_slots)
 
     def set_max_upload_speed(self, m_up_speed):
@@ -360,6 +386,7 @@ def set_max_upload_speed(self, m_up_speed):
             m_up_speed (float): Maximum upload speed in KiB/s.
         """
         self.options['max_upload_speed'] = m_up_speed
+        self.mark_state_changed()
         if m_up_speed < 0:
             value = -1
         else:
@@ -373,6 +400,7 @@ def set_max_download_speed(self, m_down_speed):
             m_up_speed (float): Maximum download speed in KiB/s.
         """
         self.options['max_download_speed'] = m_down_speed
+        self.mark_state_changed()
         if m_down_speed < 0:
             value = -1
         else:
@@ -395,6 +423,7 @@ def set_prioritize_first_last_pieces(self, prioritize):
             return
 
         self.options['prioritize_first_last_pieces'] = prioritize
+        self.mark_state_changed()
         if not prioritize:
             # If we are turning off this option, call set_file_priorities to
             # reset all the piece priorities
@@ -435,6 +464,7 @@ def set_sequential_download(self, set_sequencial):
             set_sequencial (bool): Enable sequencial downloading.
         """
         self.options['sequential_download'] = set_sequencial
+        self.mark_state_changed()
         self.handle.set_sequential_download(set_sequencial)
 
     def set_auto_managed(self, auto_managed):
@@ -444,6 +474,7 @@ def set_auto_managed(self, auto_managed):
             auto_managed (bool): Enable auto managed.
         """
         self.options['auto_managed'] = auto_managed
+        self.mark_state_changed()
         if not (self.status.paused and not self.status.auto_managed):
             self.handle.auto_managed(auto_managed)
             self.update_state()
@@ -455,6 +486,7 @@ def set_super_seeding(self, super_seeding):
             super_seeding (bool): Enable super seeding.
         """
         self.options['super_seeding'] = super_seeding
+        self.mark_state_changed()
         self.handle.super_seeding(super_seeding)
 
     def set_stop_ratio(self, stop_ratio):
@@ -464,6 +496,8 @@ def set_stop_ratio(self, stop_ratio):
             stop_ratio (float): The seeding ratio.
         """
         self.options['stop_ratio'] = stop_ratio
+        self.mark_state_changed()
+        self.schedule_seed_goals()
 
     def set_stop_at_ratio(self, stop_at_ratio):
         """Stop the torrent when it has reached stop_ratio.
@@ -472,6 +506,8 @@ def set_stop_at_ratio(self, stop_at_ratio):
             stop_at_ratio (bool): Stop the torrent.
         """
         self.options['stop_at_ratio'] = stop_at_ratio
+        self.mark_state_changed()
+        self.schedule_seed_goals()
 
     def set_remove_at_ratio(self, remove_at_ratio):
         """Remove the torrent when it has reached the stop_ratio.
@@ -480,6 +516,7 @@ def set_remove_at_ratio(self, remove_at_ratio):
             remove_at_ratio (bool): Remove the torrent.
         """
         self.options['remove_at_ratio'] = remove_at_ratio
+        self.mark_state_changed()
 
     def set_move_completed(self, move_completed):
         """Set whether to move the torrent when downloading has finished.
@@ -489,6 +526,7 @@ def set_move_completed(self, move_completed):
 
         """
         self.options['move_completed'] = move_completed
+        self.mark_state_changed()
 
     def set_move_completed_path(self, move_completed_path):
         """Set the path to move torrent to when downloading has finished.
@@ -497,6 +535,7 @@ def set_move_completed_path(self, move_completed_path):
             move_completed_path (str): The move path.
         """
         self.options['move_completed_path'] = move_completed_path
+        self.mark_state_changed()
 
     def set_file_priorities(self, file_priorities):
         """Sets the file priotities.
@@ -512,7 +551,13 @@ def set_file_priorities(self, file_priorities):
                 'Setting %s file priorities to: %s', self.torrent_id, file_priorities
             )
 
-        if file_priorities and len(file_priorities) == len(self.get_files()):
+        if (
+            file_priorities
+            and self.torrent_info
+            and len(file_priorities) == self.torrent_info.num_files()
+        ):
+            # libtorrent applies the priorities async and the file_prio alert
+            # syncs them back, so store them as set until then.
             self.handle.prioritize_files(file_priorities)
         else:
             log.debug('Unable to set new file priorities.')
@@ -528,7 +573,8 @@ def set_file_priorities(self, file_priorities):
                     break
 
         # Store the priorities.
-        self.options['file_priorities'] = file_priorities
+        self.options['file_priorities'] = list(file_priorities)
+        self.mark_state_changed()
 
         # Set the first/last priorities if needed.
         if self.options['prioritize_first_last_pieces']:
@@ -542,6 +588,7 @@ def set_save_path(self, download_location):
     def set_download_location(self, download_location):
         """The location for downloading torrent data."""
         self.options['download_location'] = download_location
+        self.mark_state_changed()
 
     def set_owner(self, account):
         """Sets the owner of this torrent.
@@ -556,6 +603,8 @@ def set_owner(self, account):
 
         if self.rpcserver.get_session_auth_level() == AUTH_LEVEL_ADMIN:
             self.options['owner'] = account
+            self.mark_state_changed()
+            component.get('FilterManager').update_index(self.torrent_id, ['owner'])
 
     # End Options methods #
 
@@ -568,6 +617,8 @@ def set_trackers(self, trackers=None):
         if trackers is None:
             self.trackers = [tracker for tracker in self.handle.trackers()]
             self.tracker_host = None
+            self.mark_state_changed()
+            self.update_tracker_registry()
             return
 
         if log.isEnabledFor(logging.DEBUG):
@@ -588,11 +639,19 @@ def set_trackers(self, trackers=None):
                 log.debug(' [tier %s]: %s', tracker['tier'], tracker['url'])
         # Set the tracker list in the torrent object
         self.trackers = trackers
+        self.mark_state_changed()
+        self.update_tracker_registry()
         if len(trackers) > 0:
             # Force a re-announce if there is at least 1 tracker
             self.force_reannounce()
         self.tracker_host = None
 
+    def update_tracker_registry(self):
+        """Update the tracker metrics after the trackers have changed."""
+        torrentmanager = component.get('TorrentManager')
+        if self.torrent_id in torrentmanager.torrents:
+            torrentmanager.tracker_registry.set_trackers(self.torrent_id, self.trackers)
+
     def set_tracker_status(self, status):
         """Sets the tracker status.
 
@@ -766,8 +825,9 @@ def get_files(self):
         if not self.has_metadata:
             return []
 
-        files = self.torrent_info.files()
-        return convert_lt_files(files)
+        return self._get_metadata(
+            'files', lambda: convert_lt_files(self.torrent_info.files())
+        )
 
     def get_orig_files(self):
         """Get the original filenames of files in this torrent.
@@ -779,8 +839,36 @@ def get_orig_files(self):
         if not self.has_metadata:
             return []
 
-        files = self.torrent_info.orig_files()
-        return convert_lt_files(files)
+        return self._get_metadata(
+            'orig_files', lambda: convert_lt_files(self.torrent_info.orig_files())
+        )
+
+    def _get_metadata(self, key, get_value):
+        """Get a value decoded from the metadata, decoding it only once.
+
+        Note:
+            The cached value is shared by the callers so must not be modified.
+
+        """
+        try:
+            return self._metadata_cache[key]
+        except KeyError:
+            value = self._metadata_cache[key] = get_value()
+            return value
+
+    def _get_info_string(self, key):
+        """Get the decoded comment or creator string from the metadata."""
+        if not self.has_metadata:
+            return ''
+        return self._get_metadata(
+            key, lambda: decode_bytes(getattr(self.torrent_info, key)())
+        )
+
+    def on_file_renamed(self):
+        """Update the torrent info and the cached files after a file is renamed."""
+        self.torrent_info = self.handle.get_torrent_info()
+        self._metadata_cache.pop('files', None)
+        self._metadata_cache.pop('name', None)
 
     def get_peers(self):
         """Get the peers for this torrent.
@@ -850,7 +938,7 @@ def get_queue_position(self):
 
     def get_file_priorities(self):
         """Return the file priorities"""
-        if not self.handle.has_metadata():
+        if not self.has_metadata:
             return []
 
         if not self.options['file_priorities']:
@@ -859,6 +947,11 @@ def get_file_priorities(self):
 
         return self.options['file_priorities']
 
+    def sync_file_priorities(self):
+        """Update the file priorities with those applied by libtorrent."""
+        self.options['file_priorities'] = self.handle.file_priorities()
+        self.mark_state_changed()
+
     def get_file_progress(self):
         """Calculates the file progress as a percentage.
 
@@ -890,26 +983,9 @@ def get_tracker_host(self):
             tracker = self.trackers[0]['url']
 
         if tracker:
-            url = urlparse(tracker.replace('udp://', 'http://'))
-            if hasattr(url, 'hostname'):
-                host = url.hostname or 'DHT'
-                # Check if hostname is an IP address and just return it if that's the case
-                try:
-                    socket.inet_aton(host)
-                except socket.error:
-                    pass
-                else:
-                    # This is an IP address because an exception wasn't raised
-                    return url.hostname
-
-                parts = host.split('.')
-                if len(parts) > 2:
-                    if parts[-2] in ('co', 'com', 'net', 'org') or parts[-1] == 'uk':
-                        host = '.'.join(parts[-3:])
-                    else:
-                        host = '.'.join(parts[-2:])
-                self.tracker_host = host
-                return host
+            tracker_registry = component.get('TorrentManager').tracker_registry
+            self.tracker_host = tracker_registry.get_host(tracker)
+            return self.tracker_host
         return ''
 
     def get_magnet_uri(self):
@@ -932,8 +1008,7 @@ def get_name(self):
 
         if self.has_metadata:
             # Use the top-level folder as torrent name.
-            filename = decode_bytes(self.torrent_info.file_at(0).path)
-            name = filename.replace('\\', '/', 1).split('/', 1)[0]
+            name = self._get_metadata('name', self._get_top_level_name)
         else:
             name = decode_bytes(self.handle.name())
 
@@ -942,6 +1017,10 @@ def get_name(self):
 
         return name
 
+    def _get_top_level_name(self):
+        filename = decode_bytes(self.torrent_info.file_at(0).path)
+        return filename.replace('\\', '/', 1).split('/', 1)[0]
+
     def get_progress(self):
         """The progress of this torrent's current task.
 
@@ -970,6 +1049,26 @@ def get_size(files, path):
 
         return progress
 
+    def get_check_queue(self):
+        """The position of the torrent in the recheck queue, -1 if not queued."""
+        check_scheduler = component.get('TorrentManager').check_scheduler
+        return check_scheduler.get_position(self.torrent_id)
+
+    def get_check_eta(self):
+        """The estimated seconds until the recheck is finished, -1 if unknown."""
+        return component.get('TorrentManager').check_scheduler.get_eta(self.torrent_id)
+
+    def get_move_queue(self):
+        """The position of the torrent in the storage move queue, -1 if not queued."""
+        move_scheduler = component.get('TorrentManager').move_scheduler
+        return move_scheduler.get_position(self.torrent_id)
+
+    def get_move_progress(self):
+        """The progress percentage of the storage move, 0 unless moving."""
+        if self.state != 'Moving':
+            return 0.0
+        return self.get_progress()
+
     def get_time_since_transfer(self):
         """The time since either upload/download from peers"""
         time_since = (self.status.time_since_download, self.status.time_since_upload)
@@ -978,7 +1077,9 @@ def get_time_since_transfer(self):
         except ValueError:
             return -1
 
-    def get_status(self, keys, diff=False, update=False, all_keys=False):
+    def get_status(
+        self, keys, diff=False, update=False, all_keys=False, base_status=None
+    ):
         """Returns the status of the torrent based on the keys provided
 
         Args:
@@ -987,6 +1088,8 @@ def get_status(self, keys, diff=False, update=False, all_keys=False):
                 call to get_status based on the session_id
             update (bool): If True the status will be updated from libtorrent
                 if False, the cached values will be returned
+            base_status (dict): Status values already gathered for this torrent,
+                e.g. from the TorrentManager status table, to add the keys to
 
         Returns:
             dict: a dictionary of the status keys and their values
@@ -997,7 +1100,7 @@ def get_status(self, keys, diff=False, update=False, all_keys=False):
         if all_keys:
             keys = list(self.status_funcs)
 
-        status_dict = {}
+        status_dict = {} if base_status is None else base_status
 
         for key in keys:
             status_dict[key] = self.status_funcs[key]()
@@ -1029,10 +1132,7 @@ def update_status(self, status):
             status (libtorrent.torrent_status): a libtorrent torrent status
         """
         self.status = status
-        # Ensure that the file_priorities are kept in sync with libtorrent.
-        # We do this here as file_priorities is async and can't call it
-        # immediately after setting priorities.
-        self.options['file_priorities'] = self.handle.file_priorities()
+        component.get('TorrentManager').status_table.update(self.torrent_id, status)
 
     def _create_status_funcs(self):
         """Creates the functions for getting torrent status"""
@@ -1091,8 +1191,12 @@ def _create_status_funcs(self):
             ),
             'seed_rank': lambda: self.status.seed_rank,
             'state': lambda: self.state,
+            'stop_at_idle_time': lambda: self.options['stop_at_idle_time'],
             'stop_at_ratio': lambda: self.options['stop_at_ratio'],
+            'stop_at_seed_time': lambda: self.options['stop_at_seed_time'],
+            'stop_idle_time': lambda: self.options['stop_idle_time'],
             'stop_ratio': lambda: self.options['stop_ratio'],
+            'stop_seed_time': lambda: self.options['stop_seed_time'],
             'time_added': lambda: self.status.added_time,
             'total_done': lambda: self.status.total_done,
             'total_payload_download': lambda: self.status.total_payload_download,
@@ -1108,12 +1212,8 @@ def _create_status_funcs(self):
             'trackers': lambda: self.trackers,
             'tracker_status': lambda: self.tracker_status,
             'upload_payload_rate': lambda: self.status.upload_payload_rate,
-            'comment': lambda: decode_bytes(self.torrent_info.comment())
-            if self.has_metadata
-            else '',
-            'creator': lambda: decode_bytes(self.torrent_info.creator())
-            if self.has_metadata
-            else '',
+            'comment': lambda: self._get_info_string('comment'),
+            'creator': lambda: self._get_info_string('creator'),
             'num_files': lambda: self.torrent_info.num_files()
             if self.has_metadata
             else 0,
@@ -1134,11 +1234,16 @@ def _create_status_funcs(self):
             'is_seed': lambda: self.status.is_seeding,
             'peers': self.get_peers,
             'queue': lambda: self.status.queue_position,
+            'check_queue': self.get_check_queue,
+            'check_eta': self.get_check_eta,
+            'move_queue': self.get_move_queue,
+            'move_progress': self.get_move_progress,
             'ratio': self.get_ratio,
             'completed_time': lambda: self.status.completed_time,
             'last_seen_complete': lambda: self.status.last_seen_complete,
             'name': self.get_name,
             'pieces': self._get_pieces_info,
+            'pieces_rle': self._get_pieces_rle,
             'seed_mode': lambda: self.status.seed_mode,
             'super_seeding': lambda: self.status.super_seeding,
             'time_since_download': lambda: self.status.time_since_download,
@@ -1186,6 +1291,23 @@ def resume(self):
             and self.get_ratio() >= self.options['stop_ratio']
         ):
             log.debug('Resume skipped for torrent as it has reached "stop_seed_ratio".')
+        elif (
+            self.status.is_finished
+            and self.options['stop_at_seed_time']
+            and self.status.seeding_time >= self.options['stop_seed_time'] * 60
+        ):
+            log.debug('Resume skipped for torrent as it has reached "stop_seed_time".')
+        elif (
+            self.status.is_finished
+            and self.options['stop_at_idle_time']
+            and (
+                self.status.time_since_upload
+                if self.status.time_since_upload >= 0
+                else self.status.seeding_time
+            )
+            >= self.options['stop_idle_time'] * 60
+        ):
+            log.debug('Resume skipped for torrent as it has reached "stop_idle_time".')
         else:
             # Check if torrent was originally being auto-managed.
             if self.options['auto_managed']:
@@ -1221,11 +1343,14 @@ def connect_peer(self, peer_ip, peer_port):
     def move_storage(self, dest):
         """Move a torrent's storage location
 
+        The move is queued and started by the move scheduler once the
+        devices it reads from and writes to have a free move slot.
+
         Args:
             dest (str): The destination folder for the torrent data
 
         Returns:
-            bool: True if successful, otherwise False
+            bool: True if the move was queued, otherwise False
 
         """
         dest = decode_bytes(dest)
@@ -1243,6 +1368,24 @@ def move_storage(self, dest):
                 )
                 return False
 
+        component.get('TorrentManager').move_scheduler.add_move(
+            self.torrent_id,
+            self.options['download_location'],
+            dest,
+            self.status.total_done,
+        )
+        return True
+
+    def start_move_storage(self, dest):
+        """Start moving the storage in libtorrent, called by the move scheduler.
+
+        Args:
+            dest (str): The destination folder for the torrent data
+
+        Returns:
+            bool: True if successful, otherwise False
+
+        """
         try:
             # lt needs utf8 byte-string. Otherwise if wstrings enabled, unicode string.
             # Keyword argument flags=2 (dont_replace) dont overwrite target files but delete source.
@@ -1309,6 +1452,7 @@ def write_file(filepath, filedump):
         if self.config['copy_torrent_file']:
             if not self.filename:
                 self.filename = self.get_name() + '.torrent'
+                self.mark_state_changed()
             filepath = os.path.join(self.config['torrentfiles_location'], self.filename)
             write_file(filepath, filedump)
 
@@ -1352,7 +1496,27 @@ def scrape_tracker(self):
         return True
 
     def force_recheck(self):
-        """Forces a recheck of the torrent's pieces"""
+        """Forces a recheck of the torrent's pieces
+
+        The recheck is queued and started by the check scheduler once the
+        device of the download location has a free check slot.
+
+        Returns:
+            bool: True, the recheck is queued.
+
+        """
+        component.get('TorrentManager').check_scheduler.add_check(
+            self.torrent_id, self.options['download_location'], self.status.total_wanted
+        )
+        return True
+
+    def start_recheck(self):
+        """Start the recheck in libtorrent, called by the check scheduler.
+
+        Returns:
+            bool: True if the recheck was started.
+
+        """
         if self.forced_error:
             self.forcing_recheck_paused = self.forced_error.was_paused
             self.clear_forced_error_state(update_state=False)
@@ -1480,27 +1644,29 @@ def cleanup_prev_status(self):
     def _get_pieces_info(self):
         """Get the pieces for this torrent."""
         if not self.has_metadata or self.status.is_seeding:
-            pieces = None
-        else:
-            pieces = []
-            for piece, avail_piece in zip(
-                self.status.pieces, self.handle.piece_availability()
-            ):
-                if piece:
-                    pieces.append(3)  # Completed.
-                elif avail_piece:
-                    pieces.append(
-                        1
-                    )  # Available, just not downloaded nor being downloaded.
-                else:
-                    pieces.append(
-                        0
-                    )  # Missing, no known peer with piece, or not asked for yet.
-
-            for peer_info in self.handle.get_peer_info():
-                if peer_info.downloading_piece_index >= 0:
-                    pieces[
-                        peer_info.downloading_piece_index
-                    ] = 2  # Being downloaded from peer.
+            return None
+        return list(self._iter_piece_states())
 
-        return pieces
+    def _get_pieces_rle(self):
+        """Get the pieces for this torrent as (state, count) runs."""
+        if not self.has_metadata or self.status.is_seeding:
+            return None
+        return encode_pieces_rle(self._iter_piece_states())
+
+    def _iter_piece_states(self):
+        downloading = {
+            peer_info.downloading_piece_index
+            for peer_info in self.handle.get_peer_info()
+            if peer_info.downloading_piece_index >= 0
+        }
+        for index, (piece, avail_piece) in enumerate(
+            zip(self.status.pieces, self.handle.piece_availability())
+        ):
+            if index in downloading:
+                yield 2  # Being downloaded from peer.
+            elif piece:
+                yield 3  # Completed.
+            elif avail_piece:
+                yield 1  # Available, just not downloaded nor being downloaded.
+            else:
+                yield 0  # Missing, no known peer with piece, or not asked for yet.
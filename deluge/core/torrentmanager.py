@@ -27,11 +27,22 @@
 from deluge.common import archive_files, decode_bytes, get_magnet_info, is_magnet
 from deluge.configmanager import ConfigManager, get_config_dir
 from deluge.core.authmanager import AUTH_LEVEL_ADMIN
+from deluge.core.checkscheduler import CheckScheduler
+from deluge.core.deletionqueue import DeletionQueue
+from deluge.core.metrics import Summary
+from deluge.core.movescheduler import MoveScheduler
+from deluge.core.resumedatastore import ResumeDataStore
+from deluge.core.seedgoals import SeedGoals
+from deluge.core.statejournal import StateJournal
+from deluge.core.statusrefresher import StatusRefresher
+from deluge.core.statustable import StatusTable
+from deluge.core.trackerregistry import TrackerRegistry
 from deluge.core.torrent import Torrent, TorrentOptions, sanitize_filepath
 from deluge.error import AddTorrentError, InvalidTorrentError
 from deluge.event import (
     ExternalIPEvent,
     PreTorrentRemovedEvent,
+    SessionLoadProgressEvent,
     SessionStartedEvent,
     TorrentAddedEvent,
     TorrentFileCompletedEvent,
@@ -39,6 +50,8 @@
     TorrentFinishedEvent,
     TorrentRemovedEvent,
     TorrentResumedEvent,
+    TorrentsAddedEvent,
+    TorrentsRemovedEvent,
 )
 
 log = logging.getLogger(__name__)
@@ -87,6 +100,10 @@ def __init__(
         shared=False,
         super_seeding=False,
         name=None,
+        stop_at_seed_time=False,
+        stop_seed_time=1440.0,
+        stop_at_idle_time=False,
+        stop_idle_time=120.0,
     ):
         # Build the class atrribute list from args
         for key, value in locals().items():
@@ -150,12 +167,20 @@ def __init__(self):
         if not os.path.exists(self.state_dir):
             os.makedirs(self.state_dir)
         self.temp_file = os.path.join(self.state_dir, '.safe_state_check')
+        self.state_journal = StateJournal(
+            os.path.join(self.state_dir, 'torrents.journal')
+        )
 
         # Create the torrents dict { torrent_id: Torrent }
         self.torrents = {}
+        # Checks the seeding goals of the torrents when they are due
+        self.seed_goals = SeedGoals(self.torrents, self.on_seed_goals_reached)
         self.queued_torrents = set()
         self.is_saving_state = False
+        self.is_loading_state = False
         self.save_resume_data_file_lock = defer.DeferredLock()
+        # The durations of the state and resume data saves for the metrics
+        self.save_durations = {'state': Summary(), 'resume_data': Summary()}
         self.torrents_loading = {}
         self.prefetching_metadata = {}
 
@@ -165,16 +190,41 @@ def __init__(self):
 
         # Keep track of torrents finished but moving storage
         self.waiting_on_finish_moving = []
+        # Starts the storage moves a few at a time per device
+        self.move_scheduler = MoveScheduler(self._start_move_storage)
+        # Starts the forced rechecks a few at a time per device
+        self.check_scheduler = CheckScheduler(self._start_recheck)
 
-        # Keeps track of resume data
-        self.resume_data = {}
+        # Keeps track of resume data, only recently used entries are in memory
+        self.resume_data = ResumeDataStore(os.path.join(self.state_dir, 'resume'))
 
-        self.torrents_status_requests = []
-        self.status_dict = {}
-        self.last_state_update_alert_ts = 0
+        # The data of removed torrents is deleted by the deletion queue once
+        # libtorrent has removed the torrent { torrent_id: (name, save_path, paths) }
+        self.removing_data = {}
+        self.data_deletion = DeletionQueue()
 
-        # Keep the previous saved state
-        self.prev_saved_state = None
+        # Shares the post_torrent_updates calls between the status requests.
+        self.status_refresher = StatusRefresher(self.session)
+        self.status_dict = {}
+        # Numeric status values of all torrents, refreshed by state updates.
+        self.status_table = StatusTable()
+        # The tracker hosts of all torrents with their announce metrics.
+        self.tracker_registry = TrackerRegistry()
+
+        # The number of torrents added at once when loading the state
+        self.load_state_batch_size = 100
+        # The number of torrents added at once by add_bulk and the torrent_ids
+        # being added whose TorrentAddedEvent is superseded by TorrentsAddedEvent.
+        self.bulk_add_batch_size = 100
+        self.bulk_adding = set()
+
+        # Keep the previous saved TorrentStates { torrent_id: TorrentState }
+        self.prev_saved_states = {}
+        # The torrent_ids whose state is to be written or removed by the next save.
+        self.state_changed = set()
+        self.state_removed = set()
+        # True if the queue order is to be written by the next save.
+        self.queue_changed = False
 
         # Register set functions
         set_config_keys = [
@@ -182,6 +232,8 @@ def __init__(self):
             'max_upload_slots_per_torrent',
             'max_upload_speed_per_torrent',
             'max_download_speed_per_torrent',
+            'max_moves_per_device',
+            'max_checks_per_device',
         ]
 
         for config_key in set_config_keys:
@@ -191,7 +243,6 @@ def __init__(self):
         # Register alert functions
         alert_handles = [
             'external_ip_alert',
-            'performance_alert',
             'add_torrent_alert',
             'metadata_received_alert',
             'torrent_finished_alert',
@@ -205,6 +256,7 @@ def __init__(self):
             'file_renamed_alert',
             'file_error_alert',
             'file_completed_alert',
+            'file_prio_alert',
             'storage_moved_alert',
             'storage_moved_failed_alert',
             'state_update_alert',
@@ -212,6 +264,7 @@ def __init__(self):
             'save_resume_data_alert',
             'save_resume_data_failed_alert',
             'fastresume_rejected_alert',
+            'torrent_removed_alert',
         ]
 
         for alert_handle in alert_handles:
@@ -234,6 +287,10 @@ def start(self):
         with open(self.temp_file, 'a'):
             os.utime(self.temp_file, None)
 
+        component.get('EventManager').register_event_handler(
+            'TorrentStateChangedEvent', self.on_torrent_state_changed
+        )
+
         # Try to load the state from file
         self.load_state()
 
@@ -254,39 +311,60 @@ def stop(self):
         if self.prev_status_cleanup_loop.running:
             self.prev_status_cleanup_loop.stop()
 
+        self.seed_goals.stop()
+        self.status_refresher.stop()
+        component.get('EventManager').deregister_event_handler(
+            'TorrentStateChangedEvent', self.on_torrent_state_changed
+        )
+
         # Save state on shutdown
         yield self.save_state()
 
         self.session.pause()
 
         result = yield self.save_resume_data(flush_disk_cache=True)
+
+        # Finish deleting the data of removed torrents before exiting.
+        for torrent_id, (name, save_path, paths) in self.removing_data.items():
+            self.data_deletion.add(torrent_id, name, save_path, paths)
+        self.removing_data.clear()
+        yield self.data_deletion.wait()
+
         # Remove the temp_file to signify successfully saved state
         if result and os.path.isfile(self.temp_file):
             os.remove(self.temp_file)
 
-    def update(self):
-        for torrent_id, torrent in self.torrents.items():
-            # XXX: Should the state check be those that _can_ be stopped at ratio
-            if torrent.options['stop_at_ratio'] and torrent.state not in (
-                'Checking',
-                'Allocating',
-                'Paused',
-                'Queued',
-            ):
-                # If the global setting is set, but the per-torrent isn't...
-                # Just skip to the next torrent.
-                # This is so that a user can turn-off the stop at ratio option on a per-torrent basis
-                if not torrent.options['stop_at_ratio']:
-                    continue
-                if (
-                    torrent.get_ratio() >= torrent.options['stop_ratio']
-                    and torrent.is_finished
-                ):
-                    if torrent.options['remove_at_ratio']:
-                        self.remove(torrent_id)
-                        break
-                    if not torrent.handle.status().paused:
-                        torrent.pause()
+    def on_seed_goals_reached(self, torrents):
+        """Pause, or remove, the torrents that reached a seeding goal."""
+        remove_ids = []
+        for torrent in torrents:
+            if torrent.options['remove_at_ratio']:
+                remove_ids.append(torrent.torrent_id)
+            elif not torrent.handle.status().paused:
+                torrent.pause()
+        if remove_ids:
+            self.remove_bulk(remove_ids)
+
+    def on_torrent_state_changed(self, torrent_id, state):
+        if torrent_id in self.torrents:
+            self.seed_goals.schedule(torrent_id)
+            self.mark_state_changed(torrent_id)
+
+    def mark_state_changed(self, torrent_id=None):
+        """Flag a torrent state to be written by the next state save.
+
+        Args:
+            torrent_id (str, optional): The torrent_id, if None all the torrents are flagged.
+
+        """
+        if torrent_id is None:
+            self.state_changed.update(self.torrents)
+        elif torrent_id in self.torrents:
+            self.state_changed.add(torrent_id)
+
+    def mark_queue_changed(self):
+        """Flag the queue order to be written by the next state save."""
+        self.queue_changed = True
 
     def __getitem__(self, torrent_id):
         """Return the Torrent with torrent_id.
@@ -312,11 +390,12 @@ def get_torrent_list(self):
             return torrent_ids
 
         current_user = component.get('RPCServer').get_session_user()
-        for torrent_id in torrent_ids[:]:
-            torrent_status = self.torrents[torrent_id].get_status(['owner', 'shared'])
-            if torrent_status['owner'] != current_user and not torrent_status['shared']:
-                torrent_ids.pop(torrent_ids.index(torrent_id))
-        return torrent_ids
+        return [
+            torrent_id
+            for torrent_id in torrent_ids
+            if self.torrents[torrent_id].options['owner'] == current_user
+            or self.torrents[torrent_id].options['shared']
+        ]
 
     def get_torrent_info_from_file(self, filepath):
         """Retrieves torrent_info from the file specified.
@@ -568,7 +647,8 @@ def add_async(
         """Adds a torrent to the torrent manager using libtorrent async add torrent method.
 
         Args:
-            torrent_info (lt.torrent_info, optional): A libtorrent torrent_info object.
+            torrent_info (lt.torrent_info, optional): A libtorrent torrent_info object,
+                if given with filedump it must be the torrent_info of the filedump.
             state (TorrentState, optional): The torrent state.
             options (dict, optional): The options to apply to the torrent on adding.
             save_state (bool, optional): If True save the session state after adding torrent, defaults to True.
@@ -589,7 +669,7 @@ def add_async(
                 'You must specify a valid torrent_info, torrent state or magnet.'
             )
 
-        if filedump:
+        if filedump and not torrent_info:
             try:
                 torrent_info = lt.torrent_info(lt.bdecode(filedump))
             except RuntimeError as ex:
@@ -619,6 +699,20 @@ def add_async(
             raise AddTorrentError('Unable to add torrent to session: %s' % ex)
         return d
 
+    def _cancel_data_deletion(self, torrent):
+        """Keep the data of a removed torrent that is added again to the session."""
+        self.removing_data.pop(torrent.torrent_id, None)
+        if not self.data_deletion.jobs:
+            return
+        filepaths = set()
+        if torrent.has_metadata:
+            save_path = torrent.options['download_location']
+            filepaths = {
+                os.path.abspath(os.path.join(save_path, f['path']))
+                for f in torrent.get_files()
+            }
+        self.data_deletion.cancel(torrent.torrent_id, filepaths)
+
     def _add_torrent_obj(
         self,
         handle,
@@ -638,12 +732,19 @@ def _add_torrent_obj(
         # Create a Torrent object and add to the dictionary.
         torrent = Torrent(handle, options, state, filename, magnet)
         self.torrents[torrent.torrent_id] = torrent
+        if state is None:
+            self.state_changed.add(torrent.torrent_id)
+            self.mark_queue_changed()
+        self.seed_goals.schedule(torrent.torrent_id)
+        self.status_table.add(torrent.torrent_id, torrent.status)
+        self.tracker_registry.set_trackers(torrent.torrent_id, torrent.trackers)
+        self._cancel_data_deletion(torrent)
 
         # Resume AlertManager if paused for adding torrent to libtorrent.
         component.resume('AlertManager')
 
         # Store the orignal resume_data, in case of errors.
-        if resume_data:
+        if resume_data and torrent.torrent_id not in self.resume_data:
             self.resume_data[torrent.torrent_id] = resume_data
 
         # Add to queued torrents set.
@@ -658,7 +759,10 @@ def _add_torrent_obj(
         # Emit torrent_added signal.
         from_state = state is not None
         component.get('EventManager').emit(
-            TorrentAddedEvent(torrent.torrent_id, from_state)
+            TorrentAddedEvent(torrent.torrent_id, from_state),
+            superseded_by=(
+                'TorrentsAddedEvent' if torrent.torrent_id in self.bulk_adding else None
+            ),
         )
 
         if log.isEnabledFor(logging.DEBUG):
@@ -682,6 +786,126 @@ def _add_torrent_obj(
 
         return torrent
 
+    @defer.inlineCallbacks
+    def add_bulk(self, torrents):
+        """Add many torrents to the session in pipelined batches.
+
+        The torrent files of the next batch are validated and parsed in worker
+        threads while the current batch is added. The state is saved once all
+        the torrents are added.
+
+        Args:
+            torrents (list of dict): The torrents to add, each with either `filedump`
+                (the bencoded torrent file) or `magnet`, and optional `filename`
+                and `options`.
+
+        Returns:
+            Deferred: Fires with a list of (True, torrent_id) or (False, error message)
+                for each torrent, in the order given.
+
+        Emits:
+            TorrentAddedEvent: For each torrent, except to clients interested in
+                TorrentsAddedEvent.
+            TorrentsAddedEvent: Once with the torrent_ids of the added torrents.
+
+        """
+        batch_size = self.bulk_add_batch_size
+        batches = [
+            list(range(index, min(index + batch_size, len(torrents))))
+            for index in range(0, len(torrents), batch_size)
+        ]
+        results = [None] * len(torrents)
+        parsing = self._parse_bulk(torrents, batches[0]) if batches else None
+        for batch_index, batch in enumerate(batches):
+            parsed = yield parsing
+            if batch_index + 1 < len(batches):
+                parsing = self._parse_bulk(torrents, batches[batch_index + 1])
+
+            pending = []
+            for index, (success, result) in zip(batch, parsed):
+                if success:
+                    pending.append((index, result[0], result[1]))
+                else:
+                    results[index] = (False, decode_bytes(str(result.value)))
+
+            while pending:
+                # A duplicate torrent is added after the first has been added.
+                batch_ids = set()
+                deferreds = []
+                later = []
+                for index, torrent_id, torrent_info in pending:
+                    if torrent_id in batch_ids:
+                        later.append((index, torrent_id, torrent_info))
+                        continue
+                    batch_ids.add(torrent_id)
+                    torrent = torrents[index]
+                    try:
+                        d = self.add_async(
+                            torrent_info=torrent_info,
+                            options=torrent.get('options'),
+                            save_state=False,
+                            filedump=torrent.get('filedump'),
+                            filename=torrent.get('filename'),
+                            magnet=torrent.get('magnet'),
+                        )
+                    except AddTorrentError as ex:
+                        d = defer.fail(ex)
+                    else:
+                        self.bulk_adding.add(torrent_id)
+                    deferreds.append((index, torrent_id, d))
+
+                added = yield DeferredList(
+                    [d for dummy, dummy, d in deferreds], consumeErrors=True
+                )
+                for (index, torrent_id, dummy), (success, result) in zip(
+                    deferreds, added
+                ):
+                    self.bulk_adding.discard(torrent_id)
+                    if success:
+                        results[index] = (True, result)
+                    else:
+                        log.warning('Error when adding torrent: %s', result.value)
+                        results[index] = (False, decode_bytes(str(result.value)))
+                pending = later
+
+        torrent_ids = [result for success, result in results if success]
+        if torrent_ids:
+            self.save_state()
+            component.get('EventManager').emit(TorrentsAddedEvent(torrent_ids))
+        defer.returnValue(results)
+
+    def _parse_bulk(self, torrents, indexes):
+        """Validate and parse the torrents at the indexes in worker threads.
+
+        Returns:
+            Deferred: Fires with a DeferredList result of (torrent_id, torrent_info)
+                for the torrents, the torrent_info is None for a magnet.
+
+        """
+
+        def parse(torrent):
+            magnet = torrent.get('magnet')
+            if magnet:
+                magnet_info = get_magnet_info(magnet)
+                if not magnet_info:
+                    raise AddTorrentError(
+                        'Unable to add magnet, invalid magnet info: %s' % magnet
+                    )
+                return magnet_info['info_hash'], None
+
+            try:
+                torrent_info = lt.torrent_info(lt.bdecode(torrent.get('filedump')))
+            except (RuntimeError, TypeError) as ex:
+                raise AddTorrentError(
+                    'Unable to add torrent, decoding filedump failed: %s' % ex
+                )
+            return str(torrent_info.info_hash()), torrent_info
+
+        return DeferredList(
+            [threads.deferToThread(parse, torrents[index]) for index in indexes],
+            consumeErrors=True,
+        )
+
     def add_async_callback(
         self,
         handle,
@@ -724,16 +948,116 @@ def remove(self, torrent_id, remove_data=False, save_state=True):
         except KeyError:
             raise InvalidTorrentError('torrent_id %s not in session.' % torrent_id)
 
-        torrent_name = torrent.get_status(['name'])['name']
-
         # Emit the signal to the clients
         component.get('EventManager').emit(PreTorrentRemovedEvent(torrent_id))
 
+        torrent_name = self._detach(torrent, remove_data)
+        if torrent_name is None:
+            return False
+
+        if save_state:
+            self.save_state()
+
+        # Emit the signal to the clients
+        component.get('EventManager').emit(TorrentRemovedEvent(torrent_id))
+        log.info(
+            'Torrent %s removed by user: %s',
+            torrent_name,
+            component.get('RPCServer').get_session_user(),
+        )
+        return True
+
+    def remove_bulk(self, torrent_ids, remove_data=False):
+        """Remove many torrents from the session, saving the state once.
+
+        Args:
+            torrent_ids (list): The torrent IDs to remove.
+            remove_data (bool, optional): If True, queue the downloaded data
+                for deletion, defaults to False.
+
+        Returns:
+            list: The (torrent_id, error message) tuples of the torrents not removed.
+
+        Emits:
+            PreTorrentRemovedEvent: For each torrent about to be removed.
+            TorrentRemovedEvent: For each removed torrent, except to clients
+                interested in TorrentsRemovedEvent.
+            TorrentsRemovedEvent: Once with the torrent_ids of the removed torrents.
+
+        """
+        errors = []
+        torrents = []
+        for torrent_id in torrent_ids:
+            try:
+                torrents.append(self.torrents[torrent_id])
+            except KeyError:
+                errors.append(
+                    (torrent_id, 'torrent_id %s not in session.' % torrent_id)
+                )
+
+        event_manager = component.get('EventManager')
+        for torrent in torrents:
+            event_manager.emit(PreTorrentRemovedEvent(torrent.torrent_id))
+
+        removed = []
+        for torrent in torrents:
+            try:
+                torrent_name = self._detach(torrent, remove_data)
+            except InvalidTorrentError as ex:
+                errors.append((torrent.torrent_id, str(ex)))
+                continue
+            if torrent_name is None:
+                errors.append((torrent.torrent_id, 'Error removing torrent'))
+            else:
+                removed.append(torrent.torrent_id)
+
+        if not removed:
+            return errors
+
+        self.save_state()
+        for torrent_id in removed:
+            event_manager.emit(
+                TorrentRemovedEvent(torrent_id), superseded_by='TorrentsRemovedEvent'
+            )
+        event_manager.emit(TorrentsRemovedEvent(removed))
+        log.info(
+            'Removed %d torrents by user: %s',
+            len(removed),
+            component.get('RPCServer').get_session_user(),
+        )
+        return errors
+
+    def _detach(self, torrent, remove_data):
+        """Remove the torrent from the libtorrent and deluge sessions.
+
+        The downloaded data is not deleted by libtorrent but queued for
+        deletion in the background once libtorrent has released the torrent.
+
+        Returns:
+            str: The torrent name, or None if libtorrent failed to remove it.
+
+        Raises:
+            InvalidTorrentError: If the torrent is not in the queued torrents set.
+
+        """
+        torrent_id = torrent.torrent_id
+        status = torrent.get_status(['name', 'save_path'])
+
         try:
-            self.session.remove_torrent(torrent.handle, 1 if remove_data else 0)
+            self.session.remove_torrent(torrent.handle, 0)
         except RuntimeError as ex:
             log.warning('Error removing torrent: %s', ex)
-            return False
+            return None
+
+        if remove_data and torrent.has_metadata:
+            paths = [f['path'] for f in torrent.get_files()]
+            # The partfile of the pieces of files with do not download priority.
+            paths.append('.%s.parts' % torrent_id)
+            self.removing_data[torrent_id] = (
+                status['name'],
+                status['save_path'],
+                paths,
+            )
 
         # Remove fastresume data if it is exists
         self.resume_data.pop(torrent_id, None)
@@ -756,18 +1080,17 @@ def remove(self, torrent_id, remove_data=False, save_state=True):
 
         # Remove the torrent from deluge's session
         del self.torrents[torrent_id]
-
-        if save_state:
-            self.save_state()
-
-        # Emit the signal to the clients
-        component.get('EventManager').emit(TorrentRemovedEvent(torrent_id))
-        log.info(
-            'Torrent %s removed by user: %s',
-            torrent_name,
-            component.get('RPCServer').get_session_user(),
-        )
-        return True
+        self.state_changed.discard(torrent_id)
+        self.state_removed.add(torrent_id)
+        self.mark_queue_changed()
+        self.seed_goals.unschedule(torrent_id)
+        self.status_table.remove(torrent_id)
+        self.tracker_registry.remove(torrent_id)
+        self.move_scheduler.cancel(torrent_id)
+        self.move_scheduler.on_done(torrent_id)
+        self.check_scheduler.cancel(torrent_id)
+        self.check_scheduler.on_done(torrent_id)
+        return status['name']
 
     def fixup_state(self, state):
         """Fixup an old state by adding missing TorrentState options and assigning default values.
@@ -794,14 +1117,42 @@ def fixup_state(self, state):
         return state
 
     def open_state(self):
-        """Open the torrents.state file containing a TorrentManager state with session torrents.
+        """Open the torrent state journal containing a TorrentManager state with session torrents.
+
+        If there is no journal the state is migrated from the torrents.state file.
+        A journal shard that cannot be loaded is archived and replaced by an
+        empty one, the states in the other shards are kept.
 
         Returns:
             TorrentManagerState: The TorrentManager state.
 
         """
+        state = TorrentManagerState()
+        if self.state_journal.exists():
+            log.info('Loading torrent state journal: %s', self.state_journal.path)
+            states = self.state_journal.load()
+            for index, ex in sorted(self.state_journal.load_errors.items()):
+                filepaths = self.state_journal.shard_filepaths(index)
+                message = 'Unable to load {}: {}'.format(filepaths, ex)
+                log.error(message)
+                archive_files('state', filepaths, message=message)
+                try:
+                    self.state_journal.reset_shard(index)
+                except (OSError, IOError) as ex:
+                    log.error('Unable to reset torrent state shard: %s', ex)
+
+            queue = self.state_journal.load_queue()
+            if queue is not None:
+                positions = {
+                    torrent_id: index for index, torrent_id in enumerate(queue)
+                }
+                for torrent_id, t_state in states.items():
+                    t_state.queue = positions.get(torrent_id, -1)
+            state.torrents = list(states.values())
+            self.prev_saved_states = states
+            return state
+
         torrents_state = os.path.join(self.state_dir, 'torrents.state')
-        state = None
         for filepath in (torrents_state, torrents_state + '.bak'):
             log.info('Loading torrent state: %s', filepath)
             if not os.path.isfile(filepath):
@@ -817,68 +1168,70 @@ def open_state(self):
                     self.archive_state(message)
             else:
                 log.info('Successfully loaded %s', filepath)
+                self._migrate_state(state)
                 break
 
         return state if state else TorrentManagerState()
 
+    def _migrate_state(self, state):
+        """Write the state loaded from a torrents.state file to the journal.
+
+        The torrents.state files are then renamed so they are not loaded again.
+        """
+        states = {t_state.torrent_id: t_state for t_state in state.torrents}
+        log.info('Migrating %d torrent states to journal', len(states))
+        try:
+            self.state_journal.replace(states)
+        except (OSError, IOError, pickle.PicklingError) as ex:
+            log.error('Unable to migrate torrent state to journal: %s', ex)
+            return
+        self.prev_saved_states = states
+
+        torrents_state = os.path.join(self.state_dir, 'torrents.state')
+        for filepath in (torrents_state, torrents_state + '.bak'):
+            if os.path.isfile(filepath):
+                try:
+                    os.rename(filepath, filepath + '.migrated')
+                except OSError as ex:
+                    log.warning('Unable to rename migrated %s: %s', filepath, ex)
+
     def load_state(self):
         """Load all the torrents from TorrentManager state into session.
 
+        The torrents are added in batches of `load_state_batch_size`, with the
+        torrent files of the next batch parsed in worker threads meanwhile.
+        Active downloading torrents are added first and paused torrents last,
+        the queue order is then restored.
+
+        Returns:
+            Deferred: Fires when all torrents are added to the session.
+
         Emits:
+            SessionLoadProgressEvent: Emitted after each batch of torrents is added.
             SessionStartedEvent: Emitted after all torrents are added to the session.
 
         """
         start = datetime.datetime.now()
+        self.is_loading_state = True
         state = self.open_state()
         state = self.fixup_state(state)
+        self.migrate_resume_data_file()
 
         # Reorder the state.torrents list to add torrents in the correct queue order.
         state.torrents.sort(
             key=operator.attrgetter('queue'), reverse=self.config['queue_new_to_top']
         )
-        resume_data = self.load_resume_data_file()
-
-        deferreds = []
-        for t_state in state.torrents:
-            # Populate the options dict from state
-            options = TorrentOptions()
-            for option in options:
-                try:
-                    options[option] = getattr(t_state, option)
-                except AttributeError:
-                    pass
-            # Manually update unmatched attributes
-            options['download_location'] = t_state.save_path
-            options['pre_allocate_storage'] = t_state.storage_mode == 'allocate'
-            options['prioritize_first_last_pieces'] = t_state.prioritize_first_last
-            options['add_paused'] = t_state.paused
-
-            magnet = t_state.magnet
-            torrent_info = self.get_torrent_info_from_file(
-                os.path.join(self.state_dir, t_state.torrent_id + '.torrent')
-            )
-
-            try:
-                d = self.add_async(
-                    torrent_info=torrent_info,
-                    state=t_state,
-                    options=options,
-                    save_state=False,
-                    magnet=magnet,
-                    resume_data=resume_data.get(t_state.torrent_id),
-                )
-            except AddTorrentError as ex:
-                log.warning(
-                    'Error when adding torrent "%s" to session: %s',
-                    t_state.torrent_id,
-                    ex,
-                )
-            else:
-                deferreds.append(d)
-
-        deferred_list = DeferredList(deferreds, consumeErrors=False)
+        # Stable sort so the queue order is kept within each group.
+        t_states = sorted(state.torrents, key=lambda t: (t.paused, t.is_finished))
 
         def on_complete(result):
+            self._restore_queue_order(
+                sorted(state.torrents, key=operator.attrgetter('queue'))
+            )
+            # Save the restored queue order and drop the states of the
+            # torrents that failed to load.
+            self.mark_queue_changed()
+            self.state_removed.update(set(self.prev_saved_states) - set(self.torrents))
             log.info(
                 'Finished loading %d torrents in %s',
                 len(state.torrents),
@@ -886,18 +1239,162 @@ def on_complete(result):
             )
             component.get('EventManager').emit(SessionStartedEvent())
 
-        deferred_list.addCallback(on_complete)
+        def on_loaded(result):
+            self.is_loading_state = False
+            return result
+
+        d = self._load_torrents(t_states)
+        d.addBoth(on_loaded)
+        d.addCallback(on_complete)
+        return d
+
+    @defer.inlineCallbacks
+    def _load_torrents(self, t_states):
+        """Add the torrents from their TorrentStates in batches."""
+        batch_size = self.load_state_batch_size
+        batches = [
+            t_states[index : index + batch_size]
+            for index in range(0, len(t_states), batch_size)
+        ]
+        loaded = 0
+        parsing = self._read_torrent_files(batches[0]) if batches else None
+        for index, batch in enumerate(batches):
+            torrent_files = yield parsing
+            if index + 1 < len(batches):
+                parsing = self._read_torrent_files(batches[index + 1])
+
+            deferreds = []
+            for t_state, (torrent_info, resume_data) in zip(batch, torrent_files):
+                d = self._add_from_state(t_state, torrent_info, resume_data)
+                if d:
+                    deferreds.append(d)
+            yield DeferredList(deferreds, consumeErrors=True)
+
+            loaded += len(batch)
+            component.get('EventManager').emit(
+                SessionLoadProgressEvent(loaded, len(t_states))
+            )
+
+    def _read_torrent_files(self, t_states):
+        """Read the torrent files and resume data of the TorrentStates in worker threads.
+
+        Returns:
+            Deferred: Fires with a list of (torrent_info, resume_data) for the TorrentStates.
+
+        """
+
+        def read_torrent_file(t_state):
+            torrent_info = self.get_torrent_info_from_file(
+                os.path.join(self.state_dir, t_state.torrent_id + '.torrent')
+            )
+            return torrent_info, self.resume_data.get(t_state.torrent_id)
+
+        deferreds = [
+            threads.deferToThread(read_torrent_file, t_state) for t_state in t_states
+        ]
+        d = DeferredList(deferreds, consumeErrors=True)
+        d.addCallback(
+            lambda results: [
+                result if success else (None, None) for success, result in results
+            ]
+        )
+        return d
 
-    def create_state(self):
-        """Create a state of all the torrents in TorrentManager.
+    def _add_from_state(self, t_state, torrent_info, resume_data):
+        """Add a torrent from its TorrentState.
+
+        Returns:
+            Deferred: Fires when the torrent is added, None if adding failed.
+
+        """
+        # Populate the options dict from state
+        options = TorrentOptions()
+        for option in options:
+            try:
+                options[option] = getattr(t_state, option)
+            except AttributeError:
+                pass
+        # Manually update unmatched attributes
+        options['download_location'] = t_state.save_path
+        options['pre_allocate_storage'] = t_state.storage_mode == 'allocate'
+        options['prioritize_first_last_pieces'] = t_state.prioritize_first_last
+        options['add_paused'] = t_state.paused
+
+        try:
+            return self.add_async(
+                torrent_info=torrent_info,
+                state=t_state,
+                options=options,
+                save_state=False,
+                magnet=t_state.magnet,
+                resume_data=resume_data,
+            )
+        except AddTorrentError as ex:
+            log.warning(
+                'Error when adding torrent "%s" to session: %s', t_state.torrent_id, ex
+            )
+
+    def _restore_queue_order(self, t_states):
+        """Restore the queue order of the TorrentStates with few queue moves.
+
+        The longest run of torrents at the start, or the end, of the queue
+        already in order is kept, the other torrents are moved to the bottom,
+        or the top, of the queue.
+
+        Args:
+            t_states (list): The TorrentStates in the order they were queued.
+
+        """
+        queued = []
+        for t_state in t_states:
+            torrent = self.torrents.get(t_state.torrent_id)
+            if torrent and t_state.queue is not None and t_state.queue >= 0:
+                position = torrent.get_queue_position()
+                if position >= 0:
+                    queued.append((position, torrent))
+
+        head = 1
+        while head < len(queued) and queued[head][0] > queued[head - 1][0]:
+            head += 1
+        tail = 1
+        while tail < len(queued) and queued[-tail - 1][0] < queued[-tail][0]:
+            tail += 1
+
+        if head >= tail:
+            moves = [
+                torrent.handle.queue_position_bottom for _, torrent in queued[head:]
+            ]
+        else:
+            moves = [
+                torrent.handle.queue_position_top
+                for _, torrent in reversed(queued[: len(queued) - tail])
+            ]
+        for queue_move in moves:
+            try:
+                queue_move()
+            except RuntimeError as ex:
+                log.debug('Unable to restore queue position: %s', ex)
+
+    def create_state(self, torrent_ids=None):
+        """Create a state of the torrents in TorrentManager.
+
+        Args:
+            torrent_ids (list, optional): The torrent_ids to include, all torrents if None.
 
         Returns:
             TorrentManagerState: The TorrentManager state.
 
         """
+        if torrent_ids is None:
+            torrents = list(self.torrents.values())
+        else:
+            torrents = [
+                self.torrents[t_id] for t_id in torrent_ids if t_id in self.torrents
+            ]
+
         state = TorrentManagerState()
         # Create the state for each Torrent and append to the list
-        for torrent in self.torrents.values():
+        for torrent in torrents:
             if self.session.is_paused():
                 paused = torrent.handle.is_paused()
             elif torrent.forced_error:
@@ -920,7 +1417,7 @@ def create_state(self):
                 torrent.options['max_download_speed'],
                 torrent.options['prioritize_first_last_pieces'],
                 torrent.options['sequential_download'],
-                torrent.options['file_priorities'],
+                torrent.get_file_priorities(),
                 torrent.get_queue_position(),
                 torrent.options['auto_managed'],
                 torrent.is_finished,
@@ -934,6 +1431,10 @@ def create_state(self):
                 torrent.options['shared'],
                 torrent.options['super_seeding'],
                 torrent.options['name'],
+                stop_at_seed_time=torrent.options['stop_at_seed_time'],
+                stop_seed_time=torrent.options['stop_seed_time'],
+                stop_at_idle_time=torrent.options['stop_at_idle_time'],
+                stop_idle_time=torrent.options['stop_idle_time'],
             )
             state.torrents.append(torrent_state)
         return state
@@ -942,15 +1443,26 @@ def save_state(self):
         """Run the save state task in a separate thread to avoid blocking main thread.
 
         Note:
-            If a save task is already running, this call is ignored.
+            If a save task is already running, or the state is being loaded,
+            this call is ignored.
 
         """
-        if self.is_saving_state:
+        if self.is_saving_state or self.is_loading_state:
             return defer.succeed(None)
         self.is_saving_state = True
-        d = threads.deferToThread(self._save_state)
-
-        def on_state_saved(arg):
+        changed, self.state_changed = self.state_changed, set()
+        removed, self.state_removed = self.state_removed, set()
+        queue_changed, self.queue_changed = self.queue_changed, False
+        start = time.time()
+        d = threads.deferToThread(self._save_state, changed, removed, queue_changed)
+
+        def on_state_saved(saved):
+            self.save_durations['state'].observe(time.time() - start)
+            if saved is not True:
+                # Retry with the next save, unless changed again since.
+                self.state_changed.update(changed)
+                self.state_removed.update(removed - set(self.torrents))
+                self.queue_changed = self.queue_changed or queue_changed
             self.is_saving_state = False
             if self.save_state_timer.running:
                 self.save_state_timer.reset()
@@ -958,48 +1470,68 @@ def on_state_saved(arg):
         d.addBoth(on_state_saved)
         return d
 
-    def _save_state(self):
-        """Save the state of the TorrentManager to the torrents.state file."""
-        state = self.create_state()
+    def _save_state(self, torrent_ids, removed_ids, queue_changed=False):
+        """Save the changed torrent states of the TorrentManager to the state journal.
 
-        # If the state hasn't changed, no need to save it
-        if self.prev_saved_state == state:
-            return
+        Only the states of the flagged torrents are created and compared with
+        those previously saved. The queue order is saved separately, so the
+        torrents shifted by a queue change are not written.
 
-        filename = 'torrents.state'
-        filepath = os.path.join(self.state_dir, filename)
-        filepath_bak = filepath + '.bak'
-        filepath_tmp = filepath + '.tmp'
+        Args:
+            torrent_ids (set): The torrent_ids flagged as changed.
+            removed_ids (set): The torrent_ids of removed torrents.
+            queue_changed (bool, optional): Save the queue order.
 
-        try:
-            log.debug('Creating the temporary file: %s', filepath_tmp)
-            with open(filepath_tmp, 'wb', 0) as _file:
-                pickle.dump(state, _file, protocol=2)
-                _file.flush()
-                os.fsync(_file.fileno())
-        except (OSError, pickle.PicklingError) as ex:
-            log.error('Unable to save %s: %s', filename, ex)
-            return
+        Returns:
+            bool: False if writing the state journal failed, True otherwise.
 
-        try:
-            log.debug('Creating backup of %s at: %s', filename, filepath_bak)
-            if os.path.isfile(filepath_bak):
-                os.remove(filepath_bak)
-            if os.path.isfile(filepath):
-                os.rename(filepath, filepath_bak)
-        except OSError as ex:
-            log.error('Unable to backup %s to %s: %s', filepath, filepath_bak, ex)
-            return
+        """
+        states = {
+            t_state.torrent_id: t_state
+            for t_state in self.create_state(torrent_ids).torrents
+        }
+
+        changed = {
+            torrent_id: t_state
+            for torrent_id, t_state in states.items()
+            if self.prev_saved_states.get(torrent_id) != t_state
+        }
+        removed = [
+            torrent_id
+            for torrent_id in removed_ids
+            if torrent_id in self.prev_saved_states and torrent_id not in states
+        ]
+        # If the state hasn't changed, no need to save it
+        if not changed and not removed and not queue_changed:
+            return True
 
         try:
-            log.debug('Saving %s to: %s', filename, filepath)
-            os.rename(filepath_tmp, filepath)
-            self.prev_saved_state = state
-        except OSError as ex:
-            log.error('Failed to set new state file %s: %s', filepath, ex)
-            if os.path.isfile(filepath_bak):
-                log.info('Restoring backup of state from: %s', filepath_bak)
-                os.rename(filepath_bak, filepath)
+            log.debug(
+                'Saving torrent state: %d changed, %d removed',
+                len(changed),
+                len(removed),
+            )
+            if changed or removed:
+                self.state_journal.write(changed, removed)
+            if queue_changed:
+                self.state_journal.write_queue(self.get_queue_order())
+        except (OSError, IOError, pickle.PicklingError) as ex:
+            log.error('Unable to save torrent state: %s', ex)
+            return False
+        self.prev_saved_states.update(changed)
+        for torrent_id in removed:
+            del self.prev_saved_states[torrent_id]
+        return True
+
+    def get_queue_order(self):
+        """The torrent_ids of the queued torrents in queue order."""
+        positions = [
+            (torrent.get_queue_position(), torrent.torrent_id)
+            for torrent in list(self.torrents.values())
+        ]
+        return [
+            torrent_id for position, torrent_id in sorted(positions) if position >= 0
+        ]
 
     def save_resume_data(self, torrent_ids=None, flush_disk_cache=False):
         """Saves torrents resume data.
@@ -1051,7 +1583,7 @@ def on_all_resume_data_finished(dummy_result):
         return DeferredList(deferreds).addBoth(on_all_resume_data_finished)
 
     def load_resume_data_file(self):
-        """Load the resume data from file for all torrents.
+        """Load the resume data from the torrents.fastresume file for all torrents.
 
         Returns:
             dict: A dict of torrents and their resume_data.
@@ -1063,23 +1595,55 @@ def load_resume_data_file(self):
         old_data_filepath = os.path.join(get_config_dir(), filename)
 
         for _filepath in (filepath, filepath_bak, old_data_filepath):
+            if not os.path.isfile(_filepath):
+                continue
             log.info('Opening %s for load: %s', filename, _filepath)
             try:
                 with open(_filepath, 'rb') as _file:
                     resume_data = lt.bdecode(_file.read())
             except (IOError, EOFError, RuntimeError) as ex:
-                if self.torrents:
-                    log.warning('Unable to load %s: %s', _filepath, ex)
+                log.warning('Unable to load %s: %s', _filepath, ex)
                 resume_data = None
             else:
                 log.info('Successfully loaded %s: %s', filename, _filepath)
                 break
+        else:
+            resume_data = None
         # If the libtorrent bdecode doesn't happen properly, it will return None
         # so we need to make sure we return a {}
         if resume_data is None:
             return {}
         else:
-            return resume_data
+            return {
+                decode_bytes(torrent_id): data
+                for torrent_id, data in resume_data.items()
+            }
+
+    def migrate_resume_data_file(self):
+        """Move the resume data from the torrents.fastresume file to the resume data store.
+
+        The store is marked as migrated once all the resume data is written, so
+        an interrupted migration is repeated on the next start.
+
+        """
+        if self.resume_data.is_migrated():
+            return
+
+        resume_data = self.load_resume_data_file()
+        if resume_data:
+            log.info('Migrating resume data of %d torrents', len(resume_data))
+            for torrent_id, data in resume_data.items():
+                # Keep the resume data saved since an interrupted migration.
+                if torrent_id not in self.resume_data:
+                    self.resume_data[torrent_id] = data
+            if not self.resume_data.flush():
+                log.error('Unable to migrate resume data, retrying on next start')
+                return
+
+        try:
+            self.resume_data.mark_migrated()
+        except (IOError, OSError) as ex:
+            log.error('Unable to mark resume data as migrated: %s', ex)
 
     def save_resume_data_file(self, queue_task=False):
         """Save resume data to file in a separate thread to avoid blocking main thread.
@@ -1097,9 +1661,11 @@ def save_resume_data_file(self, queue_task=False):
             return defer.succeed(None)
 
         def on_lock_aquired():
+            start = time.time()
             d = threads.deferToThread(self._save_resume_data_file)
 
             def on_resume_data_file_saved(arg):
+                self.save_durations['resume_data'].observe(time.time() - start)
                 if self.save_resume_data_timer.running:
                     self.save_resume_data_timer.reset()
                 return arg
@@ -1110,50 +1676,8 @@ def on_resume_data_file_saved(arg):
         return self.save_resume_data_file_lock.run(on_lock_aquired)
 
     def _save_resume_data_file(self):
-        """Saves the resume data file with the contents of self.resume_data"""
-        if not self.resume_data:
-            return True
-
-        filename = 'torrents.fastresume'
-        filepath = os.path.join(self.state_dir, filename)
-        filepath_bak = filepath + '.bak'
-        filepath_tmp = filepath + '.tmp'
-
-        try:
-            log.debug('Creating the temporary file: %s', filepath_tmp)
-            with open(filepath_tmp, 'wb', 0) as _file:
-                _file.write(lt.bencode(self.resume_data))
-                _file.flush()
-                os.fsync(_file.fileno())
-        except (OSError, EOFError) as ex:
-            log.error('Unable to save %s: %s', filename, ex)
-            return False
-
-        try:
-            log.debug('Creating backup of %s at: %s', filename, filepath_bak)
-            if os.path.isfile(filepath_bak):
-                os.remove(filepath_bak)
-            if os.path.isfile(filepath):
-                os.rename(filepath, filepath_bak)
-        except OSError as ex:
-            log.error('Unable to backup %s to %s: %s', filepath, filepath_bak, ex)
-            return False
-
-        try:
-            log.debug('Saving %s to: %s', filename, filepath)
-            os.rename(filepath_tmp, filepath)
-        except OSError as ex:
-            log.error('Failed to set new file %s: %s', filepath, ex)
-            if os.path.isfile(filepath_bak):
-                log.info('Restoring backup from: %s', filepath_bak)
-                os.rename(filepath_bak, filepath)
-        else:
-            # Sync the rename operations for the directory
-            if hasattr(os, 'O_DIRECTORY'):
-                dirfd = os.open(os.path.dirname(filepath), os.O_DIRECTORY)
-                os.fsync(dirfd)
-                os.close(dirfd)
-            return True
+        """Saves the changed resume data in self.resume_data to file"""
+        return self.resume_data.flush()
 
     def archive_state(self, message):
         log.warning(message)
@@ -1161,6 +1685,7 @@ def archive_state(self, message):
         for filename in ('torrents.fastresume', 'torrents.state'):
             filepath = os.path.join(self.state_dir, filename)
             arc_filepaths.extend([filepath, filepath + '.bak'])
+        arc_filepaths.extend(self.state_journal.filepaths())
 
         archive_files('state', arc_filepaths, message=message)
 
@@ -1174,6 +1699,7 @@ def queue_top(self, torrent_id):
             return False
 
         self.torrents[torrent_id].handle.queue_position_top()
+        self.mark_queue_changed()
         return True
 
     def queue_up(self, torrent_id):
@@ -1182,6 +1708,7 @@ def queue_up(self, torrent_id):
             return False
 
         self.torrents[torrent_id].handle.queue_position_up()
+        self.mark_queue_changed()
         return True
 
     def queue_down(self, torrent_id):
@@ -1192,6 +1719,7 @@ def queue_down(self, torrent_id):
             return False
 
         self.torrents[torrent_id].handle.queue_position_down()
+        self.mark_queue_changed()
         return True
 
     def queue_bottom(self, torrent_id):
@@ -1202,6 +1730,7 @@ def queue_bottom(self, torrent_id):
             return False
 
         self.torrents[torrent_id].handle.queue_position_bottom()
+        self.mark_queue_changed()
         return True
 
     def cleanup_torrents_prev_status(self):
@@ -1209,6 +1738,70 @@ def cleanup_torrents_prev_status(self):
         for torrent in self.torrents.values():
             torrent.cleanup_prev_status()
 
+    def on_set_max_moves_per_device(self, key, value):
+        """Sets the number of storage moves run at once on a device"""
+        log.debug('max_moves_per_device set to %s...', value)
+        self.move_scheduler.max_per_device = value
+        self.move_scheduler.start_jobs()
+
+    def on_set_max_checks_per_device(self, key, value):
+        """Sets the number of forced rechecks run at once on a device"""
+        log.debug('max_checks_per_device set to %s...', value)
+        self.check_scheduler.max_per_device = value
+        self.check_scheduler.start_jobs()
+
+    def _start_recheck(self, torrent_id):
+        """Start a recheck queued by the check scheduler."""
+        try:
+            return self.torrents[torrent_id].start_recheck()
+        except KeyError:
+            return False
+
+    def _check_ended(self, torrent):
+        """Free the check slot of a recheck stopped without a torrent_checked_alert.
+
+        A recheck paused by the user, or ended by an error, leaves the
+        Checking state without ever posting the alert.
+        """
+        if torrent.torrent_id in self.check_scheduler.running and (
+            torrent.state != 'Checking'
+        ):
+            self.check_scheduler.on_done(torrent.torrent_id)
+
+    def _start_move_storage(self, torrent_id, dest):
+        """Start a storage move queued by the move scheduler."""
+        try:
+            torrent = self.torrents[torrent_id]
+        except KeyError:
+            return False
+        if torrent.start_move_storage(dest):
+            return True
+        self._finish_moving(torrent_id)
+        return False
+
+    def cancel_move_storage(self, torrent_id):
+        """Cancel the queued storage move of a torrent.
+
+        A torrent waiting on its move on completion is finished where it is.
+
+        Returns:
+            bool: True if a queued move was cancelled.
+
+        """
+        if not self.move_scheduler.cancel(torrent_id):
+            return False
+        self._finish_moving(torrent_id)
+        return True
+
+    def _finish_moving(self, torrent_id):
+        """Finish a torrent waiting on its move on completion."""
+        if torrent_id in self.waiting_on_finish_moving:
+            self.waiting_on_finish_moving.remove(torrent_id)
+            torrent = self.torrents[torrent_id]
+            torrent.is_finished = True
+            torrent.mark_state_changed()
+            component.get('EventManager').emit(TorrentFinishedEvent(torrent_id))
+
     def on_set_max_connections_per_torrent(self, key, value):
         """Sets the per-torrent connection limit"""
         log.debug('max_connections_per_torrent set to %s...', value)
@@ -1238,6 +1831,7 @@ def on_alert_add_torrent(self, alert):
         """Alert handler for libtorrent add_torrent_alert"""
         if not alert.handle.is_valid():
             log.warning('Torrent handle is invalid!')
+            self._on_add_torrent_failed(alert)
             return
 
         try:
@@ -1254,6 +1848,24 @@ def on_alert_add_torrent(self, alert):
 
         self.add_async_callback(alert.handle, *add_async_params)
 
+    def _on_add_torrent_failed(self, alert):
+        """Fail the add_async Deferred of a torrent libtorrent could not add."""
+        try:
+            params = alert.params
+            torrent_id = str(params.ti.info_hash() if params.ti else params.info_hash)
+        except (AttributeError, RuntimeError) as ex:
+            log.debug('Failed to get torrent id from add_torrent_alert: %s', ex)
+            return
+
+        add_async_params = self.torrents_loading.pop(torrent_id, None)
+        if add_async_params:
+            add_async_params[0].errback(
+                AddTorrentError(
+                    'Unable to add torrent to session: %s'
+                    % decode_bytes(alert.message())
+                )
+            )
+
     def on_alert_torrent_finished(self, alert):
         """Alert handler for libtorrent torrent_finished_alert"""
         try:
@@ -1293,6 +1905,9 @@ def on_alert_torrent_finished(self, alert):
                 component.get('EventManager').emit(TorrentFinishedEvent(torrent_id))
         else:
             torrent.is_finished = True
+        torrent.mark_state_changed()
+        # The torrent has left the queue.
+        self.mark_queue_changed()
 
         # Torrent is no longer part of the queue
         try:
@@ -1310,6 +1925,14 @@ def on_alert_torrent_finished(self, alert):
         if total_download:
             self.save_resume_data((torrent_id,))
 
+    def on_alert_torrent_removed(self, alert):
+        """Alert handler for libtorrent torrent_removed_alert"""
+        try:
+            name, save_path, paths = self.removing_data.pop(str(alert.info_hash))
+        except KeyError:
+            return
+        self.data_deletion.add(str(alert.info_hash), name, save_path, paths)
+
     def on_alert_torrent_paused(self, alert):
         """Alert handler for libtorrent torrent_paused_alert"""
         try:
@@ -1318,6 +1941,7 @@ def on_alert_torrent_paused(self, alert):
         except (RuntimeError, KeyError):
             return
         torrent.update_state()
+        self._check_ended(torrent)
         # Write the fastresume file if we are not waiting on a bulk write
         if torrent_id not in self.waiting_on_resume_data:
             self.save_resume_data((torrent_id,))
@@ -1336,6 +1960,7 @@ def on_alert_torrent_checked(self, alert):
                 torrent.handle.pause()
 
         torrent.update_state()
+        self.check_scheduler.on_done(torrent.torrent_id)
 
     def on_alert_tracker_reply(self, alert):
         """Alert handler for libtorrent tracker_reply_alert"""
@@ -1347,11 +1972,13 @@ def on_alert_tracker_reply(self, alert):
         # Set the tracker status for the torrent
         torrent.set_tracker_status('Announce OK')
 
+        status = alert.handle.status()
+        self.tracker_registry.on_reply(
+            torrent.torrent_id, decode_bytes(alert.url), status.next_announce.seconds
+        )
+
         # Check for peer information from the tracker, if none then send a scrape request.
-        if (
-            alert.handle.status().num_complete == -1
-            or alert.handle.status().num_incomplete == -1
-        ):
+        if status.num_complete == -1 or status.num_incomplete == -1:
             torrent.scrape_tracker()
 
     def on_alert_tracker_announce(self, alert):
@@ -1363,6 +1990,7 @@ def on_alert_tracker_announce(self, alert):
 
         # Set the tracker status for the torrent
         torrent.set_tracker_status('Announce Sent')
+        self.tracker_registry.on_announce(torrent.torrent_id, decode_bytes(alert.url))
 
     def on_alert_tracker_warning(self, alert):
         """Alert handler for libtorrent tracker_warning_alert"""
@@ -1372,6 +2000,8 @@ def on_alert_tracker_warning(self, alert):
             return
         # Set the tracker status for the torrent
         torrent.set_tracker_status('Warning: %s' % decode_bytes(alert.message()))
+        # The tracker did reply, only with a warning.
+        self.tracker_registry.on_reply(torrent.torrent_id, decode_bytes(alert.url))
 
     def on_alert_tracker_error(self, alert):
         """Alert handler for libtorrent tracker_error_alert"""
@@ -1387,6 +2017,7 @@ def on_alert_tracker_error(self, alert):
             'Tracker Error Alert: %s [%s]', decode_bytes(alert.message()), error_message
         )
         torrent.set_tracker_status('Error: ' + error_message)
+        self.tracker_registry.on_error(torrent.torrent_id, decode_bytes(alert.url))
 
     def on_alert_storage_moved(self, alert):
         """Alert handler for libtorrent storage_moved_alert"""
@@ -1399,11 +2030,8 @@ def on_alert_storage_moved(self, alert):
         torrent.set_download_location(os.path.normpath(alert.storage_path()))
         torrent.set_move_completed(False)
         torrent.update_state()
-
-        if torrent_id in self.waiting_on_finish_moving:
-            self.waiting_on_finish_moving.remove(torrent_id)
-            torrent.is_finished = True
-            component.get('EventManager').emit(TorrentFinishedEvent(torrent_id))
+        self.move_scheduler.on_done(torrent_id)
+        self._finish_moving(torrent_id)
 
     def on_alert_storage_moved_failed(self, alert):
         """Alert handler for libtorrent storage_moved_failed_alert"""
@@ -1417,11 +2045,8 @@ def on_alert_storage_moved_failed(self, alert):
         # Set an Error message and pause the torrent
         alert_msg = decode_bytes(alert.message()).split(':', 1)[1].strip()
         torrent.force_error_state('Failed to move download folder: %s' % alert_msg)
-
-        if torrent_id in self.waiting_on_finish_moving:
-            self.waiting_on_finish_moving.remove(torrent_id)
-            torrent.is_finished = True
-            component.get('EventManager').emit(TorrentFinishedEvent(torrent_id))
+        self.move_scheduler.on_done(torrent_id)
+        self._finish_moving(torrent_id)
 
     def on_alert_torrent_resumed(self, alert):
         """Alert handler for libtorrent torrent_resumed_alert"""
@@ -1447,9 +2072,14 @@ def on_alert_state_changed(self, alert):
             return
 
         torrent.update_state()
+        self._check_ended(torrent)
         # Torrent may need to download data after checking.
         if torrent.state in ('Checking', 'Downloading'):
-            torrent.is_finished = False
+            if torrent.is_finished:
+                torrent.is_finished = False
+                torrent.mark_state_changed()
+                # The torrent is back in the queue.
+                self.mark_queue_changed()
             self.queued_torrents.add(torrent_id)
 
     def on_alert_save_resume_data(self, alert):
@@ -1513,6 +2143,7 @@ def on_alert_file_renamed(self, alert):
 
         new_name = decode_bytes(alert.new_name())
         log.debug('index: %s name: %s', alert.index, new_name)
+        torrent.on_file_renamed()
 
         # We need to see if this file index is in a waiting_on_folder dict
         for wait_on_folder in torrent.waiting_on_folder_rename:
@@ -1556,6 +2187,8 @@ def on_alert_file_error(self, alert):
         except (RuntimeError, KeyError):
             return
         torrent.update_state()
+        # A file error stops the recheck without a torrent_checked_alert.
+        self.check_scheduler.on_done(torrent.torrent_id)
 
     def on_alert_file_completed(self, alert):
         """Alert handler for libtorrent file_completed_alert
@@ -1573,6 +2206,14 @@ def on_alert_file_completed(self, alert):
                 TorrentFileCompletedEvent(torrent_id, alert.index)
             )
 
+    def on_alert_file_prio(self, alert):
+        """Alert handler for libtorrent file_prio_alert"""
+        try:
+            torrent = self.torrents[str(alert.handle.info_hash())]
+        except (RuntimeError, KeyError):
+            return
+        torrent.sync_file_priorities()
+
     def on_alert_state_update(self, alert):
         """Alert handler for libtorrent state_update_alert
 
@@ -1580,8 +2221,6 @@ def on_alert_state_update(self, alert):
         of all torrents that changed since last time this was posted.
 
         """
-        self.last_state_update_alert_ts = time.time()
-
         for t_status in alert.status:
             try:
                 torrent_id = str(t_status.info_hash)
@@ -1590,7 +2229,7 @@ def on_alert_state_update(self, alert):
             if torrent_id in self.torrents:
                 self.torrents[torrent_id].update_status(t_status)
 
-        self.handle_torrents_status_callback(self.torrents_status_requests.pop())
+        self.status_refresher.on_refreshed()
 
     def on_alert_external_ip(self, alert):
         """Alert handler for libtorrent external_ip_alert
@@ -1606,35 +2245,6 @@ def on_alert_external_ip(self, alert):
         log.info('on_alert_external_ip: %s', external_ip)
         component.get('EventManager').emit(ExternalIPEvent(external_ip))
 
-    def on_alert_performance(self, alert):
-        """Alert handler for libtorrent performance_alert"""
-        log.warning(
-            'on_alert_performance: %s, %s',
-            decode_bytes(alert.message()),
-            alert.warning_code,
-        )
-        if alert.warning_code == lt.performance_warning_t.send_buffer_watermark_too_low:
-            max_send_buffer_watermark = 3 * 1024 * 1024  # 3MiB
-            settings = self.session.get_settings()
-            send_buffer_watermark = settings['send_buffer_watermark']
-
-            # If send buffer is too small, try increasing its size by 512KiB (up to max_send_buffer_watermark)
-            if send_buffer_watermark < max_send_buffer_watermark:
-                value = send_buffer_watermark + (500 * 1024)
-                log.info(
-                    'Increasing send_buffer_watermark from %s to %s Bytes',
-                    send_buffer_watermark,
-                    value,
-                )
-                component.get('Core').apply_session_setting(
-                    'send_buffer_watermark', value
-                )
-            else:
-                log.warning(
-                    'send_buffer_watermark reached maximum value: %s Bytes',
-                    max_send_buffer_watermark,
-                )
-
     def separate_keys(self, keys, torrent_ids):
         """Separates the input keys into torrent class keys and plugins keys"""
         if self.torrents:
@@ -1646,26 +2256,53 @@ def separate_keys(self, keys, torrent_ids):
                     return torrent_keys, leftover_keys
         return [], []
 
-    def handle_torrents_status_callback(self, status_request):
-        """Build the status dictionary with torrent values"""
-        d, torrent_ids, keys, diff = status_request
-        status_dict = {}.fromkeys(torrent_ids)
+    def build_torrents_status(self, torrent_ids, keys, diff=False):
+        """Build the status dictionary from the cached torrent status.
+
+        Args:
+            torrent_ids (list of str): The torrent IDs to get the status of.
+            keys (list of str): The keys to get the status on, all if empty.
+            diff (bool, optional): If True, will return a diff of the changes since the
+                last call to get_status based on the session_id, defaults to False.
+
+        Returns:
+            tuple: The status dict of {torrent_id: {key: value}} and the list of
+                requested keys that are not torrent keys, i.e. plugin keys.
+
+        """
+        status_dict = {}
         torrent_keys, plugin_keys = self.separate_keys(keys, torrent_ids)
+        # The torrent_id may not exist if the client's cache (sessionproxy)
+        # isn't up to speed.
+        torrent_ids = [t_id for t_id in torrent_ids if t_id in self.torrents]
+        if not keys and torrent_ids:
+            torrent_keys = list(self.torrents[torrent_ids[0]].status_funcs)
+
+        # Read the numeric values for all torrents at once from the status table.
+        table_keys = [key for key in torrent_keys if key in self.status_table]
+        if table_keys:
+            torrent_keys = [key for key in torrent_keys if key not in table_keys]
+            table_ids = [t_id for t_id in torrent_ids if t_id in self.status_table.rows]
+            table_status = dict(
+                zip(table_ids, self.status_table.get_status(table_ids, table_keys))
+            )
+        else:
+            table_status = {}
 
         # Get the torrent status for each torrent_id
         for torrent_id in torrent_ids:
-            if torrent_id not in self.torrents:
-                # The torrent_id does not exist in the dict.
-                # Could be the clients cache (sessionproxy) isn't up to speed.
-                del status_dict[torrent_id]
+            torrent = self.torrents[torrent_id]
+            if torrent_id in table_status:
+                status_dict[torrent_id] = torrent.get_status(
+                    torrent_keys, diff, base_status=table_status[torrent_id]
+                )
             else:
-                status_dict[torrent_id] = self.torrents[torrent_id].get_status(
-                    torrent_keys, diff, all_keys=not keys
+                status_dict[torrent_id] = torrent.get_status(
+                    torrent_keys + table_keys, diff
                 )
-        self.status_dict = status_dict
-        d.callback((status_dict, plugin_keys))
+        return status_dict, plugin_keys
 
-    def torrents_status_update(self, torrent_ids, keys, diff=False):
+    def torrents_status_update(self, torrent_ids, keys, diff=False, max_age=None):
         """Returns status dict for the supplied torrent_ids async.
 
         Note:
@@ -1677,20 +2314,21 @@ def torrents_status_update(self, torrent_ids, keys, diff=False):
             keys (list of str): The keys to get the status on.
             diff (bool, optional): If True, will return a diff of the changes since the
                 last call to get_status based on the session_id, defaults to False.
+            max_age (float, optional): The accepted age in seconds of the cached state,
+                defaults to the max_age of the status_refresher.
 
         Returns:
             dict: A status dictionary for the requested torrents.
 
         """
-        d = Deferred()
-        now = time.time()
-        # If last update was recent, use cached data instead of request updates from libtorrent
-        if (now - self.last_state_update_alert_ts) < 1.5:
-            reactor.callLater(
-                0, self.handle_torrents_status_callback, (d, torrent_ids, keys, diff)
+
+        def on_refreshed(result):
+            status_dict, plugin_keys = self.build_torrents_status(
+                torrent_ids, keys, diff
             )
-        else:
-            # Ask libtorrent for status update
-            self.torrents_status_requests.insert(0, (d, torrent_ids, keys, diff))
-            self.session.post_torrent_updates()
+            self.status_dict = status_dict
+            return status_dict, plugin_keys
+
+        d = self.status_refresher.refresh(max_age)
+        d.addCallback(on_refreshed)
         return d
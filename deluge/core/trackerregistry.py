@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+
+"""The trackers of all the torrents with their aggregate announce metrics."""
+from __future__ import unicode_literals
+
+import logging
+import socket
+
+from twisted.internet import reactor
+
+try:
+    from urllib.parse import urlparse
+except ImportError:
+    # PY2 fallback
+    from urlparse import urlparse  # pylint: disable=ungrouped-imports
+
+log = logging.getLogger(__name__)
+
+
+def parse_tracker_host(url):
+    """Get the host name of a tracker url, shortened to its domain.
+
+    Args:
+        url (str): The tracker announce url.
+
+    Returns:
+        str: The tracker host, the IP address if the host is one.
+
+    """
+    url = urlparse(url.replace('udp://', 'http://'))
+    host = url.hostname or 'DHT'
+    # Check if hostname is an IP address and just return it if that's the case
+    try:
+        socket.inet_aton(host)
+    except socket.error:
+        pass
+    else:
+        # This is an IP address because an exception wasn't raised
+        return host
+
+    parts = host.split('.')
+    if len(parts) > 2:
+        if parts[-2] in ('co', 'com', 'net', 'org') or parts[-1] == 'uk':
+            host = '.'.join(parts[-3:])
+        else:
+            host = '.'.join(parts[-2:])
+    return host
+
+
+class TrackerRegistry(object):
+    """Keeps the tracker hosts of the torrents and their announce metrics.
+
+    The announce urls and hosts are interned so the torrents using the same
+    tracker share the strings. The metrics of each host are updated from the
+    tracker alerts so they are read without going through the torrents.
+
+    """
+
+    def __init__(self):
+        self.clock = reactor
+        # The shared url and host strings, only ever a few per tracker.
+        self._strings = {}
+        # The hosts of the urls {url: host}
+        self._hosts = {}
+        # The hosts of the trackers of each torrent {torrent_id: hosts}
+        self._torrent_hosts = {}
+        # The announces waiting on a reply {torrent_id: {url: sent_time}}
+        self._announcing = {}
+        # The aggregate metrics of each host {host: stats}
+        self._stats = {}
+
+    def get_host(self, url):
+        """Get the interned host of a tracker url."""
+        try:
+            return self._hosts[url]
+        except KeyError:
+            host = self._intern(parse_tracker_host(url))
+            self._hosts[self._intern(url)] = host
+            return host
+
+    def set_trackers(self, torrent_id, trackers):
+        """Set the trackers of a torrent, interning their urls in place.
+
+        Args:
+            torrent_id (str): The torrent_id.
+            trackers (list of dict): The trackers with an url key.
+
+        """
+        hosts = set()
+        for tracker in trackers:
+            tracker['url'] = self._intern(tracker['url'])
+            hosts.add(self.get_host(tracker['url']))
+
+        old_hosts = self._torrent_hosts.get(torrent_id, frozenset())
+        for host in old_hosts - hosts:
+            self._discard(host, torrent_id)
+        for host in hosts - old_hosts:
+            if host not in self._stats:
+                self._stats[host] = {
+                    'torrents': set(),
+                    'errors': set(),
+                    'latency': None,
+                    'next_announce': None,
+                }
+            self._stats[host]['torrents'].add(torrent_id)
+        self._torrent_hosts[torrent_id] = frozenset(hosts)
+
+    def remove(self, torrent_id):
+        """Remove a torrent from the metrics of its trackers."""
+        self._announcing.pop(torrent_id, None)
+        for host in self._torrent_hosts.pop(torrent_id, ()):
+            self._discard(host, torrent_id)
+
+    def on_announce(self, torrent_id, url):
+        """An announce was sent to the tracker."""
+        self._announcing.setdefault(torrent_id, {})[url] = self.clock.seconds()
+
+    def on_reply(self, torrent_id, url, next_announce=None):
+        """The tracker replied to an announce.
+
+        Args:
+            torrent_id (str): The torrent_id.
+            url (str): The tracker url.
+            next_announce (float, optional): The seconds until the torrent
+                announces again.
+
+        """
+        stats = self._get_stats(torrent_id, url)
+        if not stats:
+            return
+        stats['errors'].discard(torrent_id)
+        now = self.clock.seconds()
+        sent = self._announcing.get(torrent_id, {}).pop(url, None)
+        if sent is not None:
+            stats['latency'] = now - sent
+        if next_announce is not None:
+            due = now + next_announce
+            if (
+                stats['next_announce'] is None
+                or stats['next_announce'] <= now
+                or due < stats['next_announce']
+            ):
+                stats['next_announce'] = due
+
+    def on_error(self, torrent_id, url):
+        """The announce to the tracker failed."""
+        stats = self._get_stats(torrent_id, url)
+        if not stats:
+            return
+        stats['errors'].add(torrent_id)
+        self._announcing.get(torrent_id, {}).pop(url, None)
+
+    def get_stats(self):
+        """Get the aggregate metrics of each tracker host.
+
+        Returns:
+            dict: The {host: stats} where stats is a dict of the torrents and
+                errors counts, the last announce latency in seconds and the
+                seconds until the earliest known next announce, or None if unknown.
+
+        """
+        now = self.clock.seconds()
+        tracker_stats = {}
+        for host, stats in self._stats.items():
+            next_announce = stats['next_announce']
+            if next_announce is not None:
+                next_announce = max(next_announce - now, 0)
+            tracker_stats[host] = {
+                'torrents': len(stats['torrents']),
+                'errors': len(stats['errors']),
+                'latency': stats['latency'],
+                'next_announce': next_announce,
+            }
+        return tracker_stats
+
+    def _intern(self, value):
+        return self._strings.setdefault(value, value)
+
+    def _get_stats(self, torrent_id, url):
+        host = self.get_host(url)
+        if host not in self._torrent_hosts.get(torrent_id, ()):
+            return None
+        return self._stats[host]
+
+    def _discard(self, host, torrent_id):
+        stats = self._stats[host]
+        stats['torrents'].discard(torrent_id)
+        stats['errors'].discard(torrent_id)
+        if not stats['torrents']:
+            del self._stats[host]
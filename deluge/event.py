@@ -70,6 +70,19 @@ def __init__(self, torrent_id, from_state):
         self._args = [torrent_id, from_state]
 
 
+class TorrentsAddedEvent(DelugeEvent):
+    """
+    Emitted when a bulk add of torrents to the session has finished.
+    """
+
+    def __init__(self, torrent_ids):
+        """
+        :param torrent_ids: the torrent_ids of the added torrents
+        :type torrent_ids: list
+        """
+        self._args = [torrent_ids]
+
+
 class TorrentRemovedEvent(DelugeEvent):
     """
     Emitted when a torrent has been removed from the session.
@@ -83,6 +96,19 @@ def __init__(self, torrent_id):
         self._args = [torrent_id]
 
 
+class TorrentsRemovedEvent(DelugeEvent):
+    """
+    Emitted when a bulk removal of torrents from the session has finished.
+    """
+
+    def __init__(self, torrent_ids):
+        """
+        :param torrent_ids: the torrent_ids of the removed torrents
+        :type torrent_ids: list
+        """
+        self._args = [torrent_ids]
+
+
 class PreTorrentRemovedEvent(DelugeEvent):
     """
     Emitted when a torrent is about to be removed from the session.
@@ -223,6 +249,24 @@ def __init__(self, torrent_id, path):
         self._args = [torrent_id, path]
 
 
+class TorrentsStatusDeltaEvent(DelugeEvent):
+    """
+    Emitted to a subscribed client with the torrent status changes since the
+    previous delta of the subscription.
+    """
+
+    def __init__(self, subscription_id, changes, removed):
+        """
+        :param subscription_id: the id returned by subscribe_torrents_status
+        :type subscription_id: int
+        :param changes: the changed status values, {torrent_id: {key: value}}
+        :type changes: dict
+        :param removed: the torrent_ids no longer matching the subscription
+        :type removed: list
+        """
+        self._args = [subscription_id, changes, removed]
+
+
 class CreateTorrentProgressEvent(DelugeEvent):
     """
     Emitted when creating a torrent file remotely.
@@ -245,6 +289,22 @@ def __init__(self, new_release):
         self._args = [new_release]
 
 
+class SessionLoadProgressEvent(DelugeEvent):
+    """
+    Emitted while the session is starting after each batch of torrents from
+    the saved state has been added.
+    """
+
+    def __init__(self, loaded, total):
+        """
+        :param loaded: the number of torrents loaded so far
+        :type loaded: int
+        :param total: the number of torrents to load
+        :type total: int
+        """
+        self._args = [loaded, total]
+
+
 class SessionStartedEvent(DelugeEvent):
     """
     Emitted when a session has started.  This typically only happens once when
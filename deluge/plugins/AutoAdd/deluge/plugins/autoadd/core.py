@@ -28,7 +28,6 @@
 from deluge._libtorrent import lt
 from deluge.common import AUTH_LEVEL_ADMIN, is_magnet
 from deluge.core.rpcserver import export
-from deluge.error import AddTorrentError
 from deluge.event import DelugeEvent
 from deluge.plugins.pluginbase import CorePluginBase
 
@@ -247,6 +246,53 @@ def update_watchdir(self, watchdir_id):
             ):
                 os.remove(filepath)
 
+        def on_torrent_added(torrent_id, filename, filepath):
+            if 'Label' in component.get('CorePluginManager').get_enabled_plugins():
+                if watchdir.get('label_toggle', True) and watchdir.get('label'):
+                    label = component.get('CorePlugin.Label')
+                    if not watchdir['label'] in label.get_labels():
+                        label.add(watchdir['label'])
+                    try:
+                        label.set_torrent(torrent_id, watchdir['label'])
+                    except Exception as ex:
+                        log.error('Unable to set label: %s', ex)
+
+            if watchdir.get('queue_to_top_toggle', True) and 'queue_to_top' in watchdir:
+                if watchdir['queue_to_top']:
+                    component.get('TorrentManager').queue_top(torrent_id)
+                else:
+                    component.get('TorrentManager').queue_bottom(torrent_id)
+
+            # Rename, copy or delete the torrent once added to deluge.
+            if watchdir.get('append_extension_toggle'):
+                if not watchdir.get('append_extension'):
+                    watchdir['append_extension'] = '.added'
+                os.rename(filepath, filepath + watchdir['append_extension'])
+            elif watchdir.get('copy_torrent_toggle'):
+                copy_torrent_path = watchdir['copy_torrent']
+                copy_torrent_file = os.path.join(copy_torrent_path, filename)
+                log.debug(
+                    'Moving added torrent file "%s" to "%s"',
+                    os.path.basename(filepath),
+                    copy_torrent_path,
+                )
+                shutil.move(filepath, copy_torrent_file)
+            else:
+                os.remove(filepath)
+
+        def fail_torrent_add(err_msg, filepath, magnet):
+            # torrent handle is invalid and so is the magnet link
+            log.error(
+                'Cannot Autoadd %s: %s: %s',
+                'magnet' if magnet else 'torrent file',
+                filepath,
+                err_msg,
+            )
+            os.rename(filepath, filepath + '.invalid')
+
+        # The torrents to add to the session and their (filename, filepath, magnet).
+        torrents = []
+        added = []
         for filename in os.listdir(watchdir['abspath']):
             try:
                 filepath = os.path.join(watchdir['abspath'], filename)
@@ -287,67 +333,30 @@ def update_watchdir(self, watchdir_id):
                     self.invalid_torrents[filename] = 1
                 continue
 
-            def on_torrent_added(torrent_id, filename, filepath):
-                if 'Label' in component.get('CorePluginManager').get_enabled_plugins():
-                    if watchdir.get('label_toggle', True) and watchdir.get('label'):
-                        label = component.get('CorePlugin.Label')
-                        if not watchdir['label'] in label.get_labels():
-                            label.add(watchdir['label'])
-                        try:
-                            label.set_torrent(torrent_id, watchdir['label'])
-                        except Exception as ex:
-                            log.error('Unable to set label: %s', ex)
-
-                if (
-                    watchdir.get('queue_to_top_toggle', True)
-                    and 'queue_to_top' in watchdir
-                ):
-                    if watchdir['queue_to_top']:
-                        component.get('TorrentManager').queue_top(torrent_id)
-                    else:
-                        component.get('TorrentManager').queue_bottom(torrent_id)
-
-                # Rename, copy or delete the torrent once added to deluge.
-                if watchdir.get('append_extension_toggle'):
-                    if not watchdir.get('append_extension'):
-                        watchdir['append_extension'] = '.added'
-                    os.rename(filepath, filepath + watchdir['append_extension'])
-                elif watchdir.get('copy_torrent_toggle'):
-                    copy_torrent_path = watchdir['copy_torrent']
-                    copy_torrent_file = os.path.join(copy_torrent_path, filename)
-                    log.debug(
-                        'Moving added torrent file "%s" to "%s"',
-                        os.path.basename(filepath),
-                        copy_torrent_path,
-                    )
-                    shutil.move(filepath, copy_torrent_file)
-                else:
-                    os.remove(filepath)
+            # The torrent looks good, so lets add it to the session.
+            if magnet:
+                torrents.append((filedump.strip(), None, options))
+            else:
+                torrents.append((filename, b64encode(filedump), options))
+            added.append((filename, filepath, magnet))
 
-            def fail_torrent_add(err_msg, filepath, magnet):
-                # torrent handle is invalid and so is the magnet link
-                log.error(
-                    'Cannot Autoadd %s: %s: %s',
-                    'magnet' if magnet else 'torrent file',
-                    filepath,
-                    err_msg,
-                )
-                os.rename(filepath, filepath + '.invalid')
+        if not torrents:
+            return
 
-            try:
-                # The torrent looks good, so lets add it to the session.
-                if magnet:
-                    d = component.get('Core').add_torrent_magnet(
-                        filedump.strip(), options
-                    )
-                else:
-                    d = component.get('Core').add_torrent_file_async(
-                        filename, b64encode(filedump), options
-                    )
-                    d.addCallback(on_torrent_added, filename, filepath)
-                    d.addErrback(fail_torrent_add, filepath, magnet)
-            except AddTorrentError as ex:
-                fail_torrent_add(str(ex), filepath, magnet)
+        def on_torrents_added(results):
+            for (filename, filepath, magnet), (success, result) in zip(added, results):
+                # An error with one file must not disable the watch folder.
+                try:
+                    if not success:
+                        fail_torrent_add(result, filepath, magnet)
+                    elif not magnet:
+                        on_torrent_added(result, filename, filepath)
+                except Exception as ex:
+                    log.error('Unable to handle auto added %s: %s', filepath, ex)
+
+        d = component.get('Core').add_torrents_bulk(torrents)
+        d.addCallback(on_torrents_added)
+        return d
 
     def on_update_watchdir_error(self, failure, watchdir_id):
         """Disables any watch folders with un-handled exceptions."""
@@ -102,12 +102,20 @@ def enable(self):
         component.get('FilterManager').register_tree_field(
             'label', self.init_filter_dict
         )
+        component.get('FilterManager').register_index_field(
+            'label', self._status_get_label
+        )
+        component.get('FilterManager').register_search_field(
+            'label', self._status_get_label
+        )
 
         log.debug('Label plugin enabled..')
 
     def disable(self):
         self.plugin.deregister_status_field('label')
         component.get('FilterManager').deregister_tree_field('label')
+        component.get('FilterManager').deregister_index_field('label')
+        component.get('FilterManager').deregister_search_field('label')
         component.get('EventManager').deregister_event_handler(
             'TorrentAddedEvent', self.post_torrent_add
         )
@@ -196,6 +204,7 @@ def remove(self, label_id):
         del self.labels[label_id]
         self.clean_config()
         self.config.save()
+        component.get('FilterManager').update_index(fields=['label'])
 
     def _set_torrent_options(self, torrent_id, label_id):
         options = self.labels[label_id]
@@ -329,6 +338,7 @@ def set_torrent(self, torrent_id, label_id):
             self._set_torrent_options(torrent_id, label_id)
 
         self.config.save()
+        component.get('FilterManager').update_index(torrent_id, ['label'])
 
     @export
     def get_config(self):
@@ -14,6 +14,7 @@
 import tempfile
 import traceback
 
+import pytest
 from twisted.internet import defer, protocol, reactor
 from twisted.internet.defer import Deferred
 from twisted.internet.error import CannotListenError
@@ -28,6 +29,15 @@
 # This sets log level to critical, so use log.critical() to debug while running unit tests
 deluge.log.setup_logger('none')
 
+BENCHMARK_TESTS = bool(os.getenv('BENCHMARK_TESTS', False))
+
+
+def benchmark(test_method):
+    """Mark a benchmark test, skipped unless BENCHMARK_TESTS is set."""
+    if not BENCHMARK_TESTS:
+        test_method.skip = 'Skipping benchmark tests'
+    return pytest.mark.benchmark(test_method)
+
 
 def disable_new_release_check():
     deluge.core.preferencesmanager.DEFAULT_PREFS['new_release_check'] = False
@@ -7,12 +7,30 @@
 
 from __future__ import unicode_literals
 
+from twisted.internet import defer
+
 import deluge.component as component
 from deluge.core.core import Core
 
 from .basetest import BaseTestCase
 
 
+def fake_alert(alert_type, **attrs):
+    """Create an alert object whose class name is the alert_type."""
+    alert = type(str(alert_type), (object,), {'message': lambda self: b''})()
+    alert.__dict__.update(attrs)
+    return alert
+
+
+class FakeSession(object):
+    def __init__(self):
+        self.alerts = []
+
+    def pop_alerts(self):
+        alerts, self.alerts = self.alerts, []
+        return alerts
+
+
 class AlertManagerTestCase(BaseTestCase):
     def set_up(self):
         self.core = Core()
@@ -37,3 +55,68 @@ def handler(alert):
         self.am.register_handler('dummy_alert', handler)
         self.am.deregister_handler(handler)
         self.assertEqual(self.am.handlers['dummy_alert'], [])
+
+    def test_batch_handler(self):
+        handled = []
+        batches = []
+        self.am.register_handler('dummy_alert', handled.append)
+        self.am.register_handler('dummy_alert', batches.append, batch=True)
+        self.am.register_handler('other_alert', handled.append)
+        self.am.session = FakeSession()
+        alerts = [fake_alert('dummy_alert', n=n) for n in range(3)]
+        other_alert = fake_alert('other_alert')
+        self.am.session.alerts = alerts[:2] + [other_alert] + alerts[2:]
+
+        self.am.handle_alerts()
+        self.assertEqual(handled, alerts[:2] + [other_alert] + alerts[2:])
+        self.assertEqual(batches, [alerts[:2], alerts[2:]])
+        self.assertEqual(self.am.get_stats()['alerts_handled'], 4)
+        self.assertEqual(self.am.get_backlog(), 0)
+
+    def test_dispatch_time_budget(self):
+        handled = []
+        self.am.register_handler('dummy_alert', handled.append)
+        self.am.session = FakeSession()
+        self.am.session.alerts = [fake_alert('dummy_alert') for dummy in range(5)]
+        self.am.max_batch_size = 2
+        self.am.dispatch_time_budget = 0
+
+        self.am.handle_alerts()
+        self.assertEqual(len(handled), 0)
+        self.assertEqual(self.am.get_backlog(), 5)
+
+        # No alerts are popped until the backlog is dispatched.
+        self.am.session.alerts = [fake_alert('dummy_alert')]
+        self.am.handle_alerts()
+        self.assertEqual(len(self.am.session.alerts), 1)
+
+        self.am.dispatch_time_budget = 1
+        self.am.dispatch_alerts()
+        self.assertEqual(len(handled), 5)
+        self.assertFalse(self.am.dispatch_call)
+
+    def test_handler_error(self):
+        handled = []
+
+        def bad_handler(alert):
+            raise ValueError('Bad handler')
+
+        self.am.register_handler('dummy_alert', bad_handler)
+        self.am.register_handler('dummy_alert', handled.append)
+        self.am.session = FakeSession()
+        self.am.session.alerts = [fake_alert('dummy_alert')]
+        self.am.handle_alerts()
+        self.assertEqual(len(handled), 1)
+
+    def test_wait_for_alerts(self):
+        self.assertTrue(self.am.wait_for_alerts)
+        d = defer.Deferred()
+        self.am.register_handler('session_stats_alert', d.callback)
+        self.am.session.post_session_stats()
+
+        def on_alert(alert):
+            # The alert is handled before the next update poll.
+            self.assertTrue(self.am.get_stats()['wakeups'])
+
+        d.addCallback(on_alert)
+        return d
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+
+from __future__ import unicode_literals
+
+from twisted.internet import task
+
+import deluge.component as component
+from deluge._libtorrent import lt
+from deluge.core.core import Core
+
+from .basetest import BaseTestCase
+
+
+class PerformanceAlert(object):
+    def __init__(self, warning_code):
+        self.warning_code = warning_code
+
+    def message(self):
+        return b'performance warning'
+
+
+class AutoTunerTestCase(BaseTestCase):
+    def set_up(self):
+        self.core = Core()
+        self.core.config.config['lsd'] = False
+        self.tuner = self.core.autotuner
+        self.clock = task.Clock()
+        self.tuner.clock = self.clock
+        return component.start(['AlertManager'])
+
+    def tear_down(self):
+        return component.shutdown()
+
+    def get_setting(self, setting):
+        return self.core.session.get_settings()[setting]
+
+    def test_alert(self):
+        value = self.get_setting('send_buffer_watermark')
+        self.tuner.on_alert_performance(
+            PerformanceAlert(lt.performance_warning_t.send_buffer_watermark_too_low)
+        )
+        self.assertEqual(self.get_setting('send_buffer_watermark'), int(value * 1.5))
+        decision = self.core.get_tuning_report()['decisions'][-1]
+        self.assertEqual(decision['warning'], 'send_buffer_watermark_too_low')
+        self.assertEqual(decision['old_value'], value)
+
+    def test_bounded(self):
+        value = self.get_setting('max_out_request_queue')
+        for dummy in range(10):
+            self.tuner.tune('outstanding_request_limit_reached')
+            # Only tuned once per interval.
+            self.tuner.tune('outstanding_request_limit_reached')
+            self.clock.advance(self.tuner.min_interval)
+        self.assertEqual(self.get_setting('max_out_request_queue'), value * 4)
+
+        report = self.core.get_tuning_report()
+        self.assertEqual(
+            report['settings'],
+            {'max_out_request_queue': {'original': value, 'current': value * 4}},
+        )
+        # The limit is only recorded once.
+        self.assertEqual(len(report['decisions']), 5)
+        self.assertIn('tuning limit', report['decisions'][-1]['reason'])
+
+    def test_reset(self):
+        value = self.get_setting('file_pool_size')
+        self.tuner.tune('too_few_file_descriptors')
+        self.assertLess(self.get_setting('file_pool_size'), value)
+
+        self.core.reset_tuning()
+        self.assertEqual(self.get_setting('file_pool_size'), value)
+        self.assertEqual(self.core.get_tuning_report()['settings'], {})
+
+    def test_advice(self):
+        settings = self.core.session.get_settings()
+        self.tuner.tune('upload_limit_too_low')
+        self.tuner.tune('upload_limit_too_low')
+        self.assertEqual(self.core.session.get_settings(), settings)
+        decisions = self.core.get_tuning_report()['decisions']
+        self.assertEqual(len(decisions), 1)
+        self.assertIsNone(decisions[0]['setting'])
+        self.assertIn('upload speed limit', decisions[0]['reason'])
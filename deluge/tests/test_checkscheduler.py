@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+
+from __future__ import unicode_literals
+
+import tempfile
+
+from twisted.internet import task
+from twisted.trial import unittest
+
+from deluge.core.checkscheduler import CheckScheduler
+
+
+class CheckSchedulerTestCase(unittest.TestCase):
+    def setUp(self):  # NOQA: N803
+        self.started = []
+        self.scheduler = CheckScheduler(self.start_check)
+        self.clock = task.Clock()
+        self.scheduler.clock = self.clock
+        self.save_path = tempfile.mkdtemp()
+
+    def start_check(self, torrent_id):
+        self.started.append(torrent_id)
+        return True
+
+    def test_one_check_per_device(self):
+        self.scheduler.add_check('id1', self.save_path, 300)
+        self.scheduler.add_check('id2', self.save_path, 200)
+        self.scheduler.add_check('id3', self.save_path, 100)
+        self.assertEqual(self.started, ['id1'])
+        self.assertEqual(self.scheduler.get_position('id3'), 0)
+
+        self.scheduler.on_done('id1')
+        self.assertEqual(self.started, ['id1', 'id3'])
+
+    def test_throughput_and_eta(self):
+        self.scheduler.add_check('id1', self.save_path, 300)
+        self.scheduler.add_check('id2', self.save_path, 200)
+        self.assertEqual(self.scheduler.get_throughput(), 0)
+        self.assertEqual(self.scheduler.get_eta('id2'), -1)
+
+        self.clock.advance(3)
+        self.scheduler.on_done('id1')
+        self.assertEqual(self.scheduler.get_throughput(), 100)
+        self.scheduler.add_check('id3', self.save_path, 100)
+        self.assertEqual(self.scheduler.get_eta('id2'), 2)
+        self.assertEqual(self.scheduler.get_eta('id3'), 3)
+        self.scheduler.add_check('id4', self.save_path, 100)
+        self.assertEqual(self.scheduler.get_eta('id4'), 4)
+        self.scheduler.set_priority('id4', 1)
+        self.assertEqual(self.scheduler.get_eta('id4'), 3)
+        self.assertEqual(self.scheduler.get_eta('id3'), 4)
+        self.scheduler.cancel('id4')
+        self.assertEqual(self.scheduler.get_eta('id3'), 3)
+
+        self.clock.advance(1)
+        self.assertEqual(self.scheduler.get_eta('id2'), 1)
+        self.assertEqual(
+            [(s['torrent_id'], s['eta']) for s in self.scheduler.get_status()],
+            [('id2', 1), ('id3', 3)],
+        )
+
+        self.scheduler.on_done('id2')
+        self.scheduler.on_done('id3')
+        # Idle time does not lower the throughput.
+        self.clock.advance(10)
+        self.assertEqual(self.scheduler.get_throughput(), 600 / 4)
+        self.assertEqual(self.scheduler.get_eta('id3'), -1)
@@ -15,6 +15,8 @@
 from deluge.common import (
     VersionSplit,
     archive_files,
+    decode_pieces_rle,
+    encode_pieces_rle,
     fdate,
     fpcnt,
     fpeer,
@@ -137,6 +139,13 @@ def test_version_split(self):
         self.assertTrue(VersionSplit('1.4.0.dev1') < VersionSplit('1.4.0'))
         self.assertTrue(VersionSplit('1.4.0a1') < VersionSplit('1.4.0'))
 
+    def test_pieces_rle(self):
+        pieces = [3, 3, 3, 2, 0, 0, 1, 3]
+        runs = encode_pieces_rle(iter(pieces))
+        self.assertEqual(runs, [(3, 3), (2, 1), (0, 2), (1, 1), (3, 1)])
+        self.assertEqual(decode_pieces_rle(runs), pieces)
+        self.assertEqual(encode_pieces_rle([]), [])
+
     def test_parse_human_size(self):
         from deluge.common import parse_human_size
 
@@ -7,6 +7,7 @@
 
 from __future__ import unicode_literals
 
+import os
 from base64 import b64encode
 from hashlib import sha1 as sha
 
@@ -154,6 +155,38 @@ def test_add_torrent_files_error_duplicate(self):
         self.assertEqual(len(errors), 1)
         self.assertTrue(str(errors[0]).startswith('Torrent already in session'))
 
+    @defer.inlineCallbacks
+    def test_add_torrents_bulk(self):
+        options = {}
+        torrents = []
+        for f in ['test.torrent', 'test_torrent.file.torrent', 'test.torrent']:
+            filename = common.get_test_data_file(f)
+            with open(filename, 'rb') as _file:
+                filedump = b64encode(_file.read())
+            torrents.append((filename, filedump, options))
+        info_hash = '60d5d82328b4547511fdeac9bf4d0112daa0ce00'
+        torrents.append((deluge.common.create_magnet_uri(info_hash), None, options))
+        torrents.append(('invalid.torrent', b64encode(b'invalid'), options))
+        torrents.append(('undecodable.torrent', 'a', options))
+
+        self.core.torrentmanager.bulk_add_batch_size = 2
+        events = []
+        self.core.eventmanager.register_event_handler(
+            'TorrentsAddedEvent', events.append
+        )
+        results = yield self.core.add_torrents_bulk(torrents)
+
+        self.assertEqual(
+            [success for success, dummy in results],
+            [True] * 2 + [False, True, False, False],
+        )
+        self.assertTrue(results[5][1].startswith('Unable to decode filedump'))
+        self.assertTrue(results[2][1].startswith('Torrent already in session'))
+        self.assertEqual(results[3][1], info_hash)
+        self.assertEqual(
+            events, [[result for dummy, result in results[:2]] + [info_hash]]
+        )
+
     @defer.inlineCallbacks
     def test_add_torrent_file(self):
         options = {}
@@ -395,6 +428,175 @@ def test_remove_torrents_invalid(self):
             val[1], ('invalidid2', 'torrent_id invalidid2 not in session.')
         )
 
+    def test_filter_torrent_ids(self):
+        torrent_id = self.add_torrent('test.torrent', paused=True)
+        filtermanager = self.core.filtermanager
+        self.assertEqual(
+            filtermanager.filter_torrent_ids({'state': 'Paused'}), [torrent_id]
+        )
+        self.assertEqual(filtermanager.filter_torrent_ids({'state': 'Seeding'}), [])
+        owner = self.core.torrentmanager[torrent_id].options['owner']
+        self.assertEqual(
+            filtermanager.filter_torrent_ids({'owner': owner, 'state': 'Paused'}),
+            [torrent_id],
+        )
+        self.core.torrentmanager[torrent_id].set_owner('other')
+        self.assertEqual(filtermanager.filter_torrent_ids({'owner': owner}), [])
+        self.assertEqual(
+            filtermanager.filter_torrent_ids({'owner': 'other'}), [torrent_id]
+        )
+
+        self.core.torrentmanager.remove(torrent_id)
+        self.assertEqual(filtermanager.filter_torrent_ids({'state': 'Paused'}), [])
+
+    def test_subscribe_torrents_status(self):
+        sent = []
+        self.patch(
+            component.get('RPCServer'),
+            'emit_event_for_session_id',
+            lambda session_id, event: sent.append(event.args),
+        )
+        torrent_id = self.add_torrent('test.torrent', paused=True)
+        subscription_id = self.core.subscribe_torrents_status(
+            {'state': 'Paused'}, ['name', 'state']
+        )
+        subscriptionmanager = self.core.subscriptionmanager
+        subscription = subscriptionmanager.subscriptions[subscription_id]
+
+        # Nothing is sent before the session is interested in the deltas.
+        subscriptionmanager.send_delta(subscription)
+        self.assertEqual(sent, [])
+        self.assertEqual(subscription.sent, {})
+        component.get('RPCServer').factory.interested_events[
+            subscription.session_id
+        ] = ['TorrentsStatusDeltaEvent']
+
+        # The full status is sent first.
+        subscriptionmanager.send_delta(subscription)
+        self.assertEqual(
+            sent.pop(),
+            [
+                subscription_id,
+                {torrent_id: {'name': 'azcvsupdater_2.6.2.jar', 'state': 'Paused'}},
+                [],
+            ],
+        )
+        # Nothing is sent without changes.
+        subscriptionmanager.send_delta(subscription)
+        self.assertEqual(sent, [])
+
+        self.core.torrentmanager.remove(torrent_id)
+        subscriptionmanager.send_delta(subscription)
+        self.assertEqual(sent.pop(), [subscription_id, {}, [torrent_id]])
+
+        self.assertTrue(self.core.unsubscribe_torrents_status(subscription_id))
+        self.assertFalse(self.core.unsubscribe_torrents_status(subscription_id))
+
+    def test_get_filter_tree_versioned(self):
+        version, tree = self.core.get_filter_tree_versioned()
+        self.assertEqual(tree, self.core.get_filter_tree())
+        self.assertEqual(self.core.get_filter_tree_versioned(version), (version, None))
+
+        torrent_id = self.add_torrent('test.torrent', paused=True)
+        new_version, tree = self.core.get_filter_tree_versioned(version)
+        self.assertNotEqual(new_version, version)
+        self.assertIn(('Paused', 1), tree['state'])
+        self.assertIn(('All', 1), tree['tracker_host'])
+
+        self.assertEqual(
+            self.core.get_filter_tree_versioned(new_version), (new_version, None)
+        )
+
+        # The version changes with the index even if the counts are the same.
+        self.core.torrentmanager.remove(torrent_id)
+        version, tree = self.core.get_filter_tree_versioned(new_version)
+        self.assertNotEqual(version, new_version)
+        self.assertEqual(tree, self.core.get_filter_tree())
+
+    def test_search_torrents(self):
+        torrent_id = self.add_torrent('test.torrent', paused=True)
+        dir_torrent_id = self.add_torrent('dir_with_6_files.torrent', paused=True)
+        filtermanager = self.core.filtermanager
+
+        self.assertEqual(
+            filtermanager.filter_torrent_ids({'keyword': 'AELITIS'}), [torrent_id]
+        )
+        self.assertEqual(
+            filtermanager.filter_torrent_ids({'keyword': '121'}), [dir_torrent_id]
+        )
+        self.assertEqual(
+            filtermanager.filter_torrent_ids({'name': 'AZCVS'}), [torrent_id]
+        )
+        self.assertEqual(filtermanager.filter_torrent_ids({'name': 'AZCVS::match'}), [])
+
+        self.core.set_torrent_options([dir_torrent_id], {'name': 'azcvs backup'})
+        self.assertEqual(
+            self.core.search_torrents('azcvs'), [(dir_torrent_id, 8), (torrent_id, 8)]
+        )
+        self.assertEqual(self.core.search_torrents('azcvs', 1), [(dir_torrent_id, 8)])
+        self.assertEqual(self.core.search_torrents('azcvs 121'), [(dir_torrent_id, 10)])
+        self.assertEqual(self.core.search_torrents('aelitis'), [(torrent_id, 4)])
+
+        self.core.torrentmanager.remove(torrent_id)
+        self.assertEqual(self.core.search_torrents('aelitis'), [])
+
+    def test_get_tracker_stats(self):
+        self.assertEqual(self.core.get_tracker_stats(), {})
+        torrent_id = self.add_torrent('test.torrent', paused=True)
+        self.assertEqual(
+            self.core.get_tracker_stats(),
+            {
+                'aelitis.com': {
+                    'torrents': 1,
+                    'errors': 0,
+                    'latency': None,
+                    'next_announce': None,
+                }
+            },
+        )
+        self.core.set_torrent_trackers(
+            torrent_id, [{'url': 'http://tracker.example.org/announce', 'tier': 0}]
+        )
+        self.assertEqual(list(self.core.get_tracker_stats()), ['example.org'])
+        self.assertEqual(
+            self.core.filtermanager.filter_torrent_ids({'tracker_host': 'example.org'}),
+            [torrent_id],
+        )
+        self.core.torrentmanager.remove(torrent_id)
+        self.assertEqual(self.core.get_tracker_stats(), {})
+
+    def test_move_storage_queued(self):
+        torrent_id = self.add_torrent('test.torrent', paused=True)
+        self.core.torrentmanager.move_scheduler.max_per_device = 0
+        dest = self.mktemp()
+        self.core.move_storage([torrent_id], dest)
+        self.assertTrue(os.path.isdir(dest))
+        status = self.core.get_torrent_status(torrent_id, ['move_queue'])
+        self.assertEqual(status['move_queue'], 0)
+        self.assertEqual(
+            [status['dest'] for status in self.core.get_move_storage_status()], [dest]
+        )
+
+        self.assertEqual(self.core.cancel_move_storage([torrent_id]), [torrent_id])
+        status = self.core.get_torrent_status(torrent_id, ['move_queue'])
+        self.assertEqual(status['move_queue'], -1)
+        self.assertEqual(self.core.get_move_storage_status(), [])
+
+    def test_force_recheck_queued(self):
+        torrent_id = self.add_torrent('test.torrent', paused=True)
+        self.core.torrentmanager.check_scheduler.max_per_device = 0
+        self.core.force_recheck([torrent_id])
+        status = self.core.get_torrent_status(torrent_id, ['check_queue', 'check_eta'])
+        self.assertEqual(status, {'check_queue': 0, 'check_eta': -1})
+        recheck_status = self.core.get_recheck_status()
+        self.assertEqual(recheck_status['throughput'], 0)
+        self.assertEqual(
+            [status['torrent_id'] for status in recheck_status['checks']], [torrent_id]
+        )
+
+        self.assertEqual(self.core.cancel_recheck([torrent_id]), [torrent_id])
+        self.assertEqual(self.core.get_recheck_status()['checks'], [])
+
     def test_get_session_status(self):
         status = self.core.get_session_status(
             ['net.recv_tracker_bytes', 'net.sent_tracker_bytes']
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+
+from __future__ import unicode_literals
+
+import os
+import tempfile
+
+from twisted.internet import defer
+from twisted.trial import unittest
+
+from deluge.core.deletionqueue import DeletionQueue
+
+
+class DeletionQueueTestCase(unittest.TestCase):
+    def setUp(self):  # NOQA: N803
+        self.path = tempfile.mkdtemp()
+        self.queue = DeletionQueue()
+
+    def write_files(self, paths):
+        for path in paths:
+            filepath = os.path.join(self.path, path)
+            if not os.path.isdir(os.path.dirname(filepath)):
+                os.makedirs(os.path.dirname(filepath))
+            with open(filepath, 'wb') as _file:
+                _file.write(b'data')
+
+    @defer.inlineCallbacks
+    def test_delete(self):
+        paths = ['torrent/a', 'torrent/sub/b', 'torrent/sub/deeper/c', 'missing']
+        self.write_files(paths[:3] + ['torrent/other'])
+
+        d = self.queue.add('id', 'torrent', self.path, paths)
+        self.assertEqual(self.queue.get_status()[0]['state'], 'Deleting')
+        self.assertTrue((yield d))
+
+        self.assertEqual(os.listdir(self.path), ['torrent'])
+        self.assertEqual(os.listdir(os.path.join(self.path, 'torrent')), ['other'])
+        self.assertEqual(self.queue.get_status(), [])
+
+    @defer.inlineCallbacks
+    def test_per_device_limit(self):
+        self.write_files(['a', 'b'])
+        d1 = self.queue.add('id1', 'a', self.path, ['a'])
+        d2 = self.queue.add('id2', 'b', self.path, ['b'])
+        self.assertEqual(
+            [status['state'] for status in self.queue.get_status()],
+            ['Deleting', 'Queued'],
+        )
+        yield defer.DeferredList([d1, d2])
+        self.assertEqual(os.listdir(self.path), [])
+
+    @defer.inlineCallbacks
+    def test_error(self):
+        # Removing a directory as a file fails.
+        self.write_files(['dir/file'])
+        self.assertFalse((yield self.queue.add('id', 'dir', self.path, ['dir'])))
+
+        status = self.queue.get_status()
+        self.assertEqual(status[0]['state'], 'Error')
+        self.assertTrue(status[0]['error'])
+        self.queue.clear_failed()
+        self.assertEqual(self.queue.get_status(), [])
+
+    @defer.inlineCallbacks
+    def test_cancel(self):
+        self.write_files(['a', 'b', 'c'])
+        d1 = self.queue.add('id1', 'a', self.path, ['a'])
+        d2 = self.queue.add('id2', 'b', self.path, ['b'])
+        d3 = self.queue.add('id3', 'c', self.path, ['c'])
+        # The torrents were added again to the session.
+        self.queue.cancel('id2')
+        self.queue.cancel('other', {os.path.join(self.path, 'c')})
+        self.assertEqual(list(self.queue.jobs), ['id1'])
+
+        self.assertEqual((yield d2), False)
+        self.assertEqual((yield d3), False)
+        self.assertTrue((yield d1))
+        self.assertEqual(sorted(os.listdir(self.path)), ['b', 'c'])
+
+    @defer.inlineCallbacks
+    def test_wait(self):
+        self.write_files(['a', 'b'])
+        self.queue.add('id1', 'a', self.path, ['a'])
+        self.queue.add('id2', 'b', self.path, ['b'])
+        yield self.queue.wait()
+        self.assertEqual(self.queue.get_status(), [])
+        self.assertEqual(os.listdir(self.path), [])
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+
+from __future__ import unicode_literals
+
+from twisted.trial import unittest
+
+from deluge.core.filtermanager import FilterIndex
+
+
+class FilterIndexTestCase(unittest.TestCase):
+    def setUp(self):  # NOQA: N803
+        self.states = {'id1': 'Seeding', 'id2': 'Paused', 'id3': 'Seeding'}
+        self.index = FilterIndex({'state': lambda t_id: self.states[t_id]})
+        for torrent_id in self.states:
+            self.index.add(torrent_id)
+
+    def test_get_torrent_ids(self):
+        self.assertEqual(
+            self.index.get_torrent_ids('state', ['Seeding']), {'id1', 'id3'}
+        )
+        self.assertEqual(
+            self.index.get_torrent_ids('state', ['Seeding', 'Paused']),
+            {'id1', 'id2', 'id3'},
+        )
+        self.assertEqual(self.index.get_torrent_ids('state', ['Queued']), set())
+
+    def test_mark_dirty(self):
+        self.index.get_torrent_ids('state', ['Seeding'])
+        self.states['id1'] = 'Paused'
+        # Value is not re-evaluated until marked as changed.
+        self.assertEqual(
+            self.index.get_torrent_ids('state', ['Seeding']), {'id1', 'id3'}
+        )
+        self.index.mark_dirty('id1', ['state'])
+        self.assertEqual(self.index.get_torrent_ids('state', ['Seeding']), {'id3'})
+        self.assertEqual(
+            self.index.get_torrent_ids('state', ['Paused']), {'id1', 'id2'}
+        )
+
+    def test_remove(self):
+        self.index.remove('id3')
+        del self.states['id3']
+        self.assertEqual(self.index.get_torrent_ids('state', ['Seeding']), {'id1'})
+        self.assertIsNone(self.index.get_value('state', 'id3'))
+
+    def test_removed_torrent_value_error(self):
+        del self.states['id2']
+        self.assertEqual(self.index.get_torrent_ids('state', ['Paused']), set())
+
+    def test_register_field(self):
+        owners = {'id1': 'user', 'id2': 'admin', 'id3': 'user'}
+        self.index.register_field('owner', owners.get)
+        self.assertIn('owner', self.index)
+        self.assertEqual(self.index.get_torrent_ids('owner', ['user']), {'id1', 'id3'})
+        self.index.deregister_field('owner')
+        self.assertNotIn('owner', self.index)
+
+    def test_get_counts(self):
+        self.assertEqual(self.index.get_counts('state'), {'Seeding': 2, 'Paused': 1})
+        self.assertEqual(
+            self.index.get_counts('state', {'id1', 'id2'}), {'Seeding': 1, 'Paused': 1}
+        )
+        self.states['id2'] = 'Seeding'
+        self.index.mark_dirty('id2')
+        self.assertEqual(self.index.get_counts('state'), {'Seeding': 3})
+
+    def test_get_changes(self):
+        changes = self.index.get_changes()
+        self.assertEqual(self.index.get_changes(), changes)
+        # Marking a torrent dirty is not a change unless its value differs.
+        self.index.mark_dirty('id1')
+        self.assertEqual(self.index.get_changes(), changes)
+        self.states['id1'] = 'Paused'
+        self.index.mark_dirty('id1')
+        self.assertGreater(self.index.get_changes(), changes)
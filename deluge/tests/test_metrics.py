@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+
+from __future__ import unicode_literals
+
+from base64 import b64encode
+
+import twisted.web.client
+from twisted.internet import defer, reactor
+from twisted.web.client import Agent
+
+import deluge.component as component
+from deluge.core.core import Core
+from deluge.core.metrics import Summary, format_metrics
+from deluge.core.rpcserver import RPCServer
+from deluge.event import SessionPausedEvent
+
+from . import common
+from .basetest import BaseTestCase
+
+
+class MetricsTestCase(BaseTestCase):
+    def set_up(self):
+        common.set_tmp_config_dir()
+        self.rpcserver = RPCServer(listen=False)
+        self.core = Core()
+        self.core.config.config['lsd'] = False
+        self.core.config.config['metrics_port'] = 0
+        self.metricsmanager = self.core.metricsmanager
+        return component.start()
+
+    def tear_down(self):
+        def on_shutdown(result):
+            del self.rpcserver
+            del self.core
+
+        return component.shutdown().addCallback(on_shutdown)
+
+    def add_torrent(self, filename):
+        filepath = common.get_test_data_file(filename)
+        with open(filepath, 'rb') as _file:
+            filedump = b64encode(_file.read())
+        return self.core.add_torrent_file(filename, filedump, {'add_paused': True})
+
+    def test_format_metrics(self):
+        summary = Summary()
+        summary.observe(0.5)
+        summary.observe(1.5)
+        families = [
+            ('a_total', 'counter', 'A counter', [('', None, 3)]),
+            (
+                'b_seconds',
+                'summary',
+                'A summary',
+                [
+                    ('_count', {'name': 'x"y'}, summary.count),
+                    ('_sum', {'name': 'x"y'}, summary.total),
+                ],
+            ),
+        ]
+        self.assertEqual(
+            format_metrics(families),
+            '# HELP a_total A counter\n'
+            '# TYPE a_total counter\n'
+            'a_total 3\n'
+            '# HELP b_seconds A summary\n'
+            '# TYPE b_seconds summary\n'
+            'b_seconds_count{name="x\\"y"} 2\n'
+            'b_seconds_sum{name="x\\"y"} 2.0\n',
+        )
+        self.assertEqual(summary.max, 1.5)
+
+    def test_render(self):
+        self.add_torrent('test.torrent')
+        self.core.eventmanager.emitted.clear()
+        self.core.eventmanager.emit(SessionPausedEvent())
+        self.core.torrentmanager.save_durations['state'].observe(0.25)
+
+        metrics = self.metricsmanager.render()
+        self.assertIn('# TYPE libtorrent_net_sent_bytes counter\n', metrics)
+        self.assertIn('# TYPE libtorrent_peer_num_peers_connected gauge\n', metrics)
+        self.assertIn('deluge_torrents{state="Paused"} 1\n', metrics)
+        self.assertIn('deluge_alert_queue_depth ', metrics)
+        self.assertIn(
+            'deluge_events_emitted_total{event="SessionPausedEvent"} 1\n', metrics
+        )
+        self.assertIn('deluge_save_seconds_count{data="state"} 1\n', metrics)
+        self.assertIn('deluge_save_seconds_max{data="state"} 0.25\n', metrics)
+
+    def test_render_collector(self):
+        def collector():
+            return [('plugin_value', 'gauge', 'A plugin value', [('', None, 7)])]
+
+        def failing_collector():
+            raise ValueError('Collector error')
+
+        self.metricsmanager.register_collector(collector)
+        self.metricsmanager.register_collector(failing_collector)
+        self.assertIn('plugin_value 7\n', self.metricsmanager.render())
+        self.metricsmanager.deregister_collector(collector)
+        self.assertNotIn('plugin_value', self.metricsmanager.render())
+
+    def test_rpc_metrics(self):
+        protocol = self.rpcserver.factory.protocol()
+        protocol.factory = self.rpcserver.factory
+        protocol.transport = protocol
+        protocol.sessionno = 'session'
+        self.rpcserver.factory.authorized_sessions['session'] = protocol.AuthLevel(
+            10, 'localclient'
+        )
+        self.rpcserver.register_object(self.core)
+
+        protocol.call_method('core.get_free_space', [], {})
+        self.assertRaises(
+            Exception, protocol.call_method, 'core.get_torrent_status', [], {}
+        )
+        metrics = self.metricsmanager.render()
+        self.assertIn(
+            'deluge_rpc_request_seconds_count{method="core.get_free_space"} 1\n',
+            metrics,
+        )
+        self.assertIn(
+            'deluge_rpc_errors_total{method="core.get_torrent_status"} 1\n', metrics
+        )
+        self.assertNotIn(
+            'deluge_rpc_errors_total{method="core.get_free_space"}', metrics
+        )
+
+    @defer.inlineCallbacks
+    def test_endpoint(self):
+        self.assertIsNone(self.metricsmanager.port)
+        self.core.config.config['metrics_enabled'] = True
+        self.metricsmanager.listen()
+        port = self.metricsmanager.port.getHost().port
+
+        response = yield Agent(reactor).request(
+            b'GET', b'http://127.0.0.1:%d/metrics' % port
+        )
+        body = yield twisted.web.client.readBody(response)
+        self.assertEqual(response.code, 200)
+        self.assertIn(b'text/plain', response.headers.getRawHeaders(b'Content-Type')[0])
+        self.assertIn(b'deluge_alert_queue_depth', body)
+
+        self.core.config.config['metrics_enabled'] = False
+        self.metricsmanager.listen()
+        self.assertIsNone(self.metricsmanager.port)
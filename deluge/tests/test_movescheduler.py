@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+
+from __future__ import unicode_literals
+
+import tempfile
+
+from twisted.trial import unittest
+
+from deluge.core.movescheduler import MoveScheduler
+
+
+class MoveSchedulerTestCase(unittest.TestCase):
+    def setUp(self):  # NOQA: N803
+        self.started = []
+        self.scheduler = MoveScheduler(self.start_move)
+        self.source = tempfile.mkdtemp()
+        self.dest = tempfile.mkdtemp()
+
+    def start_move(self, torrent_id, dest):
+        self.started.append(torrent_id)
+        return torrent_id != 'fail'
+
+    def test_max_per_device(self):
+        self.scheduler.add_move('id1', self.source, self.dest, 300)
+        self.scheduler.add_move('id2', self.source, self.dest, 200)
+        self.scheduler.add_move('id3', self.source, self.dest, 100)
+        self.assertEqual(self.started, ['id1'])
+        # The smallest queued moves are first.
+        self.assertEqual(self.scheduler.get_position('id3'), 0)
+        self.assertEqual(self.scheduler.get_position('id2'), 1)
+        self.assertEqual(self.scheduler.get_position('id1'), -1)
+        self.assertEqual(
+            [status['torrent_id'] for status in self.scheduler.get_status()],
+            ['id1', 'id3', 'id2'],
+        )
+
+        self.scheduler.on_done('id1')
+        self.assertEqual(self.started, ['id1', 'id3'])
+        self.scheduler.on_done('id3')
+        self.scheduler.on_done('id2')
+        self.assertEqual(self.started, ['id1', 'id3', 'id2'])
+        self.assertEqual(self.scheduler.get_status(), [])
+
+    def test_no_limit(self):
+        self.scheduler.max_per_device = -1
+        self.scheduler.add_move('id1', self.source, self.dest, 300)
+        self.scheduler.add_move('id2', self.source, self.dest, 200)
+        self.assertEqual(self.started, ['id1', 'id2'])
+
+    def test_failed_start(self):
+        self.scheduler.add_move('fail', self.source, self.dest, 100)
+        self.scheduler.add_move('id1', self.source, self.dest, 300)
+        self.assertEqual(self.started, ['fail', 'id1'])
+
+    def test_set_priority(self):
+        self.scheduler.add_move('id1', self.source, self.dest, 300)
+        self.scheduler.add_move('id2', self.source, self.dest, 200)
+        self.scheduler.add_move('id3', self.source, self.dest, 100)
+        self.assertTrue(self.scheduler.set_priority('id2', 1))
+        self.assertFalse(self.scheduler.set_priority('id1', 1))
+        self.assertEqual(self.scheduler.get_position('id2'), 0)
+        self.assertEqual(self.scheduler.get_position('id3'), 1)
+        self.assertTrue(self.scheduler.set_priority('id3', 2))
+        self.assertEqual(self.scheduler.get_position('id3'), 0)
+        self.assertEqual(self.scheduler.get_position('id2'), 1)
+        self.scheduler.on_done('id1')
+        self.assertEqual(self.started, ['id1', 'id3'])
+
+    def test_cancel(self):
+        self.scheduler.add_move('id1', self.source, self.dest, 300)
+        self.scheduler.add_move('id2', self.source, self.dest, 200)
+        self.scheduler.add_move('id3', self.source, self.dest, 100)
+        self.assertEqual(self.scheduler.get_position('id2'), 1)
+        self.assertFalse(self.scheduler.cancel('id1'))
+        self.assertTrue(self.scheduler.cancel('id3'))
+        self.assertEqual(self.scheduler.get_position('id2'), 0)
+        self.assertTrue(self.scheduler.cancel('id2'))
+        self.assertFalse(self.scheduler.cancel('id2'))
+        self.scheduler.on_done('id1')
+        self.assertEqual(self.started, ['id1'])
+
+    def test_move_again_while_moving(self):
+        self.scheduler.max_per_device = 2
+        self.scheduler.add_move('id1', self.source, self.dest, 300)
+        self.scheduler.add_move('id1', self.dest, self.source, 300)
+        self.assertEqual(self.started, ['id1'])
+        self.assertEqual(self.scheduler.get_position('id1'), 0)
+        self.scheduler.on_done('id1')
+        self.assertEqual(self.started, ['id1', 'id1'])
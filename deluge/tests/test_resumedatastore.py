@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+
+from __future__ import unicode_literals
+
+import os
+import tempfile
+
+from twisted.trial import unittest
+
+from deluge.core.resumedatastore import ResumeDataStore
+
+
+class ResumeDataStoreTestCase(unittest.TestCase):
+    def setUp(self):  # NOQA: N803
+        self.path = os.path.join(tempfile.mkdtemp(), 'resume')
+        self.store = ResumeDataStore(self.path, cache_size=2)
+
+    def test_flush(self):
+        self.assertFalse(self.store.exists())
+        self.store['a' * 40] = b'resume_a'
+        self.store['b' * 40] = b'resume_b'
+        self.assertTrue(self.store.is_dirty())
+        self.assertEqual(self.store['a' * 40], b'resume_a')
+        self.assertTrue(self.store.flush())
+        self.assertFalse(self.store.is_dirty())
+        self.assertEqual(
+            sorted(os.listdir(self.path)),
+            ['a' * 40 + '.fastresume', 'b' * 40 + '.fastresume'],
+        )
+
+        store = ResumeDataStore(self.path)
+        self.assertTrue(store.exists())
+        self.assertIn('a' * 40, store)
+        self.assertEqual(store.get('b' * 40), b'resume_b')
+        self.assertNotIn('c' * 40, store)
+        self.assertIsNone(store.get('c' * 40))
+        self.assertRaises(KeyError, store.__getitem__, 'c' * 40)
+
+    def test_pop(self):
+        self.store['a' * 40] = b'resume_a'
+        self.store.flush()
+        self.store.pop('a' * 40)
+        self.assertNotIn('a' * 40, self.store)
+        self.assertTrue(
+            os.path.isfile(os.path.join(self.path, 'a' * 40 + '.fastresume'))
+        )
+        self.store.flush()
+        self.assertEqual(os.listdir(self.path), [])
+
+    def test_cache_size(self):
+        for torrent_id in ('a' * 40, 'b' * 40, 'c' * 40):
+            self.store[torrent_id] = torrent_id.encode()
+        self.store.flush()
+        self.assertEqual(list(self.store._cache), ['b' * 40, 'c' * 40])
+        self.assertEqual(self.store.get('a' * 40), b'a' * 40)
+        self.assertEqual(list(self.store._cache), ['c' * 40, 'a' * 40])
+
+    def test_flush_failed(self):
+        # The directory cannot be created where a file exists.
+        with open(self.path, 'wb'):
+            pass
+        self.store['a' * 40] = b'resume_a'
+        self.assertFalse(self.store.flush())
+        self.assertTrue(self.store.is_dirty())
+        self.assertEqual(self.store.get('a' * 40), b'resume_a')
+
+        os.remove(self.path)
+        self.assertTrue(self.store.flush())
+        self.assertFalse(self.store.is_dirty())
+        self.assertEqual(ResumeDataStore(self.path).get('a' * 40), b'resume_a')
@@ -9,12 +9,14 @@
 
 from __future__ import unicode_literals
 
+from twisted.internet import defer
+
 import deluge.component as component
 import deluge.error
 from deluge.common import get_localhost_auth
 from deluge.core import rpcserver
-from deluge.core.authmanager import AuthManager
-from deluge.core.rpcserver import DelugeRPCProtocol, RPCServer
+from deluge.core.authmanager import AUTH_LEVEL_NORMAL, AuthManager
+from deluge.core.rpcserver import DelugeRPCProtocol, RPCServer, export
 from deluge.log import setup_logger
 
 from .basetest import BaseTestCase
@@ -30,6 +32,20 @@ def transfer_message(self, data):
         self.messages.append(data)
 
 
+class BatchTester(object):
+    @export
+    def echo(self, value):
+        return value
+
+    @export
+    def echo_deferred(self, value):
+        return defer.succeed(value)
+
+    @export(rpcserver.AUTH_LEVEL_ADMIN)
+    def admin_only(self):
+        return True
+
+
 class RPCServerTestCase(BaseTestCase):
     def set_up(self):
         self.rpcserver = RPCServer(listen=False)
@@ -81,6 +97,21 @@ def test_valid_client_login(self):
         self.assertEqual(msg[1], self.request_id, str(msg))
         self.assertEqual(msg[2], rpcserver.AUTH_LEVEL_ADMIN, str(msg))
 
+    def test_client_login_compression(self):
+        self.authmanager = AuthManager()
+        auth = get_localhost_auth()
+        self.assertEqual(self.protocol.get_compression(), 'zlib')
+        self.protocol.dispatch(
+            self.request_id,
+            'daemon.login',
+            auth,
+            {'client_version': 'Test', 'compression': ['unknown', ['zlib', 1], 'none']},
+        )
+        msg = self.protocol.messages.pop()
+        self.assertEqual(msg[0], rpcserver.RPC_RESPONSE, str(msg))
+        self.assertEqual(self.protocol.get_compression(), 'zlib')
+        self.assertEqual(self.protocol._compression_level, 1)
+
     def test_client_login_error(self):
         # This test causes error log prints while running the test...
         self.protocol.transport = None  # This should cause AttributeError
@@ -111,3 +142,26 @@ def test_daemon_info(self):
         self.assertEqual(msg[0], rpcserver.RPC_RESPONSE, str(msg))
         self.assertEqual(msg[1], self.request_id, str(msg))
         self.assertEqual(msg[2], deluge.common.get_version(), str(msg))
+
+    def test_daemon_batch(self):
+        self.rpcserver.register_object(BatchTester(), 'tester')
+        self.factory.authorized_sessions[self.session_id] = self.protocol.AuthLevel(
+            AUTH_LEVEL_NORMAL, 'user'
+        )
+        calls = [
+            ('tester.echo', [1], {}),
+            ('tester.echo_deferred', [], {'value': 2}),
+            ('tester.admin_only', [], {}),
+            ('tester.invalid', [], {}),
+        ]
+        self.protocol.dispatch(self.request_id, 'daemon.batch', [calls], {})
+        msg = self.protocol.messages.pop()
+        self.assertEqual(msg[0], rpcserver.RPC_RESPONSE, str(msg))
+        self.assertEqual(msg[1], self.request_id, str(msg))
+        results = msg[2]
+        self.assertEqual(results[:2], [(True, 1), (True, 2)])
+        self.assertFalse(results[2][0])
+        self.assertEqual(results[2][1][0], 'NotAuthorizedError')
+        self.assertFalse(results[3][0])
+        self.assertEqual(results[3][1][0], 'WrappedException')
+        self.assertEqual(results[3][1][1][1], 'AttributeError')
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+
+from __future__ import unicode_literals
+
+from twisted.trial import unittest
+
+from deluge.core.searchindex import SearchIndex, get_trigrams
+
+
+class SearchIndexTestCase(unittest.TestCase):
+    def setUp(self):  # NOQA: N803
+        self.names = {'id1': 'Ubuntu Desktop', 'id2': 'Debian', 'id3': 'Ubuntu Server'}
+        self.files = {
+            'id1': ['ubuntu/desktop.iso'],
+            'id2': ['debian/netinst.iso', 'debian/README'],
+            'id3': [],
+        }
+        self.index = SearchIndex(
+            {
+                'name': lambda t_id: self.names[t_id],
+                'files': lambda t_id: self.files[t_id],
+            }
+        )
+        for torrent_id in self.names:
+            self.index.add(torrent_id)
+
+    def test_get_trigrams(self):
+        self.assertEqual(get_trigrams('abcd'), {'abc', 'bcd'})
+        self.assertEqual(get_trigrams('ab'), set())
+
+    def test_search(self):
+        self.assertEqual(self.index.search('UBUNTU'), {'id1', 'id3'})
+        self.assertEqual(self.index.search('tu d'), {'id1'})
+        self.assertEqual(self.index.search('iso'), {'id1', 'id2'})
+        self.assertEqual(self.index.search('iso', ['name']), set())
+        self.assertEqual(self.index.search('readme', ['files']), {'id2'})
+        self.assertEqual(self.index.search('xyz'), set())
+
+    def test_search_short_term(self):
+        self.assertEqual(self.index.search('de', ['name']), {'id1', 'id2'})
+        self.assertEqual(self.index.search('', ['name']), {'id1', 'id2', 'id3'})
+
+    def test_mark_dirty(self):
+        self.index.search('debian')
+        self.names['id2'] = 'Fedora'
+        # Text is not re-indexed until marked as changed.
+        self.assertEqual(self.index.search('fedora'), set())
+        self.index.mark_dirty('id2', ['name'])
+        self.assertEqual(self.index.search('fedora'), {'id2'})
+        self.assertEqual(self.index.search('debian', ['name']), set())
+        self.assertEqual(self.index.search('debian'), {'id2'})
+
+    def test_remove(self):
+        self.index.remove('id3')
+        del self.names['id3']
+        self.assertEqual(self.index.search('ubuntu'), {'id1'})
+        self.assertEqual(self.index.get_texts('name', 'id3'), ())
+
+    def test_removed_torrent_text_error(self):
+        del self.names['id2']
+        self.assertEqual(self.index.search('debian', ['name']), set())
+
+    def test_register_field(self):
+        labels = {'id1': 'linux', 'id2': 'Linux', 'id3': None}
+        self.index.register_field('label', labels.get)
+        self.assertIn('label', self.index)
+        self.assertEqual(self.index.search('linux', ['label']), {'id1', 'id2'})
+        self.index.deregister_field('label')
+        self.assertNotIn('label', self.index)
+        self.assertEqual(self.index.search('linux'), set())
+
+    def test_get_score(self):
+        self.assertEqual(self.index.get_score('debian', 'name', 'id2'), 3)
+        self.assertEqual(self.index.get_score('desk', 'name', 'id1'), 2)
+        self.assertEqual(self.index.get_score('netinst', 'files', 'id2'), 2)
+        self.assertEqual(self.index.get_score('buntu', 'name', 'id1'), 1)
+        self.assertEqual(self.index.get_score('fedora', 'name', 'id1'), 0)
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+
+from __future__ import unicode_literals
+
+from twisted.internet import task
+from twisted.trial import unittest
+
+from deluge.core.seedgoals import SeedGoals, time_to_goal
+
+OPTIONS = {
+    'stop_at_ratio': False,
+    'stop_ratio': 2.0,
+    'stop_at_seed_time': False,
+    'stop_seed_time': 60.0,
+    'stop_at_idle_time': False,
+    'stop_idle_time': 10.0,
+}
+
+
+class FakeTorrent(object):
+    def __init__(self, torrent_id, **options):
+        self.torrent_id = torrent_id
+        self.is_finished = True
+        self.state = 'Seeding'
+        self.options = dict(OPTIONS, **options)
+        self.status = {
+            'total_done': 100,
+            'total_uploaded': 0,
+            'upload_payload_rate': 0,
+            'seeding_time': 0,
+            'time_since_upload': -1,
+        }
+
+    def get_status(self, keys, update=False):
+        return {key: self.status[key] for key in keys}
+
+
+class SeedGoalsTestCase(unittest.TestCase):
+    def setUp(self):  # NOQA: N803
+        self.torrents = {}
+        self.reached = []
+        self.goals = SeedGoals(self.torrents, self.reached.append)
+        self.clock = task.Clock()
+        self.goals.clock = self.clock
+
+    def add(self, torrent):
+        self.torrents[torrent.torrent_id] = torrent
+        self.goals.schedule(torrent.torrent_id)
+        return torrent
+
+    def test_time_to_goal(self):
+        status = FakeTorrent('a').status
+        self.assertIsNone(time_to_goal(OPTIONS, status, 60))
+
+        options = dict(OPTIONS, stop_at_ratio=True)
+        self.assertEqual(time_to_goal(options, status, 60), 60)
+        status['upload_payload_rate'] = 10
+        self.assertEqual(time_to_goal(options, status, 600), 20)
+        status['total_uploaded'] = 200
+        self.assertEqual(time_to_goal(options, status, 60), 0)
+
+        options = dict(OPTIONS, stop_at_seed_time=True, stop_at_idle_time=True)
+        status['seeding_time'] = 300
+        self.assertEqual(time_to_goal(options, status, 60), 300)
+        status['time_since_upload'] = 30
+        self.assertEqual(time_to_goal(options, status, 60), 570)
+
+    def test_goals_reached_together(self):
+        ratio = self.add(FakeTorrent('a', stop_at_ratio=True))
+        ratio.status['upload_payload_rate'] = 10
+        seed_time = self.add(FakeTorrent('b', stop_at_seed_time=True))
+        self.add(FakeTorrent('c'))
+        self.clock.advance(0)
+        self.assertEqual(self.reached, [])
+
+        # Only the torrents with goals are scheduled, for their projected time.
+        self.assertEqual(sorted(self.goals._due), ['a', 'b'])
+        self.assertEqual(len(self.clock.getDelayedCalls()), 1)
+        self.assertEqual(self.clock.getDelayedCalls()[0].getTime(), 20)
+
+        ratio.status['total_uploaded'] = 50
+        self.clock.advance(20)
+        self.assertEqual(self.reached, [])
+        ratio.status['total_uploaded'] = 200
+        seed_time.status['seeding_time'] = 3600
+        self.clock.advance(60)
+        self.assertEqual(self.reached, [[ratio]])
+        self.clock.advance(3600)
+        self.assertEqual(self.reached, [[ratio], [seed_time]])
+        self.assertEqual(self.clock.getDelayedCalls(), [])
+
+    def test_inactive_and_unscheduled(self):
+        paused = self.add(FakeTorrent('a', stop_at_seed_time=True))
+        paused.state = 'Paused'
+        removed = self.add(FakeTorrent('b', stop_at_seed_time=True))
+        self.goals.unschedule(removed.torrent_id)
+        self.clock.advance(0)
+        self.assertEqual(self.goals._due, {})
+        self.assertEqual(self.clock.getDelayedCalls(), [])
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+
+from __future__ import unicode_literals
+
+import os
+import tempfile
+
+from twisted.trial import unittest
+
+from deluge.core.statejournal import RECORD_HEADER, StateJournal
+from deluge.core.torrentmanager import TorrentState
+
+
+class StateJournalTestCase(unittest.TestCase):
+    def setUp(self):  # NOQA: N803
+        self.path = os.path.join(tempfile.mkdtemp(), 'torrents.journal')
+        self.journal = StateJournal(self.path, shards=4)
+
+    def states(self, count, **kwargs):
+        return {
+            '%040x' % index: TorrentState('%040x' % index, **kwargs)
+            for index in range(count)
+        }
+
+    def test_write_load(self):
+        self.assertFalse(self.journal.exists())
+        states = self.states(10)
+        self.journal.write(states)
+        self.assertTrue(self.journal.exists())
+
+        changed = {'%040x' % 3: TorrentState('%040x' % 3, paused=True)}
+        self.journal.write(changed, removed=['%040x' % 5])
+        states.update(changed)
+        del states['%040x' % 5]
+        self.assertEqual(StateJournal(self.path, shards=4).load(), states)
+
+    def test_compact(self):
+        self.journal.min_compact_records = 0
+        states = self.states(20)
+        for dummy in range(3):
+            self.journal.write(states)
+        for shard in self.journal.shards:
+            self.assertEqual(shard.records, 0)
+        self.assertEqual(StateJournal(self.path, shards=4).load(), states)
+
+    def test_replace(self):
+        self.journal.write(self.states(10))
+        states = self.states(3, paused=True)
+        self.journal.replace(states)
+        self.assertEqual(StateJournal(self.path, shards=4).load(), states)
+
+    def test_truncated_record(self):
+        states = self.states(1)
+        self.journal.write(states)
+        shard = self.journal._shard('%040x' % 0)
+        with open(shard.journal_path, 'ab') as _file:
+            _file.write(b'\x00\x00\x01\x00partial')
+
+        journal = StateJournal(self.path, shards=4)
+        self.assertEqual(journal.load(), states)
+        changed = self.states(1, paused=True)
+        journal.write(changed)
+        self.assertEqual(StateJournal(self.path, shards=4).load(), changed)
+
+    def test_incompatible_record(self):
+        states = self.states(1)
+        self.journal.write(states)
+        shard = self.journal._shard('%040x' % 0)
+        # A record of a class that no longer exists.
+        data = b'\x80\x02cdeluge.core.torrentmanager\nMissingState\nq\x00.'
+        with open(shard.journal_path, 'ab') as _file:
+            _file.write(RECORD_HEADER.pack(len(data)) + data)
+
+        self.assertEqual(StateJournal(self.path, shards=4).load(), states)
+
+    def test_bad_shard(self):
+        states = self.states(20)
+        self.journal.write(states)
+        bad_shard = self.journal._shard('%040x' % 0)
+        bad_shard.compact()
+        with open(bad_shard.snapshot_path, 'wb') as _file:
+            _file.write(b'corrupt')
+
+        journal = StateJournal(self.path, shards=4)
+        index = self.journal.shards.index(bad_shard)
+        good_states = {
+            torrent_id: state
+            for torrent_id, state in states.items()
+            if self.journal._shard(torrent_id) is not bad_shard
+        }
+        self.assertEqual(journal.load(), good_states)
+        self.assertEqual(list(journal.load_errors), [index])
+
+        journal.reset_shard(index)
+        self.assertEqual(StateJournal(self.path, shards=4).load(), good_states)
+
+    def test_queue(self):
+        self.assertIsNone(self.journal.load_queue())
+        queue = ['%040x' % index for index in (2, 0, 1)]
+        self.journal.write_queue(queue)
+        self.assertIn(self.journal.queue_path, self.journal.filepaths())
+        self.assertEqual(StateJournal(self.path, shards=4).load_queue(), queue)
+
+        with open(self.journal.queue_path, 'wb') as _file:
+            _file.write(b'corrupt')
+        self.assertIsNone(self.journal.load_queue())
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+
+from __future__ import unicode_literals
+
+import mock
+from twisted.internet import task
+from twisted.trial import unittest
+
+from deluge.core.statusrefresher import StatusRefresher
+
+
+class StatusRefresherTestCase(unittest.TestCase):
+    def setUp(self):  # NOQA: N803
+        self.session = mock.Mock()
+        self.refresher = StatusRefresher(self.session)
+        self.clock = task.Clock()
+        self.refresher.clock = self.clock
+
+    def test_coalesce(self):
+        first = []
+        self.refresher.refresh().addCallback(first.append)
+        self.assertEqual(self.session.post_torrent_updates.call_count, 1)
+
+        # The requests while the refresh is in flight share the next refresh.
+        results = []
+        for dummy in range(3):
+            self.refresher.refresh(0).addCallback(results.append)
+        self.assertEqual(self.session.post_torrent_updates.call_count, 1)
+
+        self.refresher.on_refreshed()
+        self.assertEqual(first, [None])
+        self.assertEqual(results, [])
+        self.assertEqual(self.session.post_torrent_updates.call_count, 2)
+
+        self.refresher.on_refreshed()
+        self.assertEqual(results, [None] * 3)
+        self.assertEqual(self.session.post_torrent_updates.call_count, 2)
+
+        stats = self.refresher.get_stats()
+        self.assertEqual(stats['refreshes'], 2)
+        self.assertEqual(stats['requests'], 4)
+        self.assertEqual(stats['requests_per_refresh'], 2)
+
+    def test_max_age(self):
+        self.refresher.refresh()
+        self.refresher.on_refreshed()
+
+        # The recent refresh is fresh enough for the default max_age.
+        results = []
+        self.refresher.refresh().addCallback(results.append)
+        self.assertEqual(results, [None])
+        self.assertEqual(self.refresher.get_stats()['requests_cached'], 1)
+
+        self.refresher.refresh(max_age=0)
+        self.assertEqual(self.session.post_torrent_updates.call_count, 2)
+
+    def test_lost_refresh(self):
+        results = []
+        self.refresher.refresh().addCallback(results.append)
+        self.refresher.refresh(0).addCallback(results.append)
+        self.clock.advance(self.refresher.timeout)
+        # The first request is answered and the next refresh is posted.
+        self.assertEqual(results, [None])
+        self.assertEqual(self.session.post_torrent_updates.call_count, 2)
+
+        self.refresher.on_refreshed()
+        self.assertEqual(results, [None] * 2)
+        self.assertFalse(self.clock.getDelayedCalls())
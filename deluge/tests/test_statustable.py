@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+
+from __future__ import print_function, unicode_literals
+
+import time
+
+from twisted.trial import unittest
+
+from deluge.core.statustable import COLUMNS, StatusTable
+from deluge.core.torrent import Torrent
+
+from . import common
+
+
+class FakeStatus(object):
+    """Stand-in for a libtorrent torrent_status with numeric attributes."""
+
+    def __init__(self, seed):
+        for attr in (
+            'active_time',
+            'seeding_time',
+            'finished_time',
+            'all_time_download',
+            'all_time_upload',
+            'download_payload_rate',
+            'upload_payload_rate',
+            'num_peers',
+            'num_seeds',
+            'num_complete',
+            'num_incomplete',
+            'seed_rank',
+            'added_time',
+            'total_done',
+            'total_payload_download',
+            'total_payload_upload',
+            'total_wanted',
+            'total_wanted_done',
+            'queue_position',
+            'completed_time',
+            'last_seen_complete',
+            'time_since_download',
+            'time_since_upload',
+        ):
+            setattr(self, attr, seed)
+        self.num_peers = seed * 2
+        self.total_wanted = seed * 3
+        self.distributed_copies = seed / 2
+
+
+def fake_torrent(torrent_id, status):
+    """Create a Torrent using the status functions without a libtorrent handle."""
+    torrent = Torrent.__new__(Torrent)
+    torrent.torrent_id = torrent_id
+    torrent.status = status
+    torrent.prev_status = {}
+    torrent._create_status_funcs()
+    return torrent
+
+
+class StatusTableTestCase(unittest.TestCase):
+    def setUp(self):  # NOQA: N803
+        self.table = StatusTable()
+        for seed in range(3):
+            self.table.add('id%d' % seed, FakeStatus(seed))
+
+    def test_columns(self):
+        self.assertEqual(len(self.table.columns), len(COLUMNS))
+        self.assertIn('total_done', self.table)
+        self.assertNotIn('name', self.table)
+
+    def test_get_status(self):
+        self.assertEqual(
+            self.table.get_status(['id2', 'id1'], ['num_peers', 'total_remaining']),
+            [
+                {'num_peers': 2, 'total_remaining': 4},
+                {'num_peers': 1, 'total_remaining': 2},
+            ],
+        )
+        self.assertEqual(
+            self.table.get_status(['id0'], ['seeds_peers_ratio']),
+            [{'seeds_peers_ratio': -1.0}],
+        )
+
+    def test_update(self):
+        self.table.update('id1', FakeStatus(10))
+        self.assertEqual(self.table.get_value('id1', 'total_done'), 10)
+        self.assertEqual(self.table.get_value('id2', 'total_done'), 2)
+
+    def test_remove(self):
+        self.table.remove('id0')
+        self.assertEqual(len(self.table), 2)
+        self.assertEqual(self.table.get_value('id2', 'total_done'), 2)
+        self.assertEqual(self.table.get_value('id1', 'total_done'), 1)
+        self.table.remove('id1')
+        self.assertEqual(self.table.torrent_ids, ['id2'])
+        self.assertEqual(self.table.get_value('id2', 'total_done'), 2)
+
+    def test_matches_status_funcs(self):
+        status = FakeStatus(3)
+        self.table.add('id3', status)
+        keys = [key for key, dummy, dummy in COLUMNS]
+        self.assertEqual(
+            self.table.get_status(['id3'], keys)[0],
+            fake_torrent('id3', status).get_status(keys),
+        )
+
+    def test_rows_after_removals(self):
+        table = StatusTable()
+        statuses = {'%040x' % seed: FakeStatus(seed) for seed in range(30)}
+        for torrent_id, status in sorted(statuses.items()):
+            table.add(torrent_id, status)
+        for torrent_id in sorted(statuses)[::3]:
+            table.remove(torrent_id)
+            del statuses[torrent_id]
+        for torrent_id in sorted(statuses)[::4]:
+            statuses[torrent_id] = FakeStatus(100)
+            table.update(torrent_id, statuses[torrent_id])
+
+        keys = [key for key, dummy, dummy in COLUMNS]
+        torrent_ids = sorted(statuses)
+        self.assertEqual(
+            table.get_status(torrent_ids, keys),
+            [
+                fake_torrent(torrent_id, statuses[torrent_id]).get_status(keys)
+                for torrent_id in torrent_ids
+            ],
+        )
+
+    @common.benchmark
+    def test_benchmark(self):
+        """Compare status table reads to status_funcs with 10k torrents."""
+        num_torrents = 10000
+        keys = [key for key, dummy, dummy in COLUMNS]
+        table = StatusTable()
+        torrents = []
+        for seed in range(num_torrents):
+            status = FakeStatus(seed)
+            torrent_id = '%040x' % seed
+            table.add(torrent_id, status)
+            torrents.append(fake_torrent(torrent_id, status))
+        torrent_ids = [torrent.torrent_id for torrent in torrents]
+
+        start = time.time()
+        funcs_status = [torrent.get_status(keys) for torrent in torrents]
+        funcs_time = time.time() - start
+
+        start = time.time()
+        table_status = table.get_status(torrent_ids, keys)
+        table_time = time.time() - start
+
+        self.assertEqual(funcs_status, table_status)
+        print(
+            '\n%d torrents, %d keys: status_funcs %.3fs, status table %.3fs'
+            % (num_torrents, len(keys), funcs_time, table_time)
+        )
@@ -8,6 +8,7 @@
 from __future__ import print_function, unicode_literals
 
 import os
+import sys
 import time
 from base64 import b64encode
 
@@ -20,7 +21,8 @@
 import deluge.core.torrent
 import deluge.tests.common as common
 from deluge._libtorrent import lt
-from deluge.common import utf8_encode_structure, windows_check
+from deluge.bencode import bencode
+from deluge.common import encode_pieces_rle, utf8_encode_structure, windows_check
 from deluge.core.core import Core
 from deluge.core.rpcserver import RPCServer
 from deluge.core.torrent import Torrent
@@ -96,10 +98,85 @@ def test_set_file_priorities(self):
         # Test with handle.piece_priorities as handle.file_priorities async
         # updates and will return old value. Also need to remove a priority
         # value as one file is much smaller than piece size so doesn't show.
+        time.sleep(0.2)  # Delay to wait for lt to apply the priorities
         piece_prio = handle.piece_priorities()
         result = all(p in piece_prio for p in [3, 2, 0, 5, 6, 7])
         self.assertTrue(result)
 
+    def test_file_priorities_read_lazily(self):
+        atp = self.get_torrent_atp('dir_with_6_files.torrent')
+        handle = self.session.add_torrent(atp)
+        torrent = Torrent(handle, {'file_priorities': None})
+        self.assertEqual(torrent.options['file_priorities'], [4] * 7)
+        torrent.handle = mock.Mock(wraps=handle)
+
+        # Status updates no longer read the file priorities from libtorrent.
+        torrent.update_status(handle.status())
+        self.assertFalse(torrent.handle.file_priorities.called)
+
+        new_priorities = [3, 1, 2, 0, 5, 6, 7]
+        torrent.set_file_priorities(new_priorities)
+        self.assertEqual(torrent.handle.prioritize_files.call_count, 1)
+        self.assertEqual(torrent.get_file_priorities(), new_priorities)
+        self.assertFalse(torrent.handle.file_priorities.called)
+
+        # They are read back from libtorrent once applied.
+        torrent.sync_file_priorities()
+        self.assertEqual(torrent.handle.file_priorities.call_count, 1)
+
+    @common.benchmark
+    def test_update_status_benchmark(self):
+        """Compare update_status with and without reading the file priorities."""
+        num_files, num_updates = 10000, 100
+        info = {
+            b'name': b'many_files',
+            b'piece length': 16384,
+            b'pieces': b'\x00' * 20,
+            b'files': [
+                {b'length': 1, b'path': [b'file%d' % index]}
+                for index in range(num_files)
+            ],
+        }
+        atp = {
+            'ti': lt.torrent_info(lt.bdecode(bencode({b'info': info}))),
+            'save_path': os.getcwd(),
+            'storage_mode': lt.storage_mode_t.storage_mode_sparse,
+        }
+        handle = self.session.add_torrent(atp)
+        torrent = Torrent(handle, {})
+
+        start = time.time()
+        for dummy in range(num_updates):
+            torrent.update_status(handle.status())
+            # The file priorities were read on every status update before.
+            torrent.options['file_priorities'] = handle.file_priorities()
+        before_time = time.time() - start
+
+        start = time.time()
+        for dummy in range(num_updates):
+            torrent.update_status(handle.status())
+        after_time = time.time() - start
+
+        print(
+            '\n%d updates of %d files: %.3fs reading the priorities (%d bytes each),'
+            ' %.3fs now'
+            % (
+                num_updates,
+                num_files,
+                before_time,
+                sys.getsizeof(handle.file_priorities()),
+                after_time,
+            )
+        )
+
+    def test_get_pieces_rle(self):
+        atp = self.get_torrent_atp('dir_with_6_files.torrent')
+        handle = self.session.add_torrent(atp)
+        torrent = Torrent(handle, {})
+        status = torrent.get_status(['pieces', 'pieces_rle'])
+        self.assertEqual(len(status['pieces']), torrent.torrent_info.num_pieces())
+        self.assertEqual(status['pieces_rle'], encode_pieces_rle(status['pieces']))
+
     def test_set_prioritize_first_last_pieces(self):
         piece_indexes = [
             0,
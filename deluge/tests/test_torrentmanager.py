@@ -5,19 +5,26 @@
 # See LICENSE for more details.
 #
 
-from __future__ import unicode_literals
+from __future__ import print_function, unicode_literals
 
+import os
+import tempfile
+import time
 import warnings
 from base64 import b64encode
+from hashlib import sha1
 
 import mock
 import pytest
-from twisted.internet import defer, task
+import six.moves.cPickle as pickle
+from twisted.internet import defer, reactor, task
 
 from deluge import component
 from deluge.bencode import bencode
 from deluge.core.core import Core
+from deluge.core.resumedatastore import MIGRATED_MARKER
 from deluge.core.rpcserver import RPCServer
+from deluge.core.torrentmanager import TorrentManagerState, TorrentState
 from deluge.error import InvalidTorrentError
 
 from . import common
@@ -55,6 +62,143 @@ def test_remove_torrent(self):
         )
         self.assertTrue(self.tm.remove(torrent_id, False))
 
+    @defer.inlineCallbacks
+    def test_remove_bulk(self):
+        download_location = tempfile.mkdtemp()
+        filename = common.get_test_data_file('test.torrent')
+        with open(filename, 'rb') as _file:
+            filedump = _file.read()
+        torrent_id = yield self.core.add_torrent_file_async(
+            filename, b64encode(filedump), {'download_location': download_location}
+        )
+        filepath = os.path.join(download_location, 'azcvsupdater_2.6.2.jar')
+        with open(filepath, 'wb') as _file:
+            _file.write(b'data')
+
+        events = []
+        event_manager = component.get('EventManager')
+        with mock.patch.object(
+            event_manager,
+            'emit',
+            side_effect=lambda event, **kwargs: events.append(event),
+        ):
+            errors = self.tm.remove_bulk(['invalid', torrent_id], remove_data=True)
+
+        self.assertEqual(errors, [('invalid', 'torrent_id invalid not in session.')])
+        self.assertEqual(
+            [event.name for event in events],
+            ['PreTorrentRemovedEvent', 'TorrentRemovedEvent', 'TorrentsRemovedEvent'],
+        )
+        self.assertEqual(events[-1].args, [[torrent_id]])
+        self.assertNotIn(torrent_id, self.tm.torrents)
+        self.assertTrue(os.path.isfile(filepath))
+
+        # The data is deleted once libtorrent has removed the torrent.
+        self.tm.on_alert_torrent_removed(mock.Mock(info_hash=torrent_id))
+        yield self.tm.data_deletion.jobs[torrent_id].deferred
+        self.assertFalse(os.path.isfile(filepath))
+
+    @defer.inlineCallbacks
+    def test_remove_data_added_again(self):
+        download_location = tempfile.mkdtemp()
+        filename = common.get_test_data_file('test.torrent')
+        with open(filename, 'rb') as _file:
+            filedump = _file.read()
+        options = {'download_location': download_location}
+        torrent_id = yield self.core.add_torrent_file_async(
+            filename, b64encode(filedump), options
+        )
+        filepath = os.path.join(download_location, 'azcvsupdater_2.6.2.jar')
+        with open(filepath, 'wb') as _file:
+            _file.write(b'data')
+
+        # Keep the deletion queued if libtorrent removes the torrent first.
+        self.tm.data_deletion.max_per_device = 0
+        self.tm.remove(torrent_id, remove_data=True)
+        yield self.core.add_torrent_file_async(filename, b64encode(filedump), options)
+        self.tm.on_alert_torrent_removed(mock.Mock(info_hash=torrent_id))
+        self.assertNotIn(torrent_id, self.tm.data_deletion.jobs)
+        self.assertTrue(os.path.isfile(filepath))
+
+    @defer.inlineCallbacks
+    def test_check_ended_without_checked_alert(self):
+        torrent_ids = []
+        for filename in ('test.torrent', 'test_torrent.file.torrent'):
+            filename = common.get_test_data_file(filename)
+            with open(filename, 'rb') as _file:
+                filedump = _file.read()
+            torrent_id = yield self.core.add_torrent_file_async(
+                filename, b64encode(filedump), {'add_paused': True}
+            )
+            torrent_ids.append(torrent_id)
+        torrent, other = (self.tm[torrent_id] for torrent_id in torrent_ids)
+        running = self.tm.check_scheduler.running
+        for _torrent in (torrent, other):
+            self.patch(_torrent, 'start_recheck', lambda: True)
+            _torrent.force_recheck()
+        self.assertEqual(list(running), [torrent.torrent_id])
+
+        # A file error ends the recheck and starts the next one on the device.
+        self.tm.on_alert_file_error(mock.Mock(handle=torrent.handle))
+        self.assertEqual(list(running), [other.torrent_id])
+
+        # A recheck paused by the user frees its slot.
+        self.tm.on_alert_torrent_paused(mock.Mock(handle=other.handle))
+        self.assertEqual(other.state, 'Paused')
+        self.assertEqual(running, {})
+
+    @defer.inlineCallbacks
+    def test_goal_options_schedule_seed_goals(self):
+        filename = common.get_test_data_file('test.torrent')
+        with open(filename, 'rb') as _file:
+            filedump = _file.read()
+        torrent_id = yield self.core.add_torrent_file_async(
+            filename, b64encode(filedump), {}
+        )
+        torrent = self.tm[torrent_id]
+        with mock.patch.object(self.tm.seed_goals, 'schedule') as schedule:
+            torrent.set_stop_at_ratio(True)
+            torrent.set_stop_ratio(2.0)
+            torrent.set_options({'stop_seed_time': 5.0, 'max_connections': 5})
+        self.assertEqual(schedule.call_args_list, [mock.call(torrent_id)] * 3)
+
+    @defer.inlineCallbacks
+    def test_metadata_cached_until_renamed(self):
+        filename = common.get_test_data_file('test.torrent')
+        with open(filename, 'rb') as _file:
+            filedump = _file.read()
+        torrent_id = yield self.core.add_torrent_file_async(
+            filename, b64encode(filedump), {}
+        )
+        torrent = self.tm[torrent_id]
+        files = torrent.get_files()
+        self.assertIs(torrent.get_files(), files)
+
+        self.assertIs(torrent.get_orig_files(), torrent.get_orig_files())
+        self.assertEqual(torrent.get_name(), 'azcvsupdater_2.6.2.jar')
+
+        self.tm.on_alert_file_renamed(
+            mock.Mock(handle=torrent.handle, index=0, new_name=lambda: 'renamed.jar')
+        )
+        self.assertIsNot(torrent.get_files(), files)
+        self.assertEqual(torrent.get_files(), files)
+
+    @defer.inlineCallbacks
+    def test_update_status_updates_table(self):
+        filename = common.get_test_data_file('test.torrent')
+        with open(filename, 'rb') as _file:
+            filedump = _file.read()
+        torrent_id = yield self.core.add_torrent_file_async(
+            filename, b64encode(filedump), {}
+        )
+        torrent = self.tm[torrent_id]
+        status = torrent.handle.status()
+        with mock.patch.object(self.tm.status_table, 'update') as update:
+            torrent.get_status(['total_done'], update=True)
+            torrent.update_status(status)
+        self.assertEqual(update.call_count, 2)
+        self.assertEqual(update.call_args, mock.call(torrent_id, status))
+
     def test_prefetch_metadata(self):
         from deluge._libtorrent import lt
 
@@ -121,3 +265,264 @@ def test_remove_invalid_torrent(self):
         self.assertRaises(
             InvalidTorrentError, self.tm.remove, 'torrentidthatdoesntexist'
         )
+
+    def test_open_state_migrates_pickle(self):
+        state = TorrentManagerState()
+        state.torrents.append(TorrentState('a' * 40, paused=True))
+        with open(os.path.join(self.tm.state_dir, 'torrents.state'), 'wb') as _file:
+            pickle.dump(state, _file, protocol=2)
+
+        self.assertFalse(self.tm.state_journal.exists())
+        self.assertEqual(self.tm.open_state(), state)
+        self.assertTrue(self.tm.state_journal.exists())
+        self.assertEqual(self.tm.state_journal.load(), {'a' * 40: state.torrents[0]})
+        # The migrated file is not loaded again.
+        self.assertFalse(
+            os.path.isfile(os.path.join(self.tm.state_dir, 'torrents.state'))
+        )
+
+    def test_open_state_bad_shard(self):
+        states = {
+            '%040x' % index: TorrentState('%040x' % index, queue=index)
+            for index in range(40)
+        }
+        self.tm.state_journal.replace(states)
+        bad_shard = self.tm.state_journal._shard('%040x' % 0)
+        with open(bad_shard.snapshot_path, 'wb') as _file:
+            _file.write(b'corrupt')
+        good_states = {
+            torrent_id: t_state
+            for torrent_id, t_state in states.items()
+            if self.tm.state_journal._shard(torrent_id) is not bad_shard
+        }
+        self.assertTrue(0 < len(good_states) < len(states))
+
+        bad_filepaths = bad_shard.filepaths()
+        with mock.patch('deluge.core.torrentmanager.archive_files') as archive:
+            state = self.tm.open_state()
+        # Only the bad shard is archived and reset.
+        self.assertEqual(archive.call_args[0][1], bad_filepaths)
+        self.assertEqual(
+            {t_state.torrent_id: t_state for t_state in state.torrents}, good_states
+        )
+        self.assertEqual(self.tm.state_journal.load(), good_states)
+        self.assertEqual(self.tm.state_journal.load_errors, {})
+
+    def test_open_state_queue_order(self):
+        states = {
+            '%040x' % index: TorrentState('%040x' % index, queue=index)
+            for index in range(3)
+        }
+        self.tm.state_journal.replace(states)
+        self.tm.state_journal.write_queue(['%040x' % 2, '%040x' % 0])
+
+        state = self.tm.open_state()
+        queue = {t_state.torrent_id: t_state.queue for t_state in state.torrents}
+        self.assertEqual(queue, {'%040x' % 0: 1, '%040x' % 1: -1, '%040x' % 2: 0})
+
+    @defer.inlineCallbacks
+    def test_save_state_changed_torrents(self):
+        filename = common.get_test_data_file('test.torrent')
+        with open(filename, 'rb') as _file:
+            filedump = _file.read()
+        torrent_id = yield self.core.add_torrent_file_async(
+            filename, b64encode(filedump), {}
+        )
+        # Wait for the state save of the added torrent.
+        while self.tm.is_saving_state:
+            yield task.deferLater(reactor, 0.01, lambda: None)
+        yield self.tm.save_state()
+        self.assertIn(torrent_id, self.tm.prev_saved_states)
+
+        self.tm[torrent_id].set_stop_ratio(5.0)
+        self.assertEqual(self.tm.state_changed, {torrent_id})
+        with mock.patch.object(
+            self.tm, 'create_state', wraps=self.tm.create_state
+        ) as create_state:
+            with mock.patch.object(self.tm.state_journal, 'write') as write:
+                yield self.tm.save_state()
+        create_state.assert_called_once_with({torrent_id})
+        self.assertEqual(list(write.call_args[0][0]), [torrent_id])
+        self.assertEqual(write.call_args[0][1], [])
+
+        # A queue change saves the queue order, not the torrent states.
+        filename = common.get_test_data_file('test_torrent.file.torrent')
+        with open(filename, 'rb') as _file:
+            filedump = _file.read()
+        other_id = yield self.core.add_torrent_file_async(
+            filename, b64encode(filedump), {}
+        )
+        while self.tm.is_saving_state:
+            yield task.deferLater(reactor, 0.01, lambda: None)
+        yield self.tm.save_state()
+        self.assertTrue(self.tm.queue_top(other_id))
+        self.assertEqual(self.tm.state_changed, set())
+        with mock.patch.object(self.tm.state_journal, 'write') as write:
+            with mock.patch.object(self.tm.state_journal, 'write_queue') as write_queue:
+                yield self.tm.save_state()
+        self.assertFalse(write.called)
+        write_queue.assert_called_once_with(self.tm.get_queue_order())
+
+        self.tm.remove(torrent_id, save_state=False)
+        with mock.patch.object(self.tm.state_journal, 'write') as write:
+            yield self.tm.save_state()
+        write.assert_called_once_with({}, [torrent_id])
+        self.assertEqual(self.tm.state_journal.load_queue(), [other_id])
+
+    def test_migrate_resume_data_file(self):
+        from deluge._libtorrent import lt
+
+        filepath = os.path.join(self.tm.state_dir, 'torrents.fastresume')
+        with open(filepath, 'wb') as _file:
+            _file.write(lt.bencode({'a' * 40: b'resume_data'}))
+
+        # The store was marked as migrated, with nothing to migrate, on start.
+        os.remove(os.path.join(self.tm.resume_data.path, MIGRATED_MARKER))
+        # An interrupted migration is repeated on the next start.
+        with mock.patch.object(self.tm.resume_data, 'flush', return_value=False):
+            self.tm.migrate_resume_data_file()
+        self.assertFalse(self.tm.resume_data.is_migrated())
+        self.tm.resume_data.pop('a' * 40)
+
+        self.tm.migrate_resume_data_file()
+        self.assertTrue(self.tm.resume_data.is_migrated())
+        self.assertEqual(self.tm.resume_data.get('a' * 40), b'resume_data')
+
+        self.tm.resume_data['a' * 40] = b'new_resume_data'
+        self.tm.resume_data.flush()
+        self.tm.migrate_resume_data_file()
+        self.assertEqual(self.tm.resume_data.get('a' * 40), b'new_resume_data')
+
+    def write_state(self, num_torrents):
+        """Write a state and torrent files for num_torrents, every other paused."""
+        state = TorrentManagerState()
+        for index in range(num_torrents):
+            info = {
+                b'name': b'test%d' % index,
+                b'piece length': 16384,
+                b'length': 1,
+                b'pieces': b'\x00' * 20,
+            }
+            torrent_id = sha1(bencode(info)).hexdigest()
+            with open(
+                os.path.join(self.tm.state_dir, torrent_id + '.torrent'), 'wb'
+            ) as _file:
+                _file.write(bencode({b'info': info}))
+            state.torrents.append(
+                TorrentState(
+                    torrent_id,
+                    save_path=self.tm.state_dir,
+                    paused=index % 2 == 0,
+                    queue=index,
+                )
+            )
+        self.tm.state_journal.replace({t.torrent_id: t for t in state.torrents})
+        return state
+
+    @defer.inlineCallbacks
+    def test_load_state(self):
+        state = self.write_state(25)
+        self.tm.load_state_batch_size = 10
+        events = []
+        event_manager = component.get('EventManager')
+        with mock.patch.object(
+            event_manager,
+            'emit',
+            side_effect=lambda event, **kwargs: events.append(event),
+        ):
+            yield self.tm.load_state()
+
+        self.assertEqual(len(self.tm.torrents), 25)
+        progress = [
+            event.args for event in events if event.name == 'SessionLoadProgressEvent'
+        ]
+        self.assertEqual(progress, [[10, 25], [20, 25], [25, 25]])
+        self.assertEqual(events[-1].name, 'SessionStartedEvent')
+        # The active torrents are added before the paused ones.
+        added = [event.args[0] for event in events if event.name == 'TorrentAddedEvent']
+        self.assertEqual(
+            added, [t.torrent_id for t in state.torrents[1::2] + state.torrents[::2]]
+        )
+
+        # The queue order of the state is restored.
+        yield task.deferLater(reactor, 0.5, lambda: None)
+        queue = sorted(self.tm.torrents, key=self.tm.get_queue_position)
+        self.assertEqual(queue, [t.torrent_id for t in state.torrents])
+
+    @defer.inlineCallbacks
+    def test_load_state_save_state(self):
+        state = self.write_state(3)
+        missing_id = state.torrents[0].torrent_id
+        os.remove(os.path.join(self.tm.state_dir, missing_id + '.torrent'))
+
+        with mock.patch.object(self.tm.state_journal, 'write') as write:
+            d = self.tm.load_state()
+            # The state is not saved while torrents are being loaded.
+            self.assertTrue(self.tm.is_loading_state)
+            yield self.tm.save_state()
+            self.assertFalse(write.called)
+            yield d
+            self.assertFalse(self.tm.is_loading_state)
+            yield self.tm.save_state()
+
+        self.assertEqual(len(self.tm.torrents), 2)
+        # Only the state of the torrent that failed to load is removed.
+        self.assertEqual(write.call_args[0][1], [missing_id])
+
+    @common.benchmark
+    @defer.inlineCallbacks
+    def test_load_state_benchmark(self):
+        num_torrents = 2000
+        self.write_state(num_torrents)
+        progress = []
+        event_manager = component.get('EventManager')
+        emit = event_manager.emit
+
+        def on_emit(event, **kwargs):
+            if event.name == 'SessionLoadProgressEvent':
+                progress.append(time.time())
+            return emit(event, **kwargs)
+
+        start = time.time()
+        with mock.patch.object(event_manager, 'emit', side_effect=on_emit):
+            yield self.tm.load_state()
+        elapsed = time.time() - start
+        self.assertEqual(len(self.tm.torrents), num_torrents)
+        print(
+            '\n%d torrents loaded in %.3fs, first batch in %.3fs (batch size %d)'
+            % (
+                num_torrents,
+                elapsed,
+                progress[0] - start,
+                self.tm.load_state_batch_size,
+            )
+        )
+
+    def test_restore_queue_order(self):
+        t_states = [TorrentState('%040x' % index, queue=index) for index in range(5)]
+
+        def restore(positions):
+            torrents = {
+                t_state.torrent_id: mock.Mock(
+                    get_queue_position=mock.Mock(return_value=position)
+                )
+                for t_state, position in zip(t_states, positions)
+            }
+            with mock.patch.object(self.tm, 'torrents', torrents):
+                self.tm._restore_queue_order(t_states)
+            return [torrents[t_state.torrent_id].handle for t_state in t_states]
+
+        handles = restore([0, 1, 4, 2, 3])
+        self.assertEqual(
+            [h.queue_position_bottom.call_count for h in handles], [0, 0, 0, 1, 1]
+        )
+        self.assertFalse(any(h.queue_position_top.called for h in handles))
+
+        handles = restore([3, 4, 0, 1, 2])
+        self.assertEqual(
+            [h.queue_position_top.call_count for h in handles], [1, 1, 0, 0, 0]
+        )
+        self.assertFalse(any(h.queue_position_bottom.called for h in handles))
+
+        handles = restore(range(5))
+        self.assertFalse(any(h.method_calls for h in handles))
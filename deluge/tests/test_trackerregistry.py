@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+
+from __future__ import unicode_literals
+
+from twisted.internet import task
+from twisted.trial import unittest
+
+from deluge.core.trackerregistry import TrackerRegistry, parse_tracker_host
+
+URL1 = 'http://tracker.example.com:6969/announce'
+URL2 = 'udp://tracker.example.com:1337/announce'
+URL3 = 'http://10.0.0.1/announce'
+
+
+class TrackerRegistryTestCase(unittest.TestCase):
+    def setUp(self):  # NOQA: N803
+        self.registry = TrackerRegistry()
+        self.clock = task.Clock()
+        self.registry.clock = self.clock
+
+    def test_parse_tracker_host(self):
+        self.assertEqual(parse_tracker_host(URL1), 'example.com')
+        self.assertEqual(parse_tracker_host(URL2), 'example.com')
+        self.assertEqual(parse_tracker_host(URL3), '10.0.0.1')
+        self.assertEqual(
+            parse_tracker_host('http://tracker.example.co.uk/announce'), 'example.co.uk'
+        )
+        self.assertEqual(parse_tracker_host('dht://'), 'DHT')
+
+    def test_set_trackers(self):
+        trackers1 = [{'url': URL1[:7] + URL1[7:]}, {'url': URL2}]
+        trackers2 = [{'url': URL1[:7] + URL1[7:]}, {'url': URL3}]
+        self.assertIsNot(trackers1[0]['url'], trackers2[0]['url'])
+        self.registry.set_trackers('id1', trackers1)
+        self.registry.set_trackers('id2', trackers2)
+        # The torrents share the url strings.
+        self.assertIs(trackers1[0]['url'], trackers2[0]['url'])
+        self.assertEqual(
+            self.registry.get_stats(),
+            {
+                'example.com': {
+                    'torrents': 2,
+                    'errors': 0,
+                    'latency': None,
+                    'next_announce': None,
+                },
+                '10.0.0.1': {
+                    'torrents': 1,
+                    'errors': 0,
+                    'latency': None,
+                    'next_announce': None,
+                },
+            },
+        )
+
+        self.registry.set_trackers('id2', [{'url': URL2}])
+        self.assertNotIn('10.0.0.1', self.registry.get_stats())
+        self.registry.remove('id1')
+        self.assertEqual(self.registry.get_stats()['example.com']['torrents'], 1)
+        self.registry.remove('id2')
+        self.assertEqual(self.registry.get_stats(), {})
+
+    def test_announce(self):
+        self.registry.set_trackers('id1', [{'url': URL1}])
+        self.registry.set_trackers('id2', [{'url': URL2}])
+
+        self.registry.on_announce('id1', URL1)
+        self.clock.advance(2)
+        self.registry.on_reply('id1', URL1, 1800)
+        stats = self.registry.get_stats()['example.com']
+        self.assertEqual(stats['latency'], 2)
+        self.assertEqual(stats['next_announce'], 1800)
+
+        self.registry.on_announce('id2', URL2)
+        self.clock.advance(1)
+        self.registry.on_error('id2', URL2)
+        stats = self.registry.get_stats()['example.com']
+        self.assertEqual(stats['errors'], 1)
+        self.assertEqual(stats['latency'], 2)
+        self.assertEqual(stats['next_announce'], 1799)
+
+        self.registry.on_reply('id2', URL2, 600)
+        stats = self.registry.get_stats()['example.com']
+        self.assertEqual(stats['errors'], 0)
+        self.assertEqual(stats['next_announce'], 600)
+
+    def test_alert_for_unknown_tracker(self):
+        self.registry.set_trackers('id1', [{'url': URL1}])
+        self.registry.on_error('id1', URL3)
+        self.registry.on_error('id2', URL1)
+        self.assertEqual(list(self.registry.get_stats()), ['example.com'])
+        self.assertEqual(self.registry.get_stats()['example.com']['errors'], 0)
@@ -10,12 +10,23 @@
 from __future__ import print_function, unicode_literals
 
 import base64
+import os
+import struct
+import time
+import zlib
 
 import rencode
 from twisted.trial import unittest
 
 import deluge.log
-from deluge.transfer import DelugeTransferProtocol
+from deluge.transfer import (
+    CODECS,
+    COMPRESSION_THRESHOLD,
+    DelugeTransferProtocol,
+    select_compression,
+)
+
+from . import common
 
 deluge.log.setup_logger('none')
 
@@ -358,6 +369,109 @@ def test_receive_middle_of_header(self):
         message2 = self.transfer.get_messages_in().pop(0)
         self.assertEqual(rencode.dumps(self.msg2), rencode.dumps(message2))
 
+    def test_receive_corrupt_message(self):
+        """
+        Receive a message with a corrupt payload followed by a valid message and
+        verify that only the corrupt message is discarded.
+
+        """
+        msg1 = base64.b64decode(self.msg1_expected_compressed_base64)
+        corrupt = msg1[:10] + b'\x00' * (len(msg1) - 10)
+        self.transfer.dataReceived(
+            corrupt + base64.b64decode(self.msg2_expected_compressed_base64)
+        )
+        messages = self.transfer.get_messages_in()
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(rencode.dumps(self.msg2), rencode.dumps(messages[0]))
+
+    def test_receive_one_byte_at_a_time(self):
+        msg_bytes = base64.b64decode(self.msg2_expected_compressed_base64)
+        for dummy in self.receive_parts_helper(msg_bytes, 1):
+            pass
+        message = self.transfer.get_messages_in().pop(0)
+        self.assertEqual(rencode.dumps(self.msg2), rencode.dumps(message))
+
+    def test_compression_codecs(self):
+        """
+        Send and receive a message with each available codec.
+
+        """
+        for codec in CODECS:
+            transfer = TransferTestClass()
+            transfer.set_compression(codec.name)
+            transfer.transfer_message(self.msg2)
+            data = transfer.get_messages_out_joined()
+            self.assertEqual(data[0:1], codec.header)
+            for dummy in self.receive_parts_helper(data, 7):
+                pass
+            message = self.transfer.get_messages_in().pop(0)
+            self.assertEqual(rencode.dumps(self.msg2), rencode.dumps(message))
+
+    def test_compression_threshold(self):
+        self.transfer.set_compression('zlib', threshold=COMPRESSION_THRESHOLD)
+        self.transfer.transfer_message(self.msg1)
+        self.assertEqual(self.transfer.get_messages_out_joined()[0:1], b'N')
+        self.transfer.messages_out = []
+        self.transfer.transfer_message(['x' * COMPRESSION_THRESHOLD])
+        self.assertEqual(self.transfer.get_messages_out_joined()[0:1], b'D')
+
+    def test_select_compression(self):
+        self.assertEqual(
+            select_compression(['unknown', 'zlib', 'none']),
+            ('zlib', None, COMPRESSION_THRESHOLD),
+        )
+        self.assertEqual(select_compression([['zlib', 1]]), ('zlib', 1, 0))
+        self.assertEqual(select_compression([['zlib', 100]]), ('zlib', 9, 0))
+        self.assertEqual(select_compression([['zlib', 'x'], 1]), ('zlib', None, 0))
+        self.assertEqual(
+            select_compression(['zlib', 'none'], local=True), ('none', None, 0)
+        )
+        self.assertEqual(select_compression([]), ('zlib', None, 0))
+
+    def test_receive_split_messages(self):
+        """
+        Receive messages of various sizes in parts that split them at
+        different points and verify each message is received intact.
+
+        """
+        payloads = [
+            base64.b64encode(os.urandom(size)).decode() for size in (10, 1000, 20000, 5)
+        ]
+        msg_bytes = b''
+        for payload in payloads:
+            compressed = zlib.compress(rencode.dumps(payload), 1)
+            msg_bytes += b'D' + struct.pack('!i', len(compressed)) + compressed
+
+        for packet_size in (3, 1024, 4099):
+            for dummy in self.receive_parts_helper(msg_bytes, packet_size):
+                pass
+            self.assertEqual(self.transfer.get_messages_in(), payloads)
+            del self.transfer.get_messages_in()[:]
+
+    @common.benchmark
+    def test_receive_throughput(self):
+        """
+        Benchmark receiving messages of 1KB to 50MB in 64KiB parts, as read
+        from the network, and verify each message is received intact.
+
+        """
+        packet_size = 64 * 1024
+        for size in (1024, 64 * 1024, 1024 ** 2, 10 * 1024 ** 2, 50 * 1024 ** 2):
+            payload = base64.b64encode(os.urandom(size * 3 // 4)).decode()
+            compressed = zlib.compress(rencode.dumps(payload), 1)
+            msg_bytes = b'D' + struct.pack('!i', len(compressed)) + compressed
+
+            start = time.time()
+            for dummy in range(0, len(msg_bytes), packet_size):
+                self.transfer.dataReceived(msg_bytes[dummy : dummy + packet_size])
+            elapsed = time.time() - start
+
+            self.assertEqual(self.transfer.get_messages_in().pop(0), payload)
+            print(
+                '\n%9d bytes received in %.4fs (%.1f MiB/s)'
+                % (size, elapsed, size / 1024.0 ** 2 / max(elapsed, 1e-6))
+            )
+
     # Needs file containing big data structure e.g. like thetorrent list as it is transfered by the daemon
     # def test_simulate_big_transfer(self):
     #    filename = '../deluge.torrentlist'
@@ -14,12 +14,182 @@
 import zlib
 
 import rencode
+import six
 from twisted.internet.protocol import Protocol
 
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 log = logging.getLogger(__name__)
 
 MESSAGE_HEADER_SIZE = 5
 
+# Payloads smaller than this are sent uncompressed if the peer supports it.
+COMPRESSION_THRESHOLD = 1024
+
+if six.PY2:
+
+    def _slice(data, start, end):
+        """Returns a zero-copy slice of data"""
+        return buffer(data, start, end - start)  # NOQA: F821
+
+
+else:
+
+    def _slice(data, start, end):
+        """Returns a zero-copy slice of data"""
+        return memoryview(data)[start:end]
+
+
+class _NoDecompressor(object):
+    """Decompressor interface for uncompressed payloads"""
+
+    eof = True
+
+    def decompress(self, data):
+        return bytes(data)
+
+    def flush(self):
+        return b''
+
+
+class _LZ4Decompressor(object):
+    """Adds flush to the lz4 frame decompressor interface"""
+
+    def __init__(self):
+        self._decompressor = lz4.frame.LZ4FrameDecompressor()
+
+    @property
+    def eof(self):
+        return self._decompressor.eof
+
+    def decompress(self, data):
+        return self._decompressor.decompress(bytes(data))
+
+    def flush(self):
+        return b''
+
+
+class Codec(object):
+    """A payload compression codec.
+
+    Args:
+        name (str): The name used when negotiating the codec.
+        header (bytes): The first byte of the message header identifying the codec.
+        compress (func): Called with the data and level to compress the data.
+        decompressobj (func): Returns a new streaming decompressor.
+        default_level (int): The compression level if none is negotiated.
+        levels (tuple): The lowest and highest compression level, or None
+            if the codec has no levels.
+
+    """
+
+    def __init__(
+        self, name, header, compress, decompressobj, default_level=None, levels=None
+    ):
+        self.name = name
+        self.header = header
+        self.compress = compress
+        self.decompressobj = decompressobj
+        self.default_level = default_level
+        self.levels = levels
+
+    def clamp_level(self, level):
+        """Returns a level within the codec range, None for the default level."""
+        if self.levels is None or not isinstance(level, six.integer_types):
+            return None
+        return min(max(level, self.levels[0]), self.levels[1])
+
+
+# The available codecs in order of preference. The 'D' header of the
+# original protocol is zlib, so zlib messages are understood by old peers.
+CODECS = [
+    Codec(
+        'zlib',
+        b'D',
+        zlib.compress,
+        zlib.decompressobj,
+        zlib.Z_DEFAULT_COMPRESSION,
+        (-1, 9),
+    ),
+    Codec('none', b'N', lambda data, level: data, _NoDecompressor),
+]
+if lz4:
+    CODECS.insert(
+        0,
+        Codec(
+            'lz4',
+            b'L',
+            lambda data, level: lz4.frame.compress(data, compression_level=level),
+            _LZ4Decompressor,
+            0,
+            (0, 16),
+        ),
+    )
+if zstandard:
+    CODECS.insert(
+        0,
+        Codec(
+            'zstd',
+            b'Z',
+            lambda data, level: zstandard.ZstdCompressor(level=level).compress(data),
+            lambda: zstandard.ZstdDecompressor().decompressobj(),
+            3,
+            (1, 22),
+        ),
+    )
+CODECS_BY_NAME = {codec.name: codec for codec in CODECS}
+CODECS_BY_HEADER = {codec.header: codec for codec in CODECS}
+
+
+def get_compression_offer():
+    """Returns the names of the available codecs, most preferred first."""
+    return [codec.name for codec in CODECS]
+
+
+def select_compression(offer, local=False):
+    """Select the codec to use from those offered by the peer.
+
+    Args:
+        offer (list): The offered codecs, most preferred first. Each is a codec
+            name or a [name, level] pair.
+        local (bool): If the peer is on the loopback interface, where
+            compression is not worth the cpu time.
+
+    Returns:
+        tuple: The codec name, compression level and the size threshold for
+            sending payloads uncompressed.
+
+    """
+    offered = {}
+    names = []
+    for item in offer:
+        try:
+            name, level = (item, None) if isinstance(item, six.string_types) else item
+        except (TypeError, ValueError):
+            continue
+        if name in CODECS_BY_NAME and name not in offered:
+            # The peer level is clamped as compressing fails on invalid levels.
+            offered[name] = CODECS_BY_NAME[name].clamp_level(level)
+            names.append(name)
+
+    threshold = COMPRESSION_THRESHOLD if 'none' in offered else 0
+    if local and 'none' in offered:
+        return 'none', None, 0
+    for name in names:
+        if name != 'none':
+            return name, offered[name], threshold
+    if 'none' in offered:
+        return 'none', None, 0
+    return 'zlib', None, 0
+
 
 class DelugeTransferProtocol(Protocol, object):
     """
@@ -27,30 +197,79 @@ class DelugeTransferProtocol(Protocol, object):
     Data messages are transfered with a header containing
     the length of the data to be transfered (payload).
 
+    The payload is decompressed as it arrives so received data is never
+    copied more than once, however many parts a message is received in.
+
+    The first byte of the header identifies the compression codec of the
+    payload. Messages are sent with zlib, understood by all peers, unless
+    another codec has been negotiated with set_compression.
+
     """
 
     def __init__(self):
-        self._buffer = b''  # TODO: Look into using bytearray instead of byte string.
+        self._buffer = bytearray()  # Holds a partially received header.
         self._message_length = 0
+        self._message_remaining = 0
+        self._decompressor = None
+        self._decompressed = []
+        self._decompress_error = None
         self._bytes_received = 0
         self._bytes_sent = 0
+        self._codec = CODECS_BY_NAME['zlib']
+        self._compression_level = self._codec.default_level
+        self._compression_threshold = 0
+
+    def set_compression(self, name, level=None, threshold=0):
+        """
+        Set the codec used to send messages, the peer must support it.
+
+        :param name: the codec name
+        :type name: str
+        :param level: the compression level, None for the codec default
+        :type level: int
+        :param threshold: payloads smaller than this are sent uncompressed
+        :type threshold: int
+
+        """
+        self._codec = CODECS_BY_NAME[name]
+        self._compression_level = self._codec.default_level if level is None else level
+        self._compression_threshold = threshold
+        log.debug(
+            'Using %s compression (level: %s, threshold: %s)',
+            name,
+            self._compression_level,
+            threshold,
+        )
+
+    def get_compression(self):
+        """
+        Returns the name of the codec used to send messages.
+
+        :rtype: str
+
+        """
+        return self._codec.name
 
     def transfer_message(self, data):
         """
         Transfer the data.
 
         The data will be serialized and compressed before being sent.
-        First a header is sent - containing the length of the compressed payload
-        to come as a signed integer. After the header, the payload is transfered.
+        First a header is sent - containing the codec and the length of the compressed
+        payload to come as a signed integer. After the header, the payload is transfered.
 
         :param data: data to be transfered in a data structure serializable by rencode.
 
         """
-        compressed = zlib.compress(rencode.dumps(data))
+        data = rencode.dumps(data)
+        codec = self._codec
+        if len(data) < self._compression_threshold:
+            codec = CODECS_BY_NAME['none']
+        compressed = codec.compress(data, self._compression_level)
         size_data = len(compressed)
         # Store length as a signed integer (using 4 bytes). "!" denotes network byte order.
         payload_len = struct.pack('!i', size_data)
-        header = b'D' + payload_len
+        header = codec.header + payload_len
         self._bytes_sent += len(header) + len(compressed)
         self.transport.write(header)
         self.transport.write(compressed)
@@ -63,24 +282,35 @@ def dataReceived(self, data):  # NOQA: N802
                      a messsage.
 
         Global variables:
-            _buffer         - contains the data received
-            _message_length - the length of the payload of the current message.
+            _buffer            - contains the header data received
+            _message_length    - the length of the payload of the current message.
+            _message_remaining - the payload bytes still to be received.
 
         """
-        self._buffer += data
         self._bytes_received += len(data)
+        data_len = len(data)
+        pos = 0
 
-        while len(self._buffer) >= MESSAGE_HEADER_SIZE:
-            if self._message_length == 0:
+        while pos < data_len:
+            if not self._message_remaining:
+                # Collect the header of a new message.
+                needed = MESSAGE_HEADER_SIZE - len(self._buffer)
+                self._buffer += _slice(data, pos, pos + needed)
+                pos += needed
+                if len(self._buffer) < MESSAGE_HEADER_SIZE:
+                    break
                 self._handle_new_message()
-            # We have a complete packet
-            if len(self._buffer) >= self._message_length:
-                self._handle_complete_message(self._buffer[: self._message_length])
-                # Remove message data from buffer
-                self._buffer = self._buffer[self._message_length :]
-                self._message_length = 0
-            else:
-                break
+                if not self._message_length:
+                    # Invalid header, the rest of the data cannot be parsed.
+                    break
+                continue
+
+            end = min(pos + self._message_remaining, data_len)
+            self._decompress(_slice(data, pos, end))
+            self._message_remaining -= end - pos
+            pos = end
+            if not self._message_remaining:
+                self._handle_complete_message()
 
     def _handle_new_message(self):
         """
@@ -90,16 +320,19 @@ def _handle_new_message(self):
         """
         try:
             # Read the first bytes of the message (MESSAGE_HEADER_SIZE bytes)
-            header = self._buffer[:MESSAGE_HEADER_SIZE]
+            header = bytes(self._buffer[:MESSAGE_HEADER_SIZE])
             payload_len = header[1:MESSAGE_HEADER_SIZE]
-            if header[0:1] != b'D':
+            codec = CODECS_BY_HEADER.get(header[0:1])
+            if codec is None:
                 raise Exception(
                     'Invalid header format. First byte is %d' % ord(header[0:1])
                 )
             # Extract the length stored as a signed integer (using 4 bytes)
             self._message_length = struct.unpack('!i', payload_len)[0]
-            if self._message_length < 0:
-                raise Exception('Message length is negative: %d' % self._message_length)
+            if self._message_length <= 0:
+                raise Exception(
+                    'Message length is not positive: %d' % self._message_length
+                )
             # Remove the header from the buffer
             self._buffer = self._buffer[MESSAGE_HEADER_SIZE:]
         except Exception as ex:
@@ -108,25 +341,52 @@ def _handle_new_message(self):
                 'This version of Deluge cannot communicate with the sender of this data.'
             )
             self._message_length = 0
-            self._buffer = b''
+            self._buffer = bytearray()
+        else:
+            self._message_remaining = self._message_length
+            self._decompressor = codec.decompressobj()
+            self._decompressed = []
+            self._decompress_error = None
 
-    def _handle_complete_message(self, data):
+    def _decompress(self, data):
         """
-        Handles a complete message as it is transfered on the network.
+        Decompress the next part of the payload of the current message.
 
-        :param data: a zlib compressed string encoded with rencode.
+        :param data: a part of a zlib compressed string encoded with rencode.
 
         """
+        if self._decompress_error:
+            return
         try:
-            self.message_received(
-                rencode.loads(zlib.decompress(data), decode_utf8=True)
-            )
+            self._decompressed.append(self._decompressor.decompress(data))
+        except Exception as ex:
+            self._decompress_error = ex
+
+    def _handle_complete_message(self):
+        """
+        Handles a complete message as it is transfered on the network.
+
+        """
+        try:
+            if self._decompress_error:
+                raise self._decompress_error
+            self._decompressed.append(self._decompressor.flush())
+            if not getattr(self._decompressor, 'eof', True):
+                raise ValueError('Incomplete compressed data')
+            message = rencode.loads(b''.join(self._decompressed), decode_utf8=True)
         except Exception as ex:
             log.warning(
                 'Failed to decompress (%d bytes) and load serialized data with rencode: %s',
-                len(data),
+                self._message_length,
                 ex,
             )
+        else:
+            self.message_received(message)
+        finally:
+            self._message_length = 0
+            self._decompressor = None
+            self._decompressed = []
+            self._decompress_error = None
 
     def get_bytes_recv(self):
         """
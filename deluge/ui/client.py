@@ -20,7 +20,11 @@
 from deluge import error
 from deluge.common import get_localhost_auth, get_version
 from deluge.decorators import deprecated
-from deluge.transfer import DelugeTransferProtocol
+from deluge.transfer import (
+    COMPRESSION_THRESHOLD,
+    DelugeTransferProtocol,
+    get_compression_offer,
+)
 
 RPC_RESPONSE = 1
 RPC_ERROR = 2
@@ -200,6 +204,21 @@ def send_request(self, request):
         except Exception as ex:
             log.warning('Error occurred when sending message: %s', ex)
 
+    def send_batch_request(self, batch_request, requests):
+        """
+        Sends a 'daemon.batch' RPCRequest to the server.
+
+        The requests are stored so the results of the batch can be handled as
+        responses to each of them.
+
+        :param batch_request: RPCRequest calling 'daemon.batch' for the requests
+        :param requests: list of RPCRequest
+
+        """
+        for request in requests:
+            self.__rpc_requests[request.request_id] = request
+        self.send_request(batch_request)
+
 
 class DelugeRPCClientFactory(ClientFactory):
     protocol = DelugeRPCProtocol
@@ -256,6 +275,12 @@ def __init__(self, event_handlers=None):
         self.__request_counter = 0
         self.__deferred = {}
 
+        # Calls made in the same reactor iteration are sent together in a
+        # single 'daemon.batch' request once the daemon is known to support it.
+        self.batch_calls = False
+        self.__pending_requests = []
+        self.__flush_call = None
+
         # This is set when a connection is made to the daemon
         self.protocol = None
 
@@ -284,6 +309,7 @@ def connect(self, host, port):
 
         """
         log.debug('sslproxy.connect()')
+        self.batch_calls = False
         self.host = host
         self.port = port
         self.__connector = reactor.connectSSL(
@@ -317,14 +343,27 @@ def call(self, method, *args, **kwargs):
             or RPCError is received from the daemon
 
         """
+        # The 'daemon' methods are handled by the daemon outside of batches.
+        batch = self.batch_calls and not method.startswith('daemon.')
+        if not batch and self.__pending_requests:
+            # Keep the calls in order.
+            self.flush_calls()
+
         # Create the DelugeRPCRequest to pass to protocol.send_request()
         request = DelugeRPCRequest()
         request.request_id = self.__request_counter
         request.method = method
         request.args = args
         request.kwargs = kwargs
-        # Send the request to the server
-        self.protocol.send_request(request)
+        if batch:
+            # Queue the request to be sent with any others made before the
+            # next reactor iteration.
+            self.__pending_requests.append(request)
+            if not self.__flush_call:
+                self.__flush_call = reactor.callLater(0, self.flush_calls)
+        else:
+            # Send the request to the server
+            self.protocol.send_request(request)
         # Create a Deferred object to return and add a default errback to print
         # the error.
         d = defer.Deferred()
@@ -338,6 +377,81 @@ def call(self, method, *args, **kwargs):
 
         return d
 
+    def flush_calls(self):
+        """
+        Sends the queued requests to the daemon, in a single 'daemon.batch'
+        request if there is more than one.
+        """
+        if self.__flush_call and self.__flush_call.active():
+            self.__flush_call.cancel()
+        self.__flush_call = None
+        requests, self.__pending_requests = self.__pending_requests, []
+        if not requests:
+            return
+        if len(requests) == 1:
+            self.protocol.send_request(requests[0])
+            return
+
+        batch_request = DelugeRPCRequest()
+        batch_request.request_id = self.__request_counter
+        batch_request.method = 'daemon.batch'
+        batch_request.args = (
+            [(request.method, request.args, request.kwargs) for request in requests],
+        )
+        batch_request.kwargs = {}
+        d = defer.Deferred()
+        self.__deferred[self.__request_counter] = d
+        self.__request_counter += 1
+
+        d.addCallbacks(
+            self.__on_batch,
+            self.__on_batch_fail,
+            callbackArgs=[requests],
+            errbackArgs=[requests],
+        )
+        self.protocol.send_batch_request(batch_request, requests)
+
+    def __on_batch(self, results, requests):
+        # Handle each result as if it were a response to the single request.
+        for request, (success, result) in zip(requests, results):
+            if success:
+                self.protocol.message_received(
+                    (RPC_RESPONSE, request.request_id, result)
+                )
+            else:
+                self.protocol.message_received(
+                    (RPC_ERROR, request.request_id) + tuple(result)
+                )
+
+    def __on_batch_fail(self, failure, requests):
+        exception = failure.value
+        if (
+            failure.check(error.WrappedException)
+            and exception.type == 'AttributeError'
+            and 'daemon.batch' in exception.message
+        ):
+            # Older daemons have no 'daemon.batch' method.
+            log.debug('Daemon does not support batched calls')
+            self.batch_calls = False
+            for request in requests:
+                self.protocol.send_request(request)
+            return
+
+        # The calls may have run so fail them rather than sending them again.
+        log.warning('Batched call failed: %s', failure.getErrorMessage())
+        if failure.check(error.WrappedException):
+            args = (exception.message, exception.type, exception.traceback)
+        else:
+            args = (
+                failure.getErrorMessage(),
+                failure.type.__name__,
+                failure.getTraceback(),
+            )
+        for request in requests:
+            self.protocol.message_received(
+                (RPC_ERROR, request.request_id, 'WrappedException', args, {}, args[2])
+            )
+
     def pop_deferred(self, request_id):
         """
         Pops a Deferred object.  This is generally called once we receive the
@@ -407,22 +521,33 @@ def on_info_fail(reason):
     def __on_connect_fail(self, reason):
         self.daemon_info_deferred.errback(reason)
 
-    def authenticate(self, username, password):
+    def authenticate(self, username, password, offer_compression=True):
         log.debug('%s.authenticate: %s', self.__class__.__name__, username)
         login_deferred = defer.Deferred()
-        d = self.call('daemon.login', username, password, client_version=get_version())
+        kwargs = {'client_version': get_version()}
+        if offer_compression:
+            kwargs['compression'] = get_compression_offer()
+        d = self.call('daemon.login', username, password, **kwargs)
         d.addCallbacks(
             self.__on_login,
             self.__on_login_fail,
-            callbackArgs=[username, login_deferred],
-            errbackArgs=[login_deferred],
+            callbackArgs=[username, login_deferred, offer_compression],
+            errbackArgs=[login_deferred, username, password, offer_compression],
         )
         return login_deferred
 
-    def __on_login(self, result, username, login_deferred):
+    def __on_login(self, result, username, login_deferred, offer_compression):
         log.debug('__on_login called: %s %s', username, result)
         self.username = username
         self.authentication_level = result
+        if offer_compression:
+            # The daemon accepted the codecs offer so it supports uncompressed
+            # messages. Other than zlib, its codecs are unknown.
+            if self.host in ('127.0.0.1', 'localhost', '::1'):
+                self.protocol.set_compression('none')
+            else:
+                self.protocol.set_compression('zlib', threshold=COMPRESSION_THRESHOLD)
+        self.batch_calls = True
         # We need to tell the daemon what events we're interested in receiving
         if self.__factory.event_handlers:
             self.call('daemon.set_event_interest', list(self.__factory.event_handlers))
@@ -432,7 +557,19 @@ def __on_login(self, result, username, login_deferred):
 
         login_deferred.callback(result)
 
-    def __on_login_fail(self, result, login_deferred):
+    def __on_login_fail(
+        self, result, login_deferred, username, password, offer_compression
+    ):
+        if (
+            offer_compression
+            and result.check(error.WrappedException)
+            and result.value.type == 'TypeError'
+        ):
+            # Older daemons reject the compression keyword argument.
+            log.debug('Daemon does not support compression negotiation')
+            d = self.authenticate(username, password, offer_compression=False)
+            d.chainDeferred(login_deferred)
+            return
         login_deferred.errback(result)
 
     def __on_auth_levels_mappings(self, result):
@@ -772,8 +909,12 @@ def deregister_event_handler(self, event, handler):
             self._daemon_proxy.deregister_event_handler(event, handler)
 
     def force_call(self, block=False):
-        # no-op for now.. we'll see if we need this in the future
-        pass
+        """
+        Sends any calls waiting to be batched together without waiting for
+        the next reactor iteration.
+        """
+        if isinstance(self._daemon_proxy, DaemonSSLProxy):
+            self._daemon_proxy.flush_calls()
 
     def __getattr__(self, method):
         return DottedObject(self._daemon_proxy, method)
@@ -12,7 +12,7 @@
 import logging
 
 import deluge.component as component
-from deluge.common import decode_bytes, fpeer
+from deluge.common import decode_bytes, decode_pieces_rle, fpeer
 from deluge.configmanager import ConfigManager
 
 from .piecesbar import PiecesBar
@@ -38,6 +38,9 @@ def __init__(self):
 
         self.progressbar = self.main_builder.get_object('progressbar')
         self.piecesbar = None
+        # The pieces status key, daemons without 'pieces_rle' send the list.
+        self.pieces_key = 'pieces_rle'
+        self.pieces_rle = self.pieces = None
 
         self.add_tab_widget('summary_availability', fratio, ('distributed_copies',))
         self.add_tab_widget(
@@ -93,7 +96,7 @@ def update(self):
         # Get the torrent status
         status_keys = self.status_keys
         if self.config['show_piecesbar']:
-            status_keys.extend(['pieces', 'num_pieces'])
+            status_keys = status_keys + [self.pieces_key, 'num_pieces']
 
         component.get('SessionProxy').get_torrent_status(
             selected, status_keys
@@ -116,17 +119,30 @@ def _on_get_torrent_status(self, status):
         if self.config['show_piecesbar']:
             if self.piecesbar.get_fraction() != fraction:
                 self.piecesbar.set_fraction(fraction)
-            if (
-                status['state'] != 'Checking'
-                and self.piecesbar.get_pieces() != status['pieces']
-            ):
+            pieces = self._get_pieces(status)
+            if status['state'] != 'Checking' and self.piecesbar.get_pieces() != pieces:
                 # Skip pieces assignment if checking torrent.
-                self.piecesbar.set_pieces(status['pieces'], status['num_pieces'])
+                self.piecesbar.set_pieces(pieces, status['num_pieces'])
             self.piecesbar.update()
         else:
             if self.progressbar.get_fraction() != fraction:
                 self.progressbar.set_fraction(fraction)
 
+    def _get_pieces(self, status):
+        """The pieces list from the status, decoding the runs only when changed."""
+        if self.pieces_key == 'pieces_rle' and 'pieces_rle' not in status:
+            self.pieces_key = 'pieces'
+        if self.pieces_key == 'pieces':
+            return status.get('pieces')
+
+        pieces_rle = status['pieces_rle']
+        if pieces_rle is None:
+            return None
+        if pieces_rle != self.pieces_rle:
+            self.pieces_rle = pieces_rle
+            self.pieces = decode_pieces_rle(pieces_rle)
+        return self.pieces
+
     def on_show_piecesbar_config_changed(self, key, show):
         if show:
             self.show_piecesbar()
@@ -25,7 +25,7 @@
 from deluge import component, httpdownloader
 from deluge.common import AUTH_LEVEL_DEFAULT, get_magnet_info, is_magnet
 from deluge.configmanager import get_config_dir
-from deluge.error import NotAuthorizedError
+from deluge.error import NotAuthorizedError, WrappedException
 from deluge.ui.client import Client, client
 from deluge.ui.common import FileTree2, TorrentInfo
 from deluge.ui.coreconfig import CoreConfig
@@ -373,6 +373,8 @@ def __init__(self):
         self.hostlist = HostList()
         self.core_config = CoreConfig()
         self.event_queue = EventQueue()
+        # The last (version, filter_tree) received from the daemon.
+        self._filter_tree = (None, None)
         try:
             self.sessionproxy = component.get('SessionProxy')
         except KeyError:
@@ -512,7 +514,12 @@ def got_stats(stats):
                 'has_incoming_connections'
             ]
 
-        def got_filters(filters):
+        def got_filters(result):
+            version, filters = result
+            if filters is None:
+                filters = self._filter_tree[1]
+            else:
+                self._filter_tree = (version, filters)
             ui_info['filters'] = filters
 
         def got_free_space(free_space):
@@ -530,7 +537,19 @@ def on_complete(result):
         d1 = component.get('SessionProxy').get_torrents_status(filter_dict, keys)
         d1.addCallback(got_torrents)
 
-        d2 = client.core.get_filter_tree()
+        def on_filters_error(failure):
+            if not (
+                failure.check(WrappedException)
+                and failure.value.type == 'AttributeError'
+            ):
+                return failure
+            # Daemons without versioned filter trees.
+            d = client.core.get_filter_tree()
+            d.addCallback(lambda filters: (None, filters))
+            return d
+
+        d2 = client.core.get_filter_tree_versioned(self._filter_tree[0])
+        d2.addErrback(on_filters_error)
         d2.addCallback(got_filters)
 
         d3 = client.core.get_session_status(
@@ -715,8 +734,7 @@ def add_torrents(self, torrents):
             }])
 
         """
-        deferreds = []
-
+        torrents_to_add = []
         for torrent in torrents:
             if is_magnet(torrent['path']):
                 log.info(
@@ -724,8 +742,7 @@ def add_torrents(self, torrents):
                     torrent['path'],
                     torrent['options'],
                 )
-                d = client.core.add_torrent_magnet(torrent['path'], torrent['options'])
-                deferreds.append(d)
+                torrents_to_add.append((torrent['path'], None, torrent['options']))
             else:
                 filename = os.path.basename(torrent['path'])
                 with open(torrent['path'], 'rb') as _file:
@@ -735,11 +752,28 @@ def add_torrents(self, torrents):
                     filename,
                     torrent['options'],
                 )
-                d = client.core.add_torrent_file_async(
-                    filename, fdump, torrent['options']
-                )
-                deferreds.append(d)
-        return DeferredList(deferreds, consumeErrors=False)
+                torrents_to_add.append((filename, fdump, torrent['options']))
+
+        def on_bulk_error(failure):
+            if not (
+                failure.check(WrappedException)
+                and failure.value.type == 'AttributeError'
+            ):
+                return failure
+            # Daemons without bulk adding.
+            deferreds = []
+            for path, fdump, options in torrents_to_add:
+                if fdump is None:
+                    deferreds.append(client.core.add_torrent_magnet(path, options))
+                else:
+                    deferreds.append(
+                        client.core.add_torrent_file_async(path, fdump, options)
+                    )
+            return DeferredList(deferreds, consumeErrors=False)
+
+        d = client.core.add_torrents_bulk(torrents_to_add)
+        d.addErrback(on_bulk_error)
+        return d
 
     def _get_host(self, host_id):
         """Information about a host from supplied host id.